@@ -34,6 +34,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -43,12 +44,19 @@ def run_migrations_offline() -> None:
 async def run_migrations_online() -> None:
     connectable = create_async_engine(settings.postgres.DATABASE_URL, echo=True)
 
-    async with connectable.begin() as connection:
+    # транзакціями керує alembic (по одній на міграцію): autocommit_block()
+    # для CREATE INDEX CONCURRENTLY не працює всередині зовнішньої транзакції
+    async with connectable.connect() as connection:
         await connection.run_sync(sync_migrations)
+    await connectable.dispose()
 
 
 def sync_migrations(sync_connection):
-    context.configure(connection=sync_connection, target_metadata=target_metadata)
+    context.configure(
+        connection=sync_connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
     with context.begin_transaction():
         context.run_migrations()
 
@@ -0,0 +1,80 @@
+"""Add full-text and trigram search to products
+
+Revision ID: 7c2f4e9a1b3d
+Revises: 24e026bad011
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f4e9a1b3d'
+down_revision: Union[str, None] = '24e026bad011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(sku, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # stored generated column: таблиця переписується один раз під час міграції
+    op.add_column(
+        'products',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True,
+        ),
+    )
+    # індекси будуються без блокування запису в таблицю
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            'ix_products_search_vector',
+            'products',
+            ['search_vector'],
+            postgresql_using='gin',
+        )
+        for column in ('name', 'sku'):
+            create_index_concurrently(
+                f'ix_products_{column}_trgm',
+                'products',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_products_sku_trgm',
+            table_name='products',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_products_name_trgm',
+            table_name='products',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_products_search_vector',
+            table_name='products',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,60 @@
+"""Add indexes for product filters, sorting and facets
+
+Revision ID: 9d4b2a7e5c1f
+Revises: 7c2f4e9a1b3d
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b2a7e5c1f'
+down_revision: Union[str, None] = '7c2f4e9a1b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (назва, таблиця, колонки, умова часткового індексу)
+INDEXES = [
+    ('ix_products_category_price', 'products', ['category_id', 'base_price', 'id'], None),
+    ('ix_products_category_created', 'products', ['category_id', 'created_at', 'id'], None),
+    ('ix_products_price', 'products', ['base_price', 'id'], None),
+    ('ix_products_created', 'products', ['created_at', 'id'], None),
+    (
+        'ix_products_in_stock_category_price',
+        'products',
+        ['category_id', 'base_price', 'id'],
+        'stock_quantity > 0',
+    ),
+    ('ix_product_options_name_value', 'product_options', ['name', 'value', 'product_id'], None),
+    ('ix_product_options_product_id', 'product_options', ['product_id'], None),
+    ('ix_reviews_product_rating', 'reviews', ['product_id', 'rating'], None),
+]
+
+
+def upgrade() -> None:
+    # індекси будуються без блокування запису в таблиці
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            create_index_concurrently(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
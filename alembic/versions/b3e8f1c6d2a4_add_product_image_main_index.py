@@ -0,0 +1,39 @@
+"""Add index for the main product image lookup
+
+Revision ID: b3e8f1c6d2a4
+Revises: 9d4b2a7e5c1f
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f1c6d2a4'
+down_revision: Union[str, None] = '9d4b2a7e5c1f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            'ix_product_images_product_main',
+            'product_images',
+            ['product_id', sa.text('is_main DESC'), 'id'],
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_product_images_product_main',
+            table_name='product_images',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
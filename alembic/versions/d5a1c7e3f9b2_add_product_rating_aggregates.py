@@ -0,0 +1,87 @@
+"""Add precomputed review rating aggregates to products
+
+Revision ID: d5a1c7e3f9b2
+Revises: b3e8f1c6d2a4
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1c7e3f9b2'
+down_revision: Union[str, None] = 'b3e8f1c6d2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RATING_AVG = (
+    "CASE WHEN rating_count > 0 "
+    "THEN rating_sum::double precision / rating_count ELSE 0 END"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        'products',
+        sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column(
+        'products',
+        sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    # початкове заповнення; далі агрегати підтримує застосунок
+    # (розбіжності виправляє python -m app.commands.rebuild_ratings)
+    op.execute(
+        """
+        UPDATE products p
+        SET rating_sum = s.rating_sum, rating_count = s.rating_count
+        FROM (
+            SELECT product_id, sum(rating) AS rating_sum, count(*) AS rating_count
+            FROM reviews
+            GROUP BY product_id
+        ) s
+        WHERE p.id = s.product_id
+        """
+    )
+    op.add_column(
+        'products',
+        sa.Column(
+            'rating_avg',
+            sa.Float(),
+            sa.Computed(RATING_AVG, persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            'ix_products_rating', 'products', ['rating_avg', 'id']
+        )
+        create_index_concurrently(
+            'ix_products_category_rating',
+            'products',
+            ['category_id', 'rating_avg', 'id'],
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_products_category_rating',
+            table_name='products',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_products_rating',
+            table_name='products',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('products', 'rating_avg')
+    op.drop_column('products', 'rating_count')
+    op.drop_column('products', 'rating_sum')
@@ -0,0 +1,44 @@
+"""Add pattern indexes for slug prefix lookups
+
+Revision ID: e2f6a9b4c8d1
+Revises: d5a1c7e3f9b2
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f6a9b4c8d1'
+down_revision: Union[str, None] = 'd5a1c7e3f9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# унікальний індекс slug не обслуговує LIKE 'base-%' у не-C локалі
+INDEXES = [
+    ('ix_products_slug_pattern', 'products'),
+    ('ix_categories_slug_pattern', 'categories'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            create_index_concurrently(
+                name, table, ['slug'], postgresql_ops={'slug': 'varchar_pattern_ops'}
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,68 @@
+"""Make cart items unique per cart and product
+
+Revision ID: f7c3d8e1a5b6
+Revises: e2f6a9b4c8d1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c3d8e1a5b6'
+down_revision: Union[str, None] = 'e2f6a9b4c8d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # запис у cart_items заблоковано до кінця транзакції міграції: інакше
+    # дублікат, вставлений між очищенням і побудовою індексу, зламає її
+    op.execute('LOCK TABLE cart_items IN SHARE ROW EXCLUSIVE MODE')
+    # дублікати (cart_id, product_id) зливаються в найстаршу позицію
+    op.execute(
+        """
+        UPDATE cart_items ci
+        SET quantity = d.quantity
+        FROM (
+            SELECT min(id) AS id, sum(quantity) AS quantity
+            FROM cart_items
+            GROUP BY cart_id, product_id
+            HAVING count(*) > 1
+        ) d
+        WHERE ci.id = d.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM cart_items ci
+        USING cart_items kept
+        WHERE ci.cart_id = kept.cart_id
+          AND ci.product_id = kept.product_id
+          AND ci.id > kept.id
+        """
+    )
+    # унікальний індекс — у тій самій транзакції, що й очищення
+    op.create_index(
+        'uq_cart_items_cart_product',
+        'cart_items',
+        ['cart_id', 'product_id'],
+        unique=True,
+    )
+    with op.get_context().autocommit_block():
+        create_index_concurrently('ix_carts_user_id', 'carts', ['user_id'])
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_carts_user_id',
+            table_name='carts',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_index('uq_cart_items_cart_product', table_name='cart_items')
@@ -0,0 +1,68 @@
+"""
+Перерахунок агрегатів відгуків товарів (rating_sum, rating_count).
+
+    python -m app.commands.rebuild_ratings [--product-id 1 --product-id 2]
+                                          [--batch-size 1000]
+
+Використовується для початкового заповнення і для виправлення розбіжностей
+(наприклад, після змін таблиці reviews в обхід застосунку). Товари
+обробляються партіями за id, кожна партія — окрема коротка транзакція.
+Кешовані сторінки каталогу оновляться протягом PRODUCT_CACHE_TTL.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.db.db import async_session_maker
+from app.models import Product
+from app.repositories.product import ProductRepository
+from logger import logger
+
+
+async def rebuild_ratings(
+    product_ids: list[int] | None = None, batch_size: int = 1000
+) -> int:
+    """Повертає кількість виправлених товарів."""
+    if product_ids:
+        async with async_session_maker() as session:
+            fixed = await ProductRepository(session).rebuild_ratings(product_ids)
+            await session.commit()
+        return fixed
+
+    fixed, last_id = 0, 0
+    while True:
+        async with async_session_maker() as session:
+            ids = (
+                await session.scalars(
+                    select(Product.id)
+                    .where(Product.id > last_id)
+                    .order_by(Product.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not ids:
+                return fixed
+            fixed += await ProductRepository(session).rebuild_ratings(ids)
+            await session.commit()
+        last_id = ids[-1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--product-id", type=int, action="append", dest="product_ids")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    fixed = await rebuild_ratings(args.product_ids, args.batch_size)
+    logger.info(
+        f"Product ratings rebuilt: {fixed} updated "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,3 +1,7 @@
+import os
+import tempfile
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -36,6 +40,44 @@ class AppSettings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    ESTIMATE_UNFILTERED_TOTALS: bool = False
+    COUNT_ESTIMATE_THRESHOLD: int = 100_000
+    IMPORT_CHUNK_SIZE: int = 1000
+    EXPORT_BATCH_SIZE: int = 2000
+    IMPORT_SPOOL_DIR: str = os.path.join(tempfile.gettempdir(), "product-imports")
+    IMPORT_MAX_CONCURRENT_JOBS: int = 2
+    IMPORT_JOB_TTL: int = 60 * 60 * 24
+    IMPORT_JOB_LEASE_TTL: int = 60
+    PASSWORD_HASH_WORKERS: int = 4
+    USER_CACHE_TTL: int = 300
+    USER_CACHE_LOCAL_TTL: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_ENABLED: bool = True
+    CACHE_TTL: int = 300
+    CACHE_LOCAL_TTL: int = 30
+    CACHE_LOCAL_MAX_ENTRIES: int = 10_000
+    CACHE_LOCK_TIMEOUT: float = 2.0
+    CACHE_LOCK_POLL_INTERVAL: float = 0.05
+    PRODUCT_CACHE_TTL: int = 60
+    PRODUCT_CACHE_STALE_TTL: int = 300
+    PRODUCT_CACHE_LOCAL_TTL: int = 5
+    PRODUCT_BATCH_MAX_SIZE: int = 500
+    SUGGEST_TOP_K: int = 20
+    SUGGEST_HEAVY_PREFIX: int = 512
+    SUGGEST_MAX_PENDING: int = 10_000
+    # "redis": активні кошики живуть у Redis і записуються в БД у фоні
+    CART_STORAGE: Literal["sql", "redis"] = "sql"
+    CART_REDIS_TTL: int = 60 * 60 * 24 * 7
+    CART_FLUSH_INTERVAL: float = 5.0
+    CART_FLUSH_BATCH_SIZE: int = 200
+    CART_BATCH_MAX_SIZE: int = 200
+    AUTH0_DOMAIN: str = ""
+    AUTH0_AUDIENCE: str = ""
+    AUTH0_JWKS_REFRESH_INTERVAL: int = 60 * 60
+    AUTH0_JWKS_MIN_REFRESH_INTERVAL: int = 30
+    HTTP_TIMEOUT: float = 5.0
+    HTTP_CONNECT_TIMEOUT: float = 2.0
+    HTTP_MAX_CONNECTIONS: int = 100
 
 
 class Settings(BaseSettings):
@@ -47,3 +47,8 @@ class ServerException(HTTPException):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Server error: {detail}",
         )
+
+
+class ServiceUnavailableException(HTTPException):
+    def __init__(self, detail="Service unavailable"):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
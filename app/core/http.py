@@ -0,0 +1,34 @@
+import httpx
+
+from app.core.config import settings
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Спільний HTTP-клієнт для зовнішніх сервісів (Auth0 тощо).
+
+    Один пул з'єднань на процес, тож запити не відкривають нове
+    TLS-з'єднання щоразу, а таймаути не дають повільному сервісу
+    тримати запит нескінченно.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.app.HTTP_TIMEOUT, connect=settings.app.HTTP_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.app.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.app.HTTP_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
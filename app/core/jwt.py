@@ -1,9 +1,15 @@
+import asyncio
+import contextlib
+import time
 from datetime import datetime, timedelta, UTC
 
-from fastapi import HTTPException
-import requests
+import httpx
 from app.core.config import settings
-from jose import JWTError, jwt
+from app.core.exceptions import ServiceUnavailableException, UnauthorizedException
+from app.core.http import get_http_client
+from jose import ExpiredSignatureError, JWTError, jwt
+from jose.exceptions import JWTClaimsError
+from logger import logger
 
 
 def create_access_token(data: dict):
@@ -31,42 +37,112 @@ def verify_access_token(token: str) -> dict | None:
     return payload
 
 
-def get_auth0_public_key():
-    jwks_url = f"https://{settings.app.AUTH0_DOMAIN}/.well-known/jwks.json"
-    response = requests.get(jwks_url)
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail="Failed to get JWKS")
-    return response.json()
+class JWKSCache:
+    """
+    Кеш публічних ключів Auth0 (JWKS) за `kid`.
 
+    Ключі оновлюються у фоні раз на `refresh_interval` секунд, а також
+    позапланово, коли приходить токен з невідомим `kid` (ротація ключів).
+    Позапланові оновлення обмежені `min_refresh_interval`, щоб токени з
+    вигаданим `kid` не перетворювались на запити до Auth0.
+    """
 
-def verify_auth0_token(token: str):
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = settings.app.AUTH0_JWKS_REFRESH_INTERVAL,
+        min_refresh_interval: float = settings.app.AUTH0_JWKS_MIN_REFRESH_INTERVAL,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: dict[str, dict] = {}
+        self._fetched_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def get_key(self, kid: str) -> dict | None:
+        if self._is_expired() or (kid not in self._keys and self._can_refresh()):
+            await self.refresh()
+        return self._keys.get(kid)
+
+    async def refresh(self):
+        started = time.monotonic()
+        async with self._lock:
+            # поки чекали на lock, ключі вже оновив інший запит
+            if self._fetched_at is not None and self._fetched_at >= started:
+                return
+            try:
+                response = await get_http_client().get(self.url)
+                response.raise_for_status()
+                keys = response.json()["keys"]
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                logger.error(f"Failed to get JWKS: {e}")
+                if not self._keys:
+                    raise ServiceUnavailableException("Failed to get JWKS")
+                # лишаємо попередні ключі, повторимо через min_refresh_interval
+                self._fetched_at = (
+                    time.monotonic() - self.refresh_interval + self.min_refresh_interval
+                )
+                return
+
+            self._keys = {key["kid"]: key for key in keys if "kid" in key}
+            self._fetched_at = time.monotonic()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"JWKS refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def _is_expired(self) -> bool:
+        return (
+            self._fetched_at is None
+            or time.monotonic() - self._fetched_at > self.refresh_interval
+        )
+
+    def _can_refresh(self) -> bool:
+        return time.monotonic() - self._fetched_at >= self.min_refresh_interval
+
+
+jwks_cache = JWKSCache(f"https://{settings.app.AUTH0_DOMAIN}/.well-known/jwks.json")
+
+
+async def verify_auth0_token(token: str):
     try:
-        jwks = get_auth0_public_key()
         header = jwt.get_unverified_header(token)
+        key = await jwks_cache.get_key(header.get("kid"))
 
-        rsa_key = None
-        for key in jwks["keys"]:
-            if key["kid"] == header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"],
-                }
-
-        if not rsa_key:
-            raise HTTPException(
-                status_code=401, detail="Invalid Auth0 token (no valid key)"
-            )
+        if not key:
+            raise UnauthorizedException("Invalid Auth0 token (no valid key)")
 
+        rsa_key = {
+            "kty": key["kty"],
+            "kid": key["kid"],
+            "use": key["use"],
+            "n": key["n"],
+            "e": key["e"],
+        }
         payload = jwt.decode(
             token, rsa_key, algorithms=["RS256"], audience=settings.app.AUTH0_AUDIENCE
         )
         return payload
-    except JWTError as e:
-        raise HTTPException(status_code=401, detail="Invalid Auth0 token")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Auth0 token expired")
-    except jwt.JWTClaimsError:
-        raise HTTPException(status_code=401, detail="Invalid audience in Auth0 token")
+    except ExpiredSignatureError:
+        raise UnauthorizedException("Auth0 token expired")
+    except JWTClaimsError:
+        raise UnauthorizedException("Invalid audience in Auth0 token")
+    except JWTError:
+        raise UnauthorizedException("Invalid Auth0 token")
@@ -0,0 +1,493 @@
+import asyncio
+import contextlib
+import functools
+import json
+import math
+import time
+import typing
+import weakref
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Hashable
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.db import after_commit
+from app.db.redis import RedisService
+from logger import logger
+
+
+class LocalTTLCache:
+    """
+    Обмежений LRU-кеш у пам'яті процесу з TTL на запис.
+
+    Не потокобезпечний: розрахований на використання з одного event loop.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Об'єднання одночасних обчислень одного ключа в межах процесу.
+
+    Перший виклик `do(key, func)` виконує `func`, решта чекають на його
+    результат (або виняток). Якщо перший виклик скасовано (наприклад,
+    клієнт розірвав з'єднання), наступний з тих, що чекають, обчислює
+    значення сам.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]):
+        while (future := self._calls.get(key)) is not None:
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                continue
+            self.shared += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # позначаємо виняток отриманим, навіть якщо ніхто не чекав
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+class InvalidationBus:
+    """
+    Розсилка інвалідацій локальних кешів між воркерами через Redis pub/sub.
+
+    Повідомлення має вигляд {"ns": namespace, "keys": [...]}; `keys: null`
+    очищує весь простір імен. Після (пере)підключення локальні кеші
+    очищуються повністю, бо за час розриву повідомлення могли загубитися.
+    """
+
+    channel = "cache:invalidate"
+
+    def __init__(self):
+        self.redis = RedisService()
+        self._caches: dict[str, weakref.WeakSet] = defaultdict(weakref.WeakSet)
+        self._task: asyncio.Task | None = None
+
+    def register(self, namespace: str, cache):
+        self._caches[namespace].add(cache)
+
+    async def publish(self, namespace: str, keys: list[str] | None):
+        message = json.dumps({"ns": namespace, "keys": keys})
+        try:
+            await self.redis.publish(self.channel, message)
+        except RedisError as e:
+            logger.warning(f"Cache invalidation was not broadcast: {e}")
+
+    def dispatch(self, data: str):
+        message = json.loads(data)
+        for cache in list(self._caches.get(message["ns"], ())):
+            cache.drop_local(message["keys"])
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._drop_all()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.dispatch(message["data"])
+                    except Exception as e:
+                        # пропускаємо лише зіпсоване повідомлення
+                        logger.error(f"Cache invalidation message skipped: {e}")
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {e}")
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+    def _drop_all(self):
+        for caches in self._caches.values():
+            for cache in list(caches):
+                cache.drop_local(None)
+
+
+invalidation_bus = InvalidationBus()
+
+
+class TwoTierCache:
+    """
+    Кеш Pydantic-моделей: LRU у пам'яті воркера перед спільним Redis.
+
+    Запис свіжий `ttl` секунд; якщо задано `stale_ttl`, ще стільки ж його
+    можна віддавати застарілим, поки `revalidate` оновлює його у фоні.
+    Одночасні промахи по одному ключу об'єднуються (SingleFlight), а з
+    `distributed_lock` — і між воркерами через блокування в Redis.
+    Інвалідація видаляє ключ з Redis і розсилається всім воркерам через
+    `invalidation_bus`; вона ж збільшує покоління ключа, і завантаження,
+    що почалося до неї, свій результат не кешує (лишається вікно в один
+    round trip до Redis між перевіркою покоління і записом). Моделі з
+    локального рівня спільні між запитами, тому їх не можна змінювати.
+    Недоступність Redis не ламає запити: кеш пропускається і дані
+    читаються з БД.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int = settings.app.CACHE_TTL,
+        stale_ttl: int = 0,
+        local_ttl: float = settings.app.CACHE_LOCAL_TTL,
+        max_entries: int = settings.app.CACHE_LOCAL_MAX_ENTRIES,
+        distributed_lock: bool = False,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.distributed_lock = distributed_lock
+        self.flight = SingleFlight()
+        self.lock_waits = 0
+        self.local = LocalTTLCache(max_entries, local_ttl)
+        self.redis = RedisService()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        # скидання локального рівня в цьому воркері (будь-яких ключів)
+        self._drops = 0
+        invalidation_bus.register(namespace, self)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _generation_key(self, key: str) -> str:
+        return f"{self.namespace}:gen:{key}"
+
+    async def _generation(self, key: str) -> tuple[int, str | None]:
+        """Покоління ключа: змінюється кожною інвалідацією."""
+        try:
+            generation = await self.redis.get(self._generation_key(key))
+        except RedisError as e:
+            self._error(e)
+            generation = None
+        return self._drops, generation
+
+    async def get(self, key, schema: type[BaseModel]) -> tuple[BaseModel | None, bool]:
+        """Повертає (значення, чи застаріле) або (None, False)."""
+        key = str(key)
+        entry = self.local.get(key)
+        if entry is not None and entry[0] + self.stale_ttl < time.time():
+            self.local.delete(key)
+            entry = None
+        if entry is not None:
+            self.local_hits += 1
+        else:
+            entry = await self._read_redis(key, schema)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self.redis_hits += 1
+
+        fresh_until, value = entry
+        stale = fresh_until < time.time()
+        if stale:
+            self.stale_hits += 1
+        return value, stale
+
+    async def _read_redis(self, key: str, schema: type[BaseModel]):
+        try:
+            raw = await self.redis.get(self._redis_key(key))
+        except RedisError as e:
+            self._error(e)
+            return None
+        entry = self._parse(raw, schema)
+        if entry is not None:
+            self.local.set(key, entry)
+        return entry
+
+    @staticmethod
+    def _parse(raw: str | None, schema: type[BaseModel]):
+        if raw is None:
+            return None
+        try:
+            data = json.loads(raw)
+            return data["fresh_until"], schema.model_validate(data["value"])
+        except (ValueError, KeyError, TypeError):
+            # запис у старому форматі: вважаємо промахом
+            return None
+
+    async def get_many(self, keys, schema: type[BaseModel]) -> dict[str, BaseModel]:
+        """
+        Свіжі значення кількох ключів: з локального рівня, решта одним MGET.
+        Застарілі й відсутні ключі в результат не потрапляють.
+        """
+        now = time.time()
+        found, remote = {}, []
+        for key in map(str, keys):
+            entry = self.local.get(key)
+            if entry is not None and entry[0] >= now:
+                self.local_hits += 1
+                found[key] = entry[1]
+            else:
+                remote.append(key)
+        if not remote:
+            return found
+
+        try:
+            raws = await self.redis.mget([self._redis_key(key) for key in remote])
+        except RedisError as e:
+            self._error(e)
+            raws = [None] * len(remote)
+        for key, raw in zip(remote, raws):
+            entry = self._parse(raw, schema)
+            if entry is None or entry[0] < now:
+                self.misses += 1
+                continue
+            self.redis_hits += 1
+            self.local.set(key, entry)
+            found[key] = entry[1]
+        return found
+
+    async def set(self, key, value: BaseModel):
+        key = str(key)
+        fresh_until = time.time() + self.ttl
+        self.local.set(key, (fresh_until, value))
+        entry = f'{{"fresh_until": {fresh_until}, "value": {value.model_dump_json()}}}'
+        try:
+            await self.redis.setex(
+                self._redis_key(key), self.ttl + self.stale_ttl, entry
+            )
+        except RedisError as e:
+            self._error(e)
+
+    async def get_or_load(
+        self,
+        key,
+        schema: type[BaseModel],
+        load: Callable[[], Awaitable[BaseModel | None]],
+        revalidate: Callable[[], Awaitable[BaseModel | None]] | None = None,
+    ) -> BaseModel | None:
+        """
+        `load` читає дані в поточній сесії, `revalidate` — у власній,
+        бо виконується у фоні вже після завершення запиту.
+        """
+        if key is None or not settings.app.CACHE_ENABLED:
+            return await load()
+
+        started = time.perf_counter()
+        value, stale = await self.get(key, schema)
+        if value is not None:
+            if stale and revalidate is not None:
+                self._schedule_refresh(str(key), revalidate)
+            self.hit_time += time.perf_counter() - started
+            return value
+
+        key = str(key)
+        value = await self.flight.do(key, lambda: self._load(key, schema, load))
+        self.miss_time += time.perf_counter() - started
+        return value
+
+    async def _load(self, key: str, schema: type[BaseModel], load):
+        lock_key = f"{self.namespace}:lock:{key}"
+        locked = False
+        if self.distributed_lock:
+            try:
+                locked = await self.redis.set_nx(
+                    lock_key, "1", math.ceil(settings.app.CACHE_LOCK_TIMEOUT)
+                )
+            except RedisError as e:
+                self._error(e)
+            else:
+                if not locked:
+                    # значення вже рахує інший воркер: чекаємо на нього в Redis
+                    entry = await self._wait_for(key, schema)
+                    if entry is not None:
+                        self.lock_waits += 1
+                        return entry[1]
+
+        try:
+            generation = await self._generation(key)
+            value = await load()
+            # інвалідація під час load: дані могли бути прочитані до commit
+            if value is not None and await self._generation(key) == generation:
+                await self.set(key, value)
+            return value
+        finally:
+            if locked:
+                with contextlib.suppress(RedisError):
+                    await self.redis.delete(lock_key)
+
+    async def _wait_for(self, key: str, schema: type[BaseModel]):
+        deadline = time.monotonic() + settings.app.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.app.CACHE_LOCK_POLL_INTERVAL)
+            entry = await self._read_redis(key, schema)
+            if entry is not None:
+                return entry
+        return None
+
+    async def invalidate(self, *keys):
+        keys = [str(key) for key in keys]
+        self.drop_local(keys)
+        pipe = self.redis.pipeline()
+        for key in keys:
+            pipe.incr(self._generation_key(key))
+            # покоління потрібне, лише поки може тривати завантаження
+            pipe.expire(self._generation_key(key), self.ttl + self.stale_ttl)
+        pipe.delete(*(self._redis_key(key) for key in keys))
+        try:
+            await pipe.execute()
+        except RedisError as e:
+            self._error(e)
+        await invalidation_bus.publish(self.namespace, keys)
+
+    def invalidate_after_commit(self, session: AsyncSession, *keys):
+        after_commit(session, lambda: self.invalidate(*keys))
+
+    def drop_local(self, keys: list[str] | None):
+        self._drops += 1
+        if keys is None:
+            self.local.clear()
+            return
+        for key in keys:
+            self.local.delete(key)
+
+    def stats(self) -> dict:
+        served = self.local_hits + self.redis_hits
+        lookups = served + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.flight.shared + self.lock_waits,
+            "errors": self.errors,
+            "hit_ratio": round(served / lookups, 3) if lookups else 0.0,
+            "avg_hit_ms": round(self.hit_time / served * 1000, 2) if served else 0.0,
+            "avg_miss_ms": (
+                round(self.miss_time / self.misses * 1000, 2) if self.misses else 0.0
+            ),
+        }
+
+    def _schedule_refresh(self, key: str, revalidate):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, revalidate))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: str, revalidate):
+        try:
+            # один воркер оновлює ключ, решта далі віддає застарілий запис
+            if await self.redis.set_nx(
+                f"{self.namespace}:refresh:{key}", "1", max(self.ttl, 1)
+            ):
+                generation = await self._generation(key)
+                value = await revalidate()
+                if value is not None and await self._generation(key) == generation:
+                    await self.set(key, value)
+        except Exception as e:
+            logger.error(f"Cache refresh failed for {self._redis_key(key)}: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    def _error(self, e: Exception):
+        self.errors += 1
+        logger.warning(f"Cache {self.namespace} unavailable: {e}")
+
+
+def cached(cache: TwoTierCache, key: Callable[..., Any]):
+    """
+    Кешує результат async-методу сервісу в `cache`.
+
+    Схема для десеріалізації береться з анотації повернення методу,
+    `key` отримує ті самі аргументи, що й метод.
+    """
+
+    def decorator(func):
+        @functools.cache
+        def schema():
+            return typing.get_type_hints(func)["return"]
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await cache.get_or_load(
+                key(*args, **kwargs), schema(), lambda: func(*args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict:
+    return {
+        namespace: cache.stats()
+        for namespace, caches in invalidation_bus._caches.items()
+        for cache in caches
+        if isinstance(cache, TwoTierCache)
+    }
@@ -22,14 +22,33 @@ async def get_db():
         try:
             yield session
             await session.commit()
+            await run_after_commit(session)
         except SQLAlchemyError as e:
             await session.rollback()
             logger.error(f"Database error occurred: {e}")
             raise
         finally:
+            session.info.pop("after_commit", None)
             await session.close()
 
 
+def after_commit(session: AsyncSession, callback):
+    """
+    Реєструє корутину-функцію, яку буде викликано після успішного commit.
+    Використовується для інвалідації кешів, щоб інші запити не закешували
+    дані, які ще не зафіксовані в БД.
+    """
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+async def run_after_commit(session: AsyncSession):
+    for callback in session.info.pop("after_commit", []):
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"After-commit callback failed: {e}")
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
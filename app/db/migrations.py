@@ -0,0 +1,36 @@
+from alembic import op
+
+# невдалий CREATE INDEX CONCURRENTLY лишає індекс у стані INVALID
+DROP_INVALID_INDEX = """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = '{name}'
+          AND pg_table_is_visible(c.oid)
+          AND NOT i.indisvalid
+    ) THEN
+        DROP INDEX {name};
+    END IF;
+END
+$$
+"""
+
+
+def create_index_concurrently(name: str, table: str, columns: list, **kw):
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS для виклику в autocommit_block().
+    Спершу видаляє INVALID-індекс з тим самим іменем, який лишила перервана
+    попередня спроба: IF NOT EXISTS інакше мовчки його пропустить.
+    """
+    op.execute(DROP_INVALID_INDEX.format(name=name))
+    op.create_index(
+        name,
+        table,
+        columns,
+        postgresql_concurrently=True,
+        if_not_exists=True,
+        **kw,
+    )
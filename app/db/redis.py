@@ -32,5 +32,48 @@ class RedisService:
     async def keys(self, pattern: str):
         return await self.redis_client.keys(pattern)
 
-    async def delete(self, key: str):
-        return await self.redis_client.delete(key)
+    async def delete(self, *keys: str):
+        return await self.redis_client.delete(*keys)
+
+    async def incr(self, key: str):
+        return await self.redis_client.incr(key)
+
+    async def mget(self, keys: list[str]):
+        return await self.redis_client.mget(keys)
+
+    async def publish(self, channel: str, message: str):
+        return await self.redis_client.publish(channel, message)
+
+    def pubsub(self):
+        return self.redis_client.pubsub()
+
+    async def set_nx(self, key: str, value: str, ttl: int) -> bool:
+        return bool(await self.redis_client.set(key, value, nx=True, ex=ttl))
+
+    async def expire(self, key: str, ttl: int):
+        return await self.redis_client.expire(key, ttl)
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self.redis_client.exists(key))
+
+    async def hgetall(self, key: str) -> dict:
+        return await self.redis_client.hgetall(key)
+
+    async def hset(self, key: str, mapping: dict):
+        return await self.redis_client.hset(key, mapping=mapping)
+
+    async def hexists(self, key: str, field: str) -> bool:
+        return await self.redis_client.hexists(key, field)
+
+    async def renamenx(self, src: str, dst: str) -> bool:
+        return await self.redis_client.renamenx(src, dst)
+
+    async def sadd(self, key: str, *members):
+        return await self.redis_client.sadd(key, *members)
+
+    async def spop(self, key: str, count: int) -> list:
+        return await self.redis_client.spop(key, count)
+
+    def pipeline(self):
+        """MULTI/EXEC: команди виконуються атомарно за один round trip."""
+        return self.redis_client.pipeline(transaction=True)
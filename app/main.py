@@ -1,9 +1,18 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from logger import logger
 
 from app.core.config import settings
+from app.core.http import close_http_client
+from app.core.jwt import jwks_cache
+from app.db.cache import invalidation_bus
+from app.services.cart_store import cart_store
+from app.services.category_tree import category_tree
+from app.services.import_job import ImportJobService
+from app.services.product_suggest import suggest_index
 from app.routers import healthcheck
 from app.routers import auth
 from app.routers import users
@@ -13,8 +22,34 @@ from app.routers import carts
 from app.routers import orders
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    invalidation_bus.start()
+    try:
+        await category_tree.refresh()
+    except Exception as e:
+        # дерево завантажиться під час першого запиту
+        logger.error(f"Failed to load category tree: {e}")
+    try:
+        await ImportJobService().recover_stale_jobs()
+    except Exception as e:
+        logger.error(f"Failed to recover import jobs: {e}")
+    # індекс підказок будується у фоні, до того /products/suggest шукає в БД
+    suggest_index.start_rebuild()
+    if settings.app.AUTH0_DOMAIN:
+        jwks_cache.start()
+    if settings.app.CART_STORAGE == "redis":
+        cart_store.start()
+    yield
+    # зупинка flusher'а записує в БД усі змінені кошики
+    await cart_store.stop()
+    await jwks_cache.stop()
+    await invalidation_bus.stop()
+    await close_http_client()
+
+
 # Створюємо додаток
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Налаштовуємо CORS
 app.add_middleware(
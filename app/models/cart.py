@@ -3,6 +3,7 @@ from typing import List, Optional
 from sqlalchemy import (
     Integer,
     ForeignKey,
+    Index,
     JSON,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -15,7 +16,7 @@ class Cart(BaseModel):
     __tablename__ = "carts"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
 
     items: Mapped[List["CartItem"]] = relationship(back_populates="cart")
 
@@ -29,5 +30,10 @@ class CartItem(Base):
     quantity: Mapped[int] = mapped_column(Integer, default=1)
     selected_options: Mapped[Optional[dict]] = mapped_column(JSON)
 
+    # ціль ON CONFLICT для додавання товару в кошик
+    __table_args__ = (
+        Index("uq_cart_items_cart_product", "cart_id", "product_id", unique=True),
+    )
+
     cart: Mapped["Cart"] = relationship(back_populates="items")
     product: Mapped["Product"] = relationship("Product", lazy="joined")  # type: ignore
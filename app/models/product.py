@@ -1,14 +1,20 @@
 from typing import List, Optional
 
 from sqlalchemy import (
+    DDL,
+    event,
     String,
     Integer,
     Boolean,
+    Computed,
     ForeignKey,
+    Index,
     Text,
     Float,
+    text,
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, deferred, mapped_column, relationship
 
 from app.db.db import Base
 from app.models.base_model import BaseModel
@@ -24,6 +30,15 @@ class Category(Base):
     description: Mapped[Optional[str]] = mapped_column(Text)
     parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey("categories.id"))
 
+    # пошук вільного slug: slug LIKE 'base-%' (див. find_slugs)
+    __table_args__ = (
+        Index(
+            "ix_categories_slug_pattern",
+            "slug",
+            postgresql_ops={"slug": "varchar_pattern_ops"},
+        ),
+    )
+
     parent: Mapped[Optional["Category"]] = relationship(remote_side=[id])
     products: Mapped[List["Product"]] = relationship(back_populates="category")
 
@@ -39,6 +54,68 @@ class Product(BaseModel):
     base_price: Mapped[float] = mapped_column(Float, nullable=False)
     sku: Mapped[str] = mapped_column(String, unique=True)
     stock_quantity: Mapped[int] = mapped_column(Integer, default=0)
+    # агрегати відгуків, оновлюються ReviewService разом із відгуками
+    rating_sum: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    rating_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    rating_avg: Mapped[float] = mapped_column(
+        Float,
+        Computed(
+            "CASE WHEN rating_count > 0 "
+            "THEN rating_sum::double precision / rating_count ELSE 0 END",
+            persisted=True,
+        ),
+    )
+    # підтримується самою БД, у звичайних SELECT не вантажиться
+    search_vector: Mapped[str] = deferred(
+        mapped_column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(sku, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
+
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_products_slug_pattern",
+            "slug",
+            postgresql_ops={"slug": "varchar_pattern_ops"},
+        ),
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_products_sku_trgm",
+            "sku",
+            postgresql_using="gin",
+            postgresql_ops={"sku": "gin_trgm_ops"},
+        ),
+        # фільтри й сортування каталогу; id — для keyset-пагінації
+        Index("ix_products_category_price", "category_id", "base_price", "id"),
+        Index("ix_products_category_created", "category_id", "created_at", "id"),
+        Index("ix_products_price", "base_price", "id"),
+        Index("ix_products_created", "created_at", "id"),
+        Index("ix_products_rating", "rating_avg", "id"),
+        Index("ix_products_category_rating", "category_id", "rating_avg", "id"),
+        Index(
+            "ix_products_in_stock_category_price",
+            "category_id",
+            "base_price",
+            "id",
+            postgresql_where=text("stock_quantity > 0"),
+        ),
+    )
 
     category: Mapped["Category"] = relationship(back_populates="products")
     options: Mapped[List["ProductOption"]] = relationship(back_populates="product")
@@ -48,6 +125,14 @@ class Product(BaseModel):
     wishlist: Mapped[List["Wishlist"]] = relationship(back_populates="product")  # type: ignore
 
 
+# trigram-індекси потребують розширення і при створенні схеми через create_all
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
 class ProductOption(Base):
     __tablename__ = "product_options"
 
@@ -57,6 +142,11 @@ class ProductOption(Base):
     value: Mapped[str] = mapped_column(String, nullable=False)
     additional_price: Mapped[Optional[float]] = mapped_column(Float, default=0)
 
+    __table_args__ = (
+        Index("ix_product_options_name_value", "name", "value", "product_id"),
+        Index("ix_product_options_product_id", "product_id"),
+    )
+
     product: Mapped["Product"] = relationship(back_populates="options")
 
 
@@ -69,3 +159,12 @@ class ProductImage(Base):
     is_main: Mapped[bool] = mapped_column(Boolean, default=False)
 
     product: Mapped["Product"] = relationship(back_populates="images")
+
+
+# головне зображення товару для карток — один прохід по індексу
+Index(
+    "ix_product_images_product_main",
+    ProductImage.product_id,
+    ProductImage.is_main.desc(),
+    ProductImage.id,
+)
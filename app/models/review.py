@@ -11,6 +11,7 @@ from sqlalchemy import (
     Text,
     Float,
     JSON,
+    Index,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship, declarative_base
 
@@ -27,5 +28,7 @@ class Review(BaseModel):
     comment: Mapped[Optional[str]] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_reviews_product_rating", "product_id", "rating"),)
+
     product: Mapped["Product"] = relationship(back_populates="reviews")  # type: ignore
     user: Mapped["User"] = relationship(back_populates="reviews")  # type: ignore
@@ -1,7 +1,20 @@
-from sqlalchemy import func, select
+from sqlalchemy import (
+    JSON,
+    Integer,
+    cast,
+    column,
+    delete,
+    insert,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import selectinload, joinedload
 
 from app.db.error_handler import db_error_handler
+from app.repositories.product import main_image_lateral
 from app.repositories.repository import SQLAlchemyRepository
 from app.models.product import Product
 from app.models import Cart, CartItem
@@ -22,10 +35,42 @@ class CartRepository(SQLAlchemyRepository):
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
+    @db_error_handler
+    async def find_cart_view(self, user_id: int) -> list:
+        """
+        Кошик користувача з позиціями, назвою, ціною та головним зображенням
+        товару одним запитом. Порожній кошик — один рядок з item_id = None,
+        відсутній кошик — порожній список.
+        """
+        main_image = main_image_lateral(CartItem.product_id)
+        stmt = (
+            select(
+                self.model.id.label("cart_id"),
+                self.model.user_id,
+                CartItem.id.label("item_id"),
+                CartItem.product_id,
+                CartItem.quantity,
+                CartItem.selected_options,
+                Product.name,
+                Product.base_price.label("price"),
+                main_image.c.image_url.label("image"),
+            )
+            .outerjoin(CartItem, CartItem.cart_id == self.model.id)
+            .outerjoin(Product, Product.id == CartItem.product_id)
+            .outerjoin(main_image, true())
+            .where(self.model.user_id == user_id)
+            .order_by(CartItem.id)
+        )
+        res = await self.session.execute(stmt)
+        return res.all()
+
 
 class CartItemRepository(SQLAlchemyRepository):
     model = CartItem
 
+    def _in_user_cart(self, user_id: int):
+        return self.model.cart_id.in_(select(Cart.id).where(Cart.user_id == user_id))
+
     @db_error_handler
     async def find_all_with_product(self, **filter_by):
         stmt = (
@@ -37,3 +82,153 @@ class CartItemRepository(SQLAlchemyRepository):
         )
         res = await self.session.execute(stmt)
         return res.scalars().all()
+
+    async def add_to_user_cart(
+        self,
+        user_id: int,
+        product_id: int,
+        quantity: int,
+        selected_options: dict | None = None,
+    ) -> int | None:
+        """
+        Нова позиція або збільшення кількості наявної одним запитом. Повертає
+        id позиції або None, якщо в користувача ще немає кошика.
+        """
+        ids = await self.add_many_to_user_cart(
+            user_id, [(product_id, quantity, selected_options)]
+        )
+        return ids[0] if ids else None
+
+    @db_error_handler
+    async def add_many_to_user_cart(
+        self,
+        user_id: int,
+        items: list[tuple[int, int, dict | None]],
+        replace: bool = False,
+    ) -> list[int]:
+        """
+        Позиції (product_id, quantity, selected_options) одним INSERT ... SELECT
+        FROM (VALUES ...) ON CONFLICT (cart_id, product_id) DO UPDATE: кількість
+        наявної позиції збільшується, а з `replace` — замінюється; опції наявної
+        позиції не змінюються. Повертає id позицій; порожній список — якщо в
+        користувача ще немає кошика.
+        """
+        rows = values(
+            column("product_id", Integer),
+            column("quantity", Integer),
+            column("selected_options", JSON(none_as_null=True)),
+            name="items",
+        ).data(items)
+        cart = (
+            select(Cart.id)
+            .where(Cart.user_id == user_id)
+            .order_by(Cart.id)
+            .limit(1)
+            .subquery()
+        )
+        source = select(
+            cart.c.id,
+            rows.c.product_id,
+            rows.c.quantity,
+            # колонка VALUES лише з NULL має тип text — приводимо
+            cast(rows.c.selected_options, JSON),
+        ).join_from(cart, rows, true())
+        stmt = pg_insert(self.model).from_select(
+            ["cart_id", "product_id", "quantity", "selected_options"], source
+        )
+        quantity = stmt.excluded.quantity
+        if not replace:
+            quantity = self.model.quantity + quantity
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.cart_id, self.model.product_id],
+            set_={"quantity": quantity},
+        ).returning(self.model.id)
+        res = await self.session.execute(stmt)
+        return list(res.scalars().all())
+
+    @db_error_handler
+    async def set_quantity_in_user_cart(
+        self, user_id: int, item_id: int, quantity: int
+    ) -> int | None:
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == item_id,
+                self._in_user_cart(user_id),
+            )
+            .values(quantity=quantity)
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await self.session.execute(stmt)
+        return res.scalar_one_or_none()
+
+    @db_error_handler
+    async def delete_from_user_cart(
+        self,
+        user_id: int,
+        item_id: int | None = None,
+        product_ids: list[int] | None = None,
+    ) -> int:
+        """
+        Видаляє позицію, позиції вказаних товарів або, якщо нічого не
+        вказано, всі позиції кошика.
+        """
+        stmt = delete(self.model).where(self._in_user_cart(user_id))
+        if item_id is not None:
+            stmt = stmt.where(self.model.id == item_id)
+        if product_ids is not None:
+            stmt = stmt.where(self.model.product_id.in_(product_ids))
+        res = await self.session.execute(
+            stmt.execution_options(synchronize_session=False)
+        )
+        return res.rowcount
+
+    @db_error_handler
+    async def replace_in_carts(self, items: dict[int, list[dict]]) -> int:
+        """
+        Переписує позиції кошиків {cart_id: [{product_id, quantity,
+        selected_options}]}: один DELETE і один INSERT ... SELECT на всю пачку.
+        Позиції видалених товарів чи кошиків пропускаються. Повертає
+        кількість записаних позицій.
+        """
+        if not items:
+            return 0
+        await self.session.execute(
+            delete(self.model)
+            .where(self.model.cart_id.in_(list(items)))
+            .execution_options(synchronize_session=False)
+        )
+        data = [
+            (cart_id, item["product_id"], item["quantity"], item["selected_options"])
+            for cart_id, cart_items in items.items()
+            for item in cart_items
+        ]
+        if not data:
+            return 0
+        rows = values(
+            column("cart_id", Integer),
+            column("product_id", Integer),
+            column("quantity", Integer),
+            column("selected_options", JSON(none_as_null=True)),
+            name="items",
+        ).data(data)
+        # у Redis немає зовнішніх ключів: товар міг бути видалений
+        source = (
+            select(
+                rows.c.cart_id,
+                rows.c.product_id,
+                rows.c.quantity,
+                cast(rows.c.selected_options, JSON),
+            )
+            .join_from(rows, Product, Product.id == rows.c.product_id)
+            .join(Cart, Cart.id == rows.c.cart_id)
+        )
+        res = await self.session.execute(
+            insert(self.model)
+            .from_select(
+                ["cart_id", "product_id", "quantity", "selected_options"], source
+            )
+            .returning(self.model.id)
+        )
+        return len(res.all())
@@ -1,9 +1,19 @@
 from sqlalchemy import delete, select
 from sqlalchemy.orm import selectinload, joinedload
 
+from app.db.error_handler import db_error_handler
 from app.models import Category
 from app.repositories.repository import SQLAlchemyRepository
 
 
 class CategoryRepository(SQLAlchemyRepository):
     model = Category
+
+    @db_error_handler
+    async def find_tree_rows(self) -> list[tuple[int, str, int | None]]:
+        """Мінімум даних для побудови дерева категорій: (id, slug, parent_id)."""
+        stmt = select(self.model.id, self.model.slug, self.model.parent_id).order_by(
+            self.model.id
+        )
+        res = await self.session.execute(stmt)
+        return [tuple(row) for row in res]
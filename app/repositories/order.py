@@ -3,7 +3,7 @@ from sqlalchemy.orm import selectinload, joinedload
 
 from app.db.error_handler import db_error_handler
 from app.models.product import Product
-from app.repositories.repository import SQLAlchemyRepository
+from app.repositories.repository import Page, SQLAlchemyRepository
 from app.models import Order, OrderItem, OrderStatus
 
 
@@ -39,7 +39,9 @@ class OrderRepository(SQLAlchemyRepository):
         return res.scalar_one_or_none()
 
     @db_error_handler
-    async def find_many_orders_with_user(self, skip: int, limit: int, **filter_by):
+    async def find_orders_page_with_user(
+        self, skip: int, limit: int, after: str | None = None, **filter_by
+    ) -> Page:
         stmt = (
             select(self.model)
             .options(
@@ -47,5 +49,6 @@ class OrderRepository(SQLAlchemyRepository):
             )
             .filter_by(**filter_by)
         )
-        res = await self.session.execute(stmt.offset(skip).limit(limit))
-        return res.scalars().all()
+        return await self._fetch_page(
+            stmt, skip=skip, limit=limit, after=after, estimate=not filter_by
+        )
@@ -1,16 +1,80 @@
-from sqlalchemy import delete, select
+import re
+
+from sqlalchemy import (
+    Boolean,
+    Integer,
+    String,
+    any_,
+    case,
+    cast,
+    column,
+    delete,
+    distinct,
+    exists,
+    false,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSON
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import selectinload, joinedload
 
 from app.db.error_handler import db_error_handler
-from app.repositories.repository import SQLAlchemyRepository
-from app.models import Product, ProductImage, ProductOption
+from app.repositories.repository import Page, SQLAlchemyRepository
+from app.models import (
+    Discount,
+    OrderItem,
+    Product,
+    ProductImage,
+    ProductOption,
+    Review,
+)
+
+# sort -> (колонка, за спаданням)
+PRODUCT_SORTS = {
+    "newest": ("created_at", True),
+    "price_asc": ("base_price", False),
+    "price_desc": ("base_price", True),
+    "rating": ("rating_avg", True),
+}
+
+
+def main_image_lateral(product_id):
+    """
+    LATERAL-підзапит з URL головного зображення товару (is_main, інакше
+    найстаріше) для LEFT JOIN ... ON true.
+    """
+    return (
+        select(ProductImage.image_url)
+        .where(ProductImage.product_id == product_id)
+        .order_by(ProductImage.is_main.desc(), ProductImage.id)
+        .limit(1)
+        .lateral("main_image")
+    )
 
 
-class ProductImageRepository(SQLAlchemyRepository):
+class ProductChildRepository(SQLAlchemyRepository):
+    """Опції та зображення: записи, що належать товару."""
+
+    @db_error_handler
+    async def delete_for_products(self, product_ids: list[int]) -> int:
+        stmt = delete(self.model).where(self.model.product_id.in_(product_ids))
+        res = await self.session.execute(stmt)
+        return res.rowcount
+
+
+class ProductImageRepository(ProductChildRepository):
     model = ProductImage
 
 
-class ProductOptionRepository(SQLAlchemyRepository):
+class ProductOptionRepository(ProductChildRepository):
     model = ProductOption
 
 
@@ -30,19 +94,539 @@ class ProductRepository(SQLAlchemyRepository):
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
+    def _filter_products(
+        self,
+        stmt,
+        category_ids: list[int] | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        in_stock: bool = False,
+        options: dict[str, list[str]] | None = None,
+        **filter_by,
+    ):
+        """
+        Умови фільтра каталогу. `options` — {назва: [значення]}: значення
+        однієї опції об'єднуються через АБО, різні опції — через І.
+        """
+        conditions = [
+            getattr(self.model, field) == value for field, value in filter_by.items()
+        ]
+        if category_ids is not None:
+            # один параметр-масив замість IN (...) з параметром на кожен id
+            conditions.append(
+                self.model.category_id == any_(literal(category_ids, ARRAY(Integer)))
+            )
+        if min_price is not None:
+            conditions.append(self.model.base_price >= min_price)
+        if max_price is not None:
+            conditions.append(self.model.base_price <= max_price)
+        if in_stock:
+            # константа, а не параметр: інакше планувальник не застосує
+            # частковий індекс ... WHERE stock_quantity > 0 до generic-плану
+            conditions.append(self.model.stock_quantity > literal_column("0"))
+        for name, values in (options or {}).items():
+            conditions.append(
+                exists().where(
+                    ProductOption.product_id == self.model.id,
+                    ProductOption.name == name,
+                    ProductOption.value == any_(literal(values, ARRAY(String))),
+                )
+            )
+        return stmt.where(*conditions)
+
+    @db_error_handler
+    async def find_products_page(
+        self,
+        skip: int,
+        limit: int,
+        after: str | None = None,
+        sort: str | None = None,
+        **filters,
+    ) -> Page:
+        stmt = select(self.model).options(
+            selectinload(self.model.options),
+            selectinload(self.model.images),
+        )
+        return await self._sorted_page(stmt, skip, limit, after, sort, **filters)
+
     @db_error_handler
-    async def find_many_products(self, skip: int, limit: int, **filter_by):
+    async def find_product_cards_page(
+        self,
+        skip: int,
+        limit: int,
+        after: str | None = None,
+        sort: str | None = None,
+        **filters,
+    ) -> Page:
+        """
+        Сторінка карток товарів: лише потрібні колонки і головне зображення
+        (LATERAL по ix_product_images_product_main), без ORM-об'єктів,
+        опцій і всіх зображень. Елементи сторінки — рядки Row.
+        """
+        return await self._sorted_page(
+            self._cards_select(), skip, limit, after, sort, scalars=False, **filters
+        )
+
+    @db_error_handler
+    async def find_product_cards(self, product_ids: list[int]) -> list:
+        stmt = self._cards_select().where(self.model.id.in_(product_ids))
+        res = await self.session.execute(stmt)
+        return res.all()
+
+    def _cards_select(self):
+        main_image = main_image_lateral(self.model.id)
+        return select(
+            self.model.id,
+            self.model.name,
+            self.model.slug,
+            self.model.category_id,
+            self.model.base_price,
+            self.model.stock_quantity,
+            self.model.rating_avg,
+            self.model.rating_count,
+            self.model.created_at,
+            main_image.c.image_url,
+        ).outerjoin(main_image, true())
+
+    async def _sorted_page(
+        self,
+        stmt,
+        skip: int,
+        limit: int,
+        after: str | None,
+        sort: str | None,
+        scalars: bool = True,
+        **filters,
+    ) -> Page:
+        order_by, descending = PRODUCT_SORTS.get(sort, ("id", False))
+        return await self._fetch_page(
+            self._filter_products(stmt, **filters),
+            skip=skip,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            descending=descending,
+            estimate=not filters,
+            scalars=scalars,
+        )
+
+    @db_error_handler
+    async def find_product_facets(self, **filters) -> tuple:
+        """
+        Підсумок по відфільтрованих товарах: (кількість, в наявності,
+        мін. ціна, макс. ціна) і рядки (назва, значення, кількість товарів)
+        для кожного значення опції.
+
+        Значення однієї опції у фільтрі об'єднуються через АБО, тож
+        лічильники опції рахуються без її власного фільтра (інші значення
+        показують, скільки товарів додасть їх вибір). Усі лічильники —
+        один UNION ALL.
+        """
+        summary = self._filter_products(
+            select(
+                func.count(),
+                func.count().filter(self.model.stock_quantity > 0),
+                func.min(self.model.base_price),
+                func.max(self.model.base_price),
+            ).select_from(self.model),
+            **filters,
+        )
+        selected = filters.pop("options", None) or {}
+
+        def option_counts(options: dict, name_condition):
+            product_ids = self._filter_products(
+                select(self.model.id), options=options, **filters
+            )
+            return (
+                select(
+                    ProductOption.name,
+                    ProductOption.value,
+                    func.count(distinct(ProductOption.product_id)).label("count"),
+                )
+                .where(ProductOption.product_id.in_(product_ids), name_condition)
+                .group_by(ProductOption.name, ProductOption.value)
+            )
+
+        parts = [
+            option_counts(
+                selected,
+                ProductOption.name.not_in(list(selected)) if selected else true(),
+            )
+        ]
+        for name in selected:
+            others = {n: values for n, values in selected.items() if n != name}
+            parts.append(option_counts(others, ProductOption.name == name))
+        counts = union_all(*parts).subquery()
+        options = select(counts).order_by(counts.c.name, counts.c.value)
+
+        totals = (await self.session.execute(summary)).one()
+        return totals, (await self.session.execute(options)).all()
+
+    @db_error_handler
+    async def search_products(self, query: str, skip: int, limit: int) -> Page:
+        """
+        Пошук за назвою, описом і SKU з ранжуванням.
+
+        Збіг шукається в search_vector (префіксний tsquery, GIN-індекс) або
+        за триграмами назви та SKU (pg_trgm, допускає одруківки). Порядок —
+        за сумою ts_rank_cd і схожості триграм.
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return Page(items=[], total=0)
+
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        matches = or_(
+            self.model.search_vector.op("@@")(tsquery),
+            self.model.name.op("%>")(query),
+            self.model.sku.op("%>")(query),
+        )
+        score = func.ts_rank_cd(self.model.search_vector, tsquery) + func.greatest(
+            func.word_similarity(query, self.model.name),
+            func.word_similarity(query, self.model.sku),
+        )
+        stmt = (
+            select(self.model, func.count().over().label("total"))
+            .options(
+                selectinload(self.model.options),
+                selectinload(self.model.images),
+            )
+            .where(matches)
+            .order_by(score.desc(), self.model.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        rows = (await self.session.execute(stmt)).all()
+        if rows or skip == 0:
+            total = rows[0].total if rows else 0
+            return Page(items=[row[0] for row in rows], total=total)
+
+        count = select(func.count()).select_from(self.model).where(matches)
+        return Page(items=[], total=await self.session.scalar(count))
+
+    @db_error_handler
+    async def find_products_by_ids(self, ids: list[int]) -> list:
         stmt = (
             select(self.model)
             .options(
                 selectinload(self.model.options),
                 selectinload(self.model.images),
             )
-            .filter_by(**filter_by)
+            .where(self.model.id.in_(ids))
+            .order_by(self.model.id)
+            # товари могли бути змінені в цій сесії UPDATE-ом в обхід ORM
+            .execution_options(populate_existing=True)
         )
-        res = await self.session.execute(stmt.offset(skip).limit(limit))
+        res = await self.session.execute(stmt)
         return res.scalars().all()
 
+    @db_error_handler
+    async def find_cart_prices(
+        self, lines: list[tuple[int, dict | None]], discount_code: str | None = None
+    ) -> list:
+        """
+        Ціни позицій кошика (product_id, selected_options) одним запитом:
+        base_price товару, сума additional_price вибраних опцій і знижка за
+        кодом (однакова в усіх рядках). Рядки — у порядку `lines`; для
+        відсутнього товару base_price = None.
+        """
+        rows = values(
+            column("line", Integer),
+            column("product_id", Integer),
+            column("options", JSON(none_as_null=True)),
+            name="lines",
+        ).data(
+            [
+                (line, product_id, options)
+                for line, (product_id, options) in enumerate(lines)
+            ]
+        )
+        selected = cast(rows.c.options, JSON)
+        surcharge = (
+            select(func.coalesce(func.sum(ProductOption.additional_price), 0.0))
+            .where(
+                ProductOption.product_id == rows.c.product_id,
+                selected[ProductOption.name].astext == ProductOption.value,
+            )
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                rows.c.line,
+                self.model.base_price,
+                surcharge.label("surcharge"),
+                Discount.id.label("discount_id"),
+                Discount.discount_type,
+                Discount.value.label("discount_value"),
+                Discount.is_active,
+                Discount.valid_from,
+                Discount.valid_to,
+            )
+            .select_from(rows)
+            .outerjoin(self.model, self.model.id == rows.c.product_id)
+            .outerjoin(
+                Discount,
+                false() if discount_code is None else Discount.code == discount_code,
+            )
+            .order_by(rows.c.line)
+        )
+        res = await self.session.execute(stmt)
+        return res.all()
+
+    @db_error_handler
+    async def reserve_stock(self, quantities: dict[int, int]) -> list:
+        """
+        Списує {product_id: quantity} зі stock_quantity одним UPDATE ... FROM
+        (VALUES ...) з умовою stock_quantity >= quantity. Повертає (id, slug,
+        category_id) товарів, для яких залишку вистачило.
+
+        Рядки спершу блокуються SELECT ... FOR UPDATE у порядку id: UPDATE
+        блокує їх у порядку плану, і два замовлення з тими самими товарами
+        в різному порядку могли б взаємно заблокуватися.
+        """
+        if not quantities:
+            return []
+        ids = sorted(quantities)
+        await self.session.execute(
+            select(self.model.id)
+            .where(self.model.id.in_(ids))
+            .order_by(self.model.id)
+            .with_for_update()
+        )
+        rows = values(
+            column("product_id", Integer), column("quantity", Integer), name="lines"
+        ).data([(product_id, quantities[product_id]) for product_id in ids])
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == rows.c.product_id,
+                self.model.stock_quantity >= rows.c.quantity,
+            )
+            .values(stock_quantity=self.model.stock_quantity - rows.c.quantity)
+            .returning(self.model.id, self.model.slug, self.model.category_id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await self.session.execute(stmt)
+        return res.all()
+
+    @db_error_handler
+    async def find_refs(self, ids: list[int]) -> dict:
+        """Повертає {id: (slug, category_id)} для наявних товарів."""
+        stmt = select(self.model.id, self.model.slug, self.model.category_id).where(
+            self.model.id.in_(ids)
+        )
+        res = await self.session.execute(stmt)
+        return {row.id: (row.slug, row.category_id) for row in res}
+
+    @db_error_handler
+    async def edit_many(self, items: list[dict]) -> list:
+        """
+        Оновлює багато товарів одним UPDATE ... FROM (VALUES ...).
+
+        Кожен елемент — {"id": ..., поле: значення}; набори полів можуть
+        відрізнятися. Поле, якого немає в елементі, лишається без змін
+        (прапорець `<поле>_set` у VALUES), тож можна записати й NULL.
+        """
+        if not items:
+            return []
+        fields = sorted({field for item in items for field in item} - {"id"})
+        columns = [column("id", Integer)]
+        for field in fields:
+            columns += [
+                column(field, getattr(self.model, field).type),
+                column(f"{field}_set", Boolean),
+            ]
+        rows = values(*columns, name="changes").data(
+            [
+                (
+                    item["id"],
+                    *(
+                        value
+                        for field in fields
+                        for value in (item.get(field), field in item)
+                    ),
+                )
+                for item in items
+            ]
+        )
+        stmt = (
+            update(self.model)
+            .where(self.model.id == rows.c.id)
+            .values(
+                {
+                    # колонка VALUES лише з NULL має тип text — приводимо
+                    field: case(
+                        (
+                            rows.c[f"{field}_set"],
+                            cast(rows.c[field], getattr(self.model, field).type),
+                        ),
+                        else_=getattr(self.model, field),
+                    )
+                    for field in fields
+                }
+            )
+            .returning(*self.model.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        res = await self.session.execute(stmt)
+        return [row._mapping for row in res.fetchall()]
+
+    @db_error_handler
+    async def add_rating(self, product_id: int, rating_delta: int, count_delta: int):
+        """
+        Атомарно змінює агрегати відгуків товару. Повертає (slug, category_id)
+        або None, якщо товару немає.
+        """
+        stmt = (
+            update(self.model)
+            .where(self.model.id == product_id)
+            .values(
+                rating_sum=self.model.rating_sum + rating_delta,
+                rating_count=self.model.rating_count + count_delta,
+                # відгук не є зміною самого товару
+                updated_at=self.model.updated_at,
+            )
+            .returning(self.model.slug, self.model.category_id)
+        )
+        res = await self.session.execute(stmt)
+        return res.one_or_none()
+
+    @db_error_handler
+    async def rebuild_ratings(self, product_ids: list[int] | None = None) -> int:
+        """
+        Перераховує агрегати з таблиці reviews одним UPDATE. Змінюються лише
+        рядки з розбіжністю; повертає їх кількість.
+        """
+        stats = select(
+            self.model.id.label("product_id"),
+            func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+            func.count(Review.id).label("rating_count"),
+        ).outerjoin(Review, Review.product_id == self.model.id)
+        if product_ids is not None:
+            stats = stats.where(self.model.id.in_(product_ids))
+        stats = stats.group_by(self.model.id).subquery()
+
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == stats.c.product_id,
+                or_(
+                    self.model.rating_sum != stats.c.rating_sum,
+                    self.model.rating_count != stats.c.rating_count,
+                ),
+            )
+            .values(
+                rating_sum=stats.c.rating_sum,
+                rating_count=stats.c.rating_count,
+                updated_at=self.model.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        res = await self.session.execute(stmt)
+        return res.rowcount
+
+    @db_error_handler
+    async def find_by_skus(self, skus: list[str]) -> dict:
+        """Повертає {sku: (id, slug, category_id)} для наявних товарів одним запитом."""
+        if not skus:
+            return {}
+        stmt = select(
+            self.model.sku, self.model.id, self.model.slug, self.model.category_id
+        ).where(self.model.sku.in_(skus))
+        res = await self.session.execute(stmt)
+        return {row.sku: (row.id, row.slug, row.category_id) for row in res}
+
+    @db_error_handler
+    async def find_existing_names(self, names: list[str]) -> set[str]:
+        if not names:
+            return set()
+        stmt = select(self.model.name).where(self.model.name.in_(names))
+        res = await self.session.execute(stmt)
+        return set(res.scalars().all())
+
+    @db_error_handler
+    async def upsert_by_sku(self, data_list: list[dict]) -> list:
+        """
+        Багаторядковий INSERT ... ON CONFLICT (sku) DO UPDATE.
+
+        Slug наявних товарів не змінюється. Повертає рядки (id, sku, inserted),
+        де inserted=True для щойно створених товарів.
+        """
+        if not data_list:
+            return []
+        stmt = pg_insert(self.model).values(data_list)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.sku],
+            set_={
+                "name": stmt.excluded.name,
+                "description": stmt.excluded.description,
+                "category_id": stmt.excluded.category_id,
+                "base_price": stmt.excluded.base_price,
+                "stock_quantity": stmt.excluded.stock_quantity,
+                "updated_at": func.now(),
+            },
+        ).returning(
+            self.model.id,
+            self.model.sku,
+            literal_column("xmax = 0").label("inserted"),
+        )
+        res = await self.session.execute(stmt)
+        return res.fetchall()
+
+    async def stream_export_rows(self, batch_size: int):
+        """
+        Віддає рядки для експорту партіями через серверний курсор,
+        не завантажуючи весь каталог у пам'ять.
+        """
+        first_image = (
+            select(ProductImage.image_url)
+            .where(ProductImage.product_id == self.model.id)
+            .order_by(ProductImage.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                self.model.sku,
+                self.model.name,
+                self.model.description,
+                self.model.category_id,
+                self.model.base_price,
+                self.model.stock_quantity,
+                func.coalesce(first_image, "").label("image_url"),
+            )
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    def _suggest_rows_stmt(self, ids: list[int] | None = None):
+        """id, назва, SKU і популярність (продано штук) товарів."""
+        sold = select(
+            OrderItem.product_id, func.sum(OrderItem.quantity).label("sold")
+        ).group_by(OrderItem.product_id)
+        stmt = select(self.model.id, self.model.name, self.model.sku)
+        if ids is not None:
+            sold = sold.where(OrderItem.product_id.in_(ids))
+            stmt = stmt.where(self.model.id.in_(ids))
+        sold = sold.subquery()
+        return stmt.add_columns(
+            func.coalesce(sold.c.sold, 0).label("popularity")
+        ).outerjoin(sold, sold.c.product_id == self.model.id)
+
+    async def stream_suggest_rows(self, batch_size: int):
+        stmt = self._suggest_rows_stmt().execution_options(yield_per=batch_size)
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    @db_error_handler
+    async def find_suggest_rows(self, ids: list[int]):
+        res = await self.session.execute(self._suggest_rows_stmt(ids))
+        return res.all()
+
     @db_error_handler
     async def find_all_products(self, **filter_by):
         stmt = (
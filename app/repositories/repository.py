@@ -1,8 +1,37 @@
-from sqlalchemy import insert, select, update, delete, RowMapping, func
+import re
+from typing import NamedTuple
+
+from sqlalchemy import (
+    BigInteger,
+    insert,
+    or_,
+    select,
+    update,
+    delete,
+    RowMapping,
+    func,
+    tuple_,
+    case,
+    cast,
+    false,
+    column,
+    table,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from abc import ABC, abstractmethod
 
+from app.core.config import settings
 from app.db.error_handler import db_error_handler
+from app.utils.pagination import decode_cursor, encode_cursor
+
+pg_class = table("pg_class", column("oid"), column("reltuples"))
+
+
+class Page(NamedTuple):
+    items: list
+    total: int
+    estimated: bool = False
+    next_cursor: str | None = None
 
 
 class AbstractRepository(ABC):
@@ -15,7 +44,9 @@ class AbstractRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def find_many(self, skip: int, limit: int, **filter_by):
+    async def find_many(
+        self, skip: int, limit: int, after: str | None = None, **filter_by
+    ):
         raise NotImplementedError
 
     @abstractmethod
@@ -34,6 +65,12 @@ class AbstractRepository(ABC):
     async def count_all(self, **filter_by) -> int:
         raise NotImplementedError
 
+    @abstractmethod
+    async def find_page(
+        self, skip: int, limit: int, after: str | None = None, **filter_by
+    ) -> Page:
+        raise NotImplementedError
+
 
 class SQLAlchemyRepository(AbstractRepository):
     model = None
@@ -91,11 +128,156 @@ class SQLAlchemyRepository(AbstractRepository):
         return res.scalars().all()
 
     @db_error_handler
-    async def find_many(self, skip: int, limit: int, **filter_by):
+    async def find_slugs(self, bases: list[str], slug_field: str = "slug") -> set[str]:
+        """
+        Наявні значення `slug_field`, що дорівнюють одному з `bases` або
+        мають вигляд `base-...`, — одним запитом для всіх `bases`.
+        """
+        if not bases:
+            return set()
+        column = getattr(self.model, slug_field)
+        # окремі LIKE 'base-%' (а не LIKE ANY) — кожен бере індекс
+        # з *_pattern_ops, PostgreSQL об'єднує їх через BitmapOr
+        conditions = []
+        for base in bases:
+            # base може містити символи-шаблони LIKE
+            pattern = re.sub(r"([\\%_])", r"\\\1", base) + "-%"
+            conditions += [column == base, column.like(pattern)]
+        stmt = select(column).where(or_(*conditions))
+        res = await self.session.execute(stmt)
+        return set(res.scalars().all())
+
+    @db_error_handler
+    async def find_many(
+        self, skip: int, limit: int, after: str | None = None, **filter_by
+    ):
         stmt = select(self.model).filter_by(**filter_by)
-        res = await self.session.execute(stmt.offset(skip).limit(limit))
+        res = await self.session.execute(
+            self._paginate(stmt, skip=skip, limit=limit, after=after)
+        )
         return res.scalars().all()
 
+    def _paginate(
+        self,
+        stmt,
+        skip: int = 0,
+        limit: int = 10,
+        after: str | None = None,
+        order_by: str = "id",
+        descending: bool = False,
+    ):
+        """
+        Додає до запиту сортування та пагінацію.
+
+        Без `after` — звичайний OFFSET/LIMIT. З `after` — keyset-пагінація
+        по парі (order_by, id): запит продовжує одразу після позиції курсора,
+        тому глибокі сторінки не сповільнюються.
+        """
+        id_col = self.model.id
+        sort_col = getattr(self.model, order_by)
+        columns = [id_col] if order_by == "id" else [sort_col, id_col]
+        stmt = stmt.order_by(*(c.desc() if descending else c for c in columns))
+
+        if after is None:
+            return stmt.offset(skip).limit(limit)
+
+        value, last_id = decode_cursor(after, sort_col.type.python_type)
+        if order_by == "id":
+            key, position = id_col, last_id
+        else:
+            key, position = tuple_(sort_col, id_col), tuple_(value, last_id)
+        return stmt.where(key < position if descending else key > position).limit(
+            limit
+        )
+
+    @db_error_handler
+    async def find_page(
+        self, skip: int, limit: int, after: str | None = None, **filter_by
+    ) -> Page:
+        stmt = select(self.model).filter_by(**filter_by)
+        return await self._fetch_page(
+            stmt, skip=skip, limit=limit, after=after, estimate=not filter_by
+        )
+
+    async def _fetch_page(
+        self,
+        stmt,
+        skip: int = 0,
+        limit: int = 10,
+        after: str | None = None,
+        order_by: str = "id",
+        descending: bool = False,
+        estimate: bool = False,
+        scalars: bool = True,
+    ) -> Page:
+        """
+        Повертає сторінку записів разом із загальною кількістю одним запитом.
+
+        Для OFFSET-пагінації total рахується віконною функцією count(*) OVER (),
+        для keyset — скалярним підзапитом (курсор звужує вибірку). Якщо
+        estimate=True і ввімкнено ESTIMATE_UNFILTERED_TOTALS, для великих
+        таблиць береться оцінка pg_class.reltuples замість повного підрахунку.
+        scalars=False — елементами сторінки є самі рядки (для запитів колонок).
+        """
+        estimate = estimate and settings.app.ESTIMATE_UNFILTERED_TOTALS
+        if estimate:
+            reltuples = self._estimated_count()
+            is_estimated = reltuples >= settings.app.COUNT_ESTIMATE_THRESHOLD
+            total = case((is_estimated, reltuples), else_=self._exact_count(stmt))
+        elif after is not None:
+            total, is_estimated = self._exact_count(stmt), false()
+        else:
+            total, is_estimated = func.count().over(), false()
+
+        page_stmt = self._paginate(
+            stmt.add_columns(total.label("total"), is_estimated.label("estimated")),
+            skip=skip,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            descending=descending,
+        )
+        res = await self.session.execute(page_stmt)
+        rows = res.all()
+        items = [row[0] for row in rows] if scalars else rows
+
+        if rows:
+            total, estimated = rows[0].total, bool(rows[0].estimated)
+        elif skip == 0 and after is None:
+            total, estimated = 0, False
+        else:
+            # сторінка за межами вибірки — total із рядків не отримати
+            res = await self.session.execute(select(self._exact_count(stmt)))
+            total, estimated = res.scalar(), False
+
+        return Page(
+            items=items,
+            total=total,
+            estimated=estimated,
+            next_cursor=self.next_cursor(items, limit, order_by),
+        )
+
+    def _exact_count(self, stmt):
+        return (
+            select(func.count())
+            .select_from(stmt.order_by(None).subquery())
+            .scalar_subquery()
+        )
+
+    def _estimated_count(self):
+        return (
+            select(cast(pg_class.c.reltuples, BigInteger))
+            .where(pg_class.c.oid == func.to_regclass(self.model.__tablename__))
+            .scalar_subquery()
+        )
+
+    def next_cursor(self, items, limit: int, order_by: str = "id") -> str | None:
+        """Курсор наступної сторінки або None, якщо сторінка остання."""
+        if not items or len(items) < limit:
+            return None
+        last = items[-1]
+        return encode_cursor(getattr(last, order_by), last.id)
+
     @db_error_handler
     async def delete_one(self, id: int) -> RowMapping:
         stmt = (
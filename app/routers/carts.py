@@ -1,3 +1,5 @@
+from typing import List
+
 from fastapi import APIRouter, Depends, status
 from app.schemas.user import UserRead
 from logger import logger
@@ -5,6 +7,7 @@ from logger import logger
 from app.schemas.cart import (
     CartCreate,
     CartItemCreate,
+    CartItemOperation,
     CartItemUpdate,
     CartUpdate,
     CartRead,
@@ -19,10 +22,11 @@ router = APIRouter(prefix="/carts", tags=["Carts"])
 
 @router.get("/my", response_model=CartRead)
 async def get_my_cart(
+    discount_code: str = None,
     service: CartService = Depends(get_cart_service),
     current_user: UserRead = Depends(get_current_user),
 ):
-    cart = await service.get_cart(current_user.id)
+    cart = await service.get_cart(current_user.id, discount_code)
     return cart
 
 
@@ -37,6 +41,17 @@ async def add_item_to_cart(
     return cart
 
 
+@router.put("/my/items:batch", response_model=CartRead)
+async def update_items_in_cart(
+    operations: List[CartItemOperation],
+    service: CartService = Depends(get_cart_service),
+    current_user: UserRead = Depends(get_current_user),
+):
+    cart = await service.update_items(current_user.id, operations)
+    logger.info(f"Cart items updated: {cart.id}, {len(operations)} operations")
+    return cart
+
+
 @router.patch("/my/items/{id}", response_model=CartRead)
 async def update_item_in_cart(
     id: int,
@@ -72,9 +87,12 @@ async def clear_cart(
 
 @router.get("/", response_model=CartList)
 async def get_carts(
-    skip: int = 0, limit: int = 10, service: CartService = Depends(get_cart_service)
+    skip: int = 0,
+    limit: int = 10,
+    after: str = None,
+    service: CartService = Depends(get_cart_service),
 ):
-    return await service.get_carts(skip, limit)
+    return await service.get_carts(skip, limit, after)
 
 
 @router.put("/{cart_id}", response_model=CartRead)
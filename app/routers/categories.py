@@ -36,9 +36,10 @@ async def get_all_categories(
 async def get_categories(
     skip: int = 0,
     limit: int = 10,
+    after: str = None,
     service: CategoryService = Depends(get_category_service),
 ):
-    return await service.get_categories(skip=skip, limit=limit)
+    return await service.get_categories(skip=skip, limit=limit, after=after)
 
 
 @router.get("/{category_id}", response_model=CategoryRead)
@@ -2,6 +2,8 @@ from fastapi import Depends, APIRouter, HTTPException, status
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.security import password_hasher
+from app.db.cache import cache_stats
 from app.db.db import get_db
 from app.db.redis import RedisService
 
@@ -14,6 +16,14 @@ def healthcheck():
     return {"status_code": 200, "detail": "ok", "result": "working"}
 
 
+@router.get("/metrics")
+def metrics():
+    return {
+        "password_hasher": password_hasher.stats(),
+        "caches": cache_stats(),
+    }
+
+
 @router.get("/test_postgres")
 async def check_postgres(session: AsyncSession = Depends(get_db)):
     try:
@@ -26,6 +26,7 @@ async def create_order_from_cart(
     order = await service.create_order_from_cart(
         user_id=current_user.id,
         address_id=order_data.address_id,
+        discount_code=order_data.discount_code,
     )
     return order
 
@@ -41,9 +42,12 @@ async def create_order(
 
 @router.get("/", response_model=OrderList)
 async def get_orders(
-    skip: int = 0, limit: int = 10, service: OrderService = Depends(get_order_service)
+    skip: int = 0,
+    limit: int = 10,
+    after: str = None,
+    service: OrderService = Depends(get_order_service),
 ):
-    return await service.get_orders(skip, limit)
+    return await service.get_orders(skip, limit, after)
 
 
 @router.get("/{order_id}", response_model=OrderRead)
@@ -1,23 +1,36 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, UploadFile, File
+from typing import List, Literal, Union
+from fastapi import APIRouter, Depends, Query, status, UploadFile, File
 from fastapi.responses import StreamingResponse
-from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
 from app.core.exceptions import BadRequestException
 from logger import logger
 
-from io import BytesIO
-from openpyxl import Workbook, load_workbook
-
+from app.schemas.import_job import ImportJobRead
 from app.schemas.product import (
+    ProductBatchUpdate,
     ProductCreate,
-    ProductImageCreate,
-    ProductImportRow,
     ProductUpdate,
     ProductRead,
+    ProductCardList,
+    ProductFacets,
     ProductList,
+    ProductSuggestion,
 )
+from app.services.import_job import ImportJobService
 from app.services.product import ProductService
-from app.utils.deps import get_product_service
+from app.services.product_export import EXPORT_MEDIA_TYPES, ProductExportService
+from app.services.product_import import (
+    IMPORT_FORMATS,
+    ProductImportService,
+    read_rows,
+)
+from app.utils.deps import (
+    get_import_job_service,
+    get_product_export_service,
+    get_product_import_service,
+    get_product_service,
+)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
@@ -31,118 +44,101 @@ async def create_product(
     return db_product
 
 
-@router.get("/", response_model=ProductList)
-async def get_products(
-    skip: int = 0,
-    limit: int = 10,
-    category_id: int = None,
-    category: str = None,
+@router.post(
+    "/batch", response_model=List[ProductRead], status_code=status.HTTP_201_CREATED
+)
+async def create_products(
+    products: List[ProductCreate],
+    service: ProductService = Depends(get_product_service),
+):
+    db_products = await service.create_products(products)
+    logger.info(f"Products created: {len(db_products)}")
+    return db_products
+
+
+@router.patch("/batch", response_model=List[ProductRead])
+async def update_products(
+    products: List[ProductBatchUpdate],
     service: ProductService = Depends(get_product_service),
 ):
+    db_products = await service.update_products(products)
+    logger.info(f"Products updated: {len(db_products)}")
+    return db_products
 
+
+def product_filters(
+    category_id: int = None,
+    category: str = None,
+    min_price: float = Query(None, ge=0),
+    max_price: float = Query(None, ge=0),
+    in_stock: bool = False,
+    option: List[str] = Query(None, description="name:value, напр. color:red"),
+) -> dict:
     filters = {
         k: v
         for k, v in {
             "category_id": category_id,
             "category": category,
+            "min_price": min_price,
+            "max_price": max_price,
+            "options": option,
         }.items()
         if v is not None
     }
+    if in_stock:
+        filters["in_stock"] = True
+    return filters
 
-    return await service.get_products(skip, limit, **filters)
 
-
-@router.post("/import")
-async def import_products(
-    file: UploadFile = File(...), service: ProductService = Depends(get_product_service)
+@router.get("/", response_model=Union[ProductList, ProductCardList])
+async def get_products(
+    skip: int = 0,
+    limit: int = 10,
+    after: str = None,
+    sort: Literal["newest", "price_asc", "price_desc", "rating"] = None,
+    view: Literal["full", "card"] = "full",
+    filters: dict = Depends(product_filters),
+    service: ProductService = Depends(get_product_service),
 ):
-    if not file.filename.endswith(".xlsx"):
-        raise BadRequestException("Підтримується лише формат .xlsx")
-
-    workbook = load_workbook(filename=file.file)
-    sheet = workbook.active
-
-    # Очікувані колонки (у тому ж порядку, що в Excel)
-    expected_columns = [
-        "sku",
-        "name",
-        "description",
-        "category_id",
-        "base_price",
-        "stock_quantity",
-        "image_url",
-    ]
-    header = [cell.value for cell in sheet[1]]
-
-    if header != expected_columns:
-        raise BadRequestException(
-            f"Неправильні заголовки стовпців. Очікується: {', '.join(expected_columns)}",
-        )
+    return await service.get_products(skip, limit, after, sort, view, **filters)
 
-    # Збір даних з Excel
-    rows_data: List[ProductImportRow] = []
-    errors = []
-    seen_skus = set()
 
-    for idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        try:
-            row_dict = dict(zip(expected_columns, row))
+@router.get("/facets", response_model=ProductFacets)
+async def get_product_facets(
+    filters: dict = Depends(product_filters),
+    service: ProductService = Depends(get_product_service),
+):
+    return await service.get_product_facets(**filters)
 
-            # Перевірка на дублікати SKU у файлі
-            if row_dict["sku"] in seen_skus:
-                raise ValueError(f"SKU '{row_dict['sku']}' повторюється у файлі")
-            seen_skus.add(row_dict["sku"])
 
-            validated = ProductImportRow(**row_dict)
-            rows_data.append(validated)
+@router.get("/search", response_model=ProductList)
+async def search_products(
+    q: str = Query(..., min_length=2, max_length=100),
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=100),
+    service: ProductService = Depends(get_product_service),
+):
+    return await service.search_products(q, skip, limit)
 
-        except ValidationError as e:
-            errors.append({"row": idx, "error": e.errors()})
-        except ValueError as e:
-            errors.append({"row": idx, "error": str(e)})
 
-    # Якщо є помилки — не додаємо нічого в базу
-    if errors:
-        raise BadRequestException(
-            detail={"message": "Помилка валідації даних", "errors": errors},
-        )
+@router.get("/suggest", response_model=List[ProductSuggestion])
+async def suggest_products(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=settings.app.SUGGEST_TOP_K),
+    service: ProductService = Depends(get_product_service),
+):
+    return await service.suggest_products(prefix, limit)
 
-    created_count = 0
-    updated_count = 0
-
-    for row in rows_data:
-        existing = await service.get_product_by_sku(row.sku)
-
-        if existing:
-            await service.update_product(
-                existing.id,
-                ProductUpdate(
-                    name=row.name,
-                    description=row.description,
-                    sku=row.sku,
-                    category_id=row.category_id,
-                    base_price=row.base_price,
-                    stock_quantity=row.stock_quantity,
-                ),
-            )
-            updated_count += 1
-        else:
-            await service.create_product(
-                ProductCreate(
-                    name=row.name,
-                    description=row.description,
-                    sku=row.sku,
-                    category_id=row.category_id,
-                    base_price=row.base_price,
-                    stock_quantity=row.stock_quantity,
-                    images=(
-                        [ProductImageCreate(image_url=row.image_url, is_main=True)]
-                        if row.image_url
-                        else []
-                    ),
-                )
-            )
-            created_count += 1
+
+@router.post("/import")
+async def import_products(
+    file: UploadFile = File(...),
+    service: ProductImportService = Depends(get_product_import_service),
+):
+    rows_data = await run_in_threadpool(
+        service.validate_rows, read_rows(file.file, file.filename)
+    )
+    created_count, updated_count = await service.import_rows(rows_data)
 
     return {
         "message": f"Імпортовано {created_count} продуктів, оновлено {updated_count}",
@@ -150,44 +146,41 @@ async def import_products(
     }
 
 
-@router.get("/export")
-async def export_products(service: ProductService = Depends(get_product_service)):
-    products = await service.export_products()
-
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.append(
-        [
-            "sku",
-            "name",
-            "description",
-            "category_id",
-            "base_price",
-            "stock_quantity",
-            "image_url",
-        ]
-    )
-    for p in products:
-        sheet.append(
-            (
-                p.sku,
-                p.name,
-                p.description,
-                p.category_id,
-                p.base_price,
-                p.stock_quantity,
-                p.images[0].image_url if p.images else "",
-            )
+@router.post(
+    "/import/jobs",
+    response_model=ImportJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_import_job(
+    file: UploadFile = File(...),
+    service: ImportJobService = Depends(get_import_job_service),
+):
+    if not file.filename.lower().endswith(IMPORT_FORMATS):
+        raise BadRequestException(
+            f"Непідтримуваний формат файлу. Очікується: {', '.join(IMPORT_FORMATS)}"
         )
 
-    stream = BytesIO()
-    workbook.save(stream)
-    stream.seek(0)
+    job = await service.submit(file)
+    logger.info(f"Import job queued: {job.job_id}")
+    return job
 
-    headers = {"Content-Disposition": 'attachment; filename="products.xlsx"'}
+
+@router.get("/import/{job_id}", response_model=ImportJobRead)
+async def get_import_job(
+    job_id: str, service: ImportJobService = Depends(get_import_job_service)
+):
+    return await service.get_job(job_id)
+
+
+@router.get("/export")
+async def export_products(
+    format: Literal["xlsx", "csv", "ndjson"] = "xlsx",
+    service: ProductExportService = Depends(get_product_export_service),
+):
+    headers = {"Content-Disposition": f'attachment; filename="products.{format}"'}
     return StreamingResponse(
-        stream,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        service.stream(format),
+        media_type=EXPORT_MEDIA_TYPES[format],
         headers=headers,
     )
 
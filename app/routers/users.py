@@ -23,9 +23,12 @@ async def create_user(
 
 @router.get("/", response_model=UserList)
 async def get_users(
-    skip: int = 0, limit: int = 10, service: UserService = Depends(get_user_service)
+    skip: int = 0,
+    limit: int = 10,
+    after: str = None,
+    service: UserService = Depends(get_user_service),
 ):
-    return await service.get_users(skip, limit)
+    return await service.get_users(skip, limit, after)
 
 
 @router.get("/{user_id}", response_model=UserRead)
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class CartItemBase(BaseModel):
@@ -18,6 +18,19 @@ class CartItemUpdate(BaseModel):
     quantity: int
 
 
+class CartItemOperation(BaseModel):
+    """
+    Операція пакетної зміни кошика над позицією товару: `add` додає
+    кількість, `set` задає її, `remove` видаляє позицію. Опції
+    застосовуються лише до нової позиції.
+    """
+
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    quantity: int = Field(1, ge=1)
+    selected_options: Optional[dict] = None
+
+
 class CartItemRead(CartItemBase):
     model_config = ConfigDict(from_attributes=True)
 
@@ -25,6 +38,9 @@ class CartItemRead(CartItemBase):
     name: Optional[str] = None
     price: Optional[float] = None
     image: Optional[str] = None
+    # price + надбавки вибраних опцій
+    unit_price: Optional[float] = None
+    line_total: Optional[float] = None
 
 
 class CartBase(BaseModel):
@@ -52,6 +68,10 @@ class CartRead(BaseModel):
     id: int
     user_id: int
     items: List[CartItemRead] = []
+    subtotal: float = 0.0
+    discount_code: Optional[str] = None
+    discount: float = 0.0
+    total: float = 0.0
 
 
 class CartReadMin(BaseModel):
@@ -64,5 +84,7 @@ class CartReadMin(BaseModel):
 class CartList(BaseModel):
     items: List[CartReadMin] = []
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
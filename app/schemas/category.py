@@ -31,5 +31,7 @@ class CategoryRead(CategoryBase):
 class CategoryList(BaseModel):
     items: List[CategoryRead]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
@@ -31,5 +31,6 @@ class DiscountRead(DiscountBase):
 class DiscountList(BaseModel):
     items: List[DiscountRead]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
@@ -0,0 +1,25 @@
+import enum
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ImportJobStatus(enum.Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ImportJobRead(BaseModel):
+    job_id: str
+    status: ImportJobStatus = ImportJobStatus.queued
+    filename: str
+    total_rows: int = 0
+    processed_rows: int = 0
+    created: int = 0
+    updated: int = 0
+    errors: List[dict] = Field(default_factory=list)
+    created_at: datetime
+    finished_at: Optional[datetime] = None
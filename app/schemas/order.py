@@ -36,6 +36,7 @@ class OrderCreate(OrderBase):
 
 class OrderCreateFromCart(BaseModel):
     address_id: int
+    discount_code: Optional[str] = None
 
 
 class OrderUpdate(BaseModel):
@@ -64,5 +65,7 @@ class OrderReadMin(OrderBase):
 class OrderList(BaseModel):
     items: List[OrderReadMin]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
@@ -52,18 +52,27 @@ class ProductCreate(ProductBase):
 
 
 class ProductUpdate(BaseModel):
-    name: Optional[str]
-    description: Optional[str]
-    category_id: Optional[int]
-    base_price: Optional[float]
-    sku: Optional[str]
-    stock_quantity: Optional[int]
+    name: Optional[str] = None
+    description: Optional[str] = None
+    category_id: Optional[int] = None
+    base_price: Optional[float] = None
+    sku: Optional[str] = None
+    stock_quantity: Optional[int] = None
+    # якщо передано — замінюють усі опції / зображення товару
+    options: Optional[List[ProductOptionCreate]] = None
+    images: Optional[List[ProductImageCreate]] = None
+
+
+class ProductBatchUpdate(ProductUpdate):
+    id: int
 
 
 class ProductRead(ProductBase):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
+    rating_avg: float = 0.0
+    rating_count: int = 0
     created_at: datetime
     updated_at: datetime
     options: Optional[List[ProductOptionRead]] = Field(default_factory=list)
@@ -73,8 +82,54 @@ class ProductRead(ProductBase):
 class ProductList(BaseModel):
     items: List[ProductRead]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
+
+
+class ProductCard(BaseModel):
+    """Легка картка товару для сторінок каталогу."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    slug: str
+    category_id: int
+    base_price: float
+    stock_quantity: int
+    rating_avg: float = 0.0
+    rating_count: int = 0
+    image_url: Optional[str] = None
+
+
+class ProductCardList(BaseModel):
+    items: List[ProductCard]
+    total: int
+    total_estimated: bool = False
+    page: int
+    per_page: int
+    next_cursor: Optional[str] = None
+
+
+class OptionFacet(BaseModel):
+    name: str
+    value: str
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    in_stock: int
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    options: List[OptionFacet] = Field(default_factory=list)
+
+
+class ProductSuggestion(BaseModel):
+    id: int
+    text: str
 
 
 class ProductImportRow(BaseModel):
@@ -30,5 +30,6 @@ class ReviewRead(ReviewBase):
 class ReviewList(BaseModel):
     items: List[ReviewRead]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
@@ -34,5 +34,6 @@ class ShipmentRead(ShipmentBase):
 class ShipmentList(BaseModel):
     items: List[ShipmentRead]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
@@ -49,5 +49,7 @@ class UserRead(UserBase):
 class UserList(BaseModel):
     items: List[UserRead]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
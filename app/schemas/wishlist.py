@@ -27,5 +27,6 @@ class WishlistRead(WishlistBase):
 class WishlistList(BaseModel):
     items: List[WishlistRead]
     total: int
+    total_estimated: bool = False
     page: int
     per_page: int
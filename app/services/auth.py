@@ -1,29 +1,29 @@
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
-import requests
+import httpx
 from jose import ExpiredSignatureError, JWTError, jwt
 from http import HTTPStatus
 
 from app.core.exceptions import (
     BadRequestException,
     ConflictException,
+    ServiceUnavailableException,
     UnauthorizedException,
 )
 from app.schemas.auth import Auth0Token, Token
 from app.schemas.user import SignInRequest, SignUpRequest
 from app.core.jwt import create_access_token, create_refresh_token
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.security import password_hasher
 from app.services.user import UserService
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class AuthService:
     def __init__(self, db: AsyncSession):
         self.user_service = UserService(db)
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
 
     async def register(self, user_data: SignUpRequest) -> Token:
         user = await self.user_service.get_user_by_email(user_data.email)
@@ -40,7 +40,7 @@ class AuthService:
     async def login(self, user_data: SignInRequest) -> Token:
         user = await self.user_service.get_user_by_email(user_data.email)
 
-        if not user or not self.verify_password(
+        if not user or not await self.verify_password(
             user_data.password, user.hashed_password
         ):
             raise UnauthorizedException(detail="Invalid credentials")
@@ -51,10 +51,13 @@ class AuthService:
         return Token(access_token=access_token, refresh_token=refresh_token)
 
     async def auth0_login(self, data: Auth0Token) -> Token:
-        response_AUTH0 = requests.get(
-            f"https://{settings.app.AUTH0_DOMAIN}/userinfo",
-            headers={"Authorization": f"Bearer {data.token}"},
-        )
+        try:
+            response_AUTH0 = await get_http_client().get(
+                f"https://{settings.app.AUTH0_DOMAIN}/userinfo",
+                headers={"Authorization": f"Bearer {data.token}"},
+            )
+        except httpx.HTTPError:
+            raise ServiceUnavailableException(detail="Auth0 is unavailable")
 
         if response_AUTH0.status_code != HTTPStatus.OK:
             raise BadRequestException(detail="Invalid Auth0 token")
@@ -5,25 +5,51 @@ from slugify import slugify
 
 class BaseService:
     async def _generate_unique_slug(
-        self, name: str, repo, slug_field: str = "slug", max_attempts: int = 100
+        self,
+        name: str,
+        repo,
+        slug_field: str = "slug",
     ) -> str:
         """
         Генерує унікальний slug для будь-якої моделі.
 
-        repo — репозиторій, що має метод `find_one(**kwargs)`
+        repo — репозиторій, що має метод `find_slugs(bases, slug_field)`
         slug_field — ім'я поля slug у моделі
-        max_attempts — максимальна кількість спроб для уникнення колізій
         """
-        base_slug = slugify(name.strip().lower())
-        slug = base_slug
-        counter = 1
+        slugs = await self._generate_unique_slugs([name], repo, slug_field)
+        return slugs[0]
 
-        while await repo.find_one(**{slug_field: slug}):
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-            if counter > max_attempts:
-                # Альтернатива: можна використовувати uuid замість exception
-                slug = f"{base_slug}-{uuid.uuid4().hex[:6]}"
-                break
+    async def _generate_unique_slugs(
+        self,
+        names: list[str],
+        repo,
+        slug_field: str = "slug",
+    ) -> list[str]:
+        """
+        Унікальні slug-и для пачки назв одним запитом до БД.
+
+        Для кожної назви береться `base` або `base-N` з найменшим вільним N;
+        slug-и, видані раніше в цій же пачці, теж вважаються зайнятими.
+        """
+        # назва лише з розділових знаків чи емодзі дає порожній slug
+        bases = [
+            slugify(name.strip().lower()) or uuid.uuid4().hex[:6] for name in names
+        ]
+        # усі зайняті slug-и: наявні в БД і вже видані в цій пачці;
+        # base-N однієї назви може збігтися з base іншої ("Chair" і "Chair 1")
+        used = set(await repo.find_slugs(sorted(set(bases)), slug_field))
+        # найменший можливо вільний N для base: used лише зростає
+        next_suffix: dict[str, int] = {}
 
-        return slug
+        slugs = []
+        for base in bases:
+            slug = base
+            if slug in used:
+                counter = next_suffix.get(base, 1)
+                while f"{base}-{counter}" in used:
+                    counter += 1
+                next_suffix[base] = counter + 1
+                slug = f"{base}-{counter}"
+            used.add(slug)
+            slugs.append(slug)
+        return slugs
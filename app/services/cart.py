@@ -1,125 +1,295 @@
+from typing import Literal, NamedTuple
+
+from app.core.config import settings
 from app.core.exceptions import NotFoundException, BadRequestException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.cart import CartRepository, CartItemRepository
+from app.repositories.product import ProductRepository
+from app.schemas.product import ProductCard
+from app.services.cart_store import cart_store
+from app.services.pricing import PricingService
+from app.services.product_cache import product_cache
 
 from app.schemas.cart import (
     CartList,
     CartRead,
     CartItemCreate,
+    CartItemOperation,
     CartItemRead,
     CartReadMin,
 )
 
 
+class CartChange(NamedTuple):
+    """
+    Сумарна зміна позиції товару за пакет операцій: спершу видалити наявну
+    позицію (`remove`), потім додати (`add`) або задати (`set`) кількість.
+    """
+
+    remove: bool
+    mode: Literal["add", "set"] | None
+    quantity: int = 0
+    options: dict | None = None
+
+
 class CartService:
     def __init__(self, db: AsyncSession):
         self.cart_repo = CartRepository(db)
         self.cart_item_repo = CartItemRepository(db)
+        self.pricing = PricingService(db)
 
-    async def get_cart(self, user_id: int) -> CartRead:
-        cart = await self.cart_repo.find_one_cart(user_id=user_id)
-        if not cart:
+    async def get_cart(
+        self, user_id: int, discount_code: str | None = None
+    ) -> CartRead:
+        rows = await self.cart_repo.find_cart_view(user_id)
+        if not rows:
             # якщо кошика ще нема — створюємо
             cart = await self.cart_repo.add_one({"user_id": user_id})
+            return CartRead(id=cart["id"], user_id=user_id, items=[])
+        return await self._priced(self._cart_from_rows(rows), discount_code)
+
+    async def _priced(self, cart: CartRead, discount_code: str | None = None):
+        """Додає до кошика ціни позицій з надбавками опцій і підсумки."""
+        totals = await self.pricing.price_cart(
+            [(i.product_id, i.quantity, i.selected_options) for i in cart.items],
+            discount_code,
+        )
+        for item, unit_price, line_total in zip(
+            cart.items, totals.unit_prices, totals.line_totals
+        ):
+            item.unit_price, item.line_total = unit_price, line_total
+        cart.subtotal = totals.subtotal
+        cart.discount = totals.discount
+        cart.total = totals.total
+        cart.discount_code = discount_code
+        return cart
 
-        items = await self.cart_item_repo.find_all_with_product(cart_id=cart.id)
-
-        cart_dict = CartRead.model_validate(cart).model_dump()
-        cart_dict["items"] = [
-            {
-                "id": item.id,
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "price": item.product.base_price,
-                "name": item.product.name,  # ✅ тут доступ до назви
-                "image": next(
-                    (img.image_url for img in item.product.images if img.is_main),
-                    item.product.images[0].image_url if item.product.images else None,
-                ),  # ✅ тут доступ до зображення
-            }
-            for item in items
-        ]
-
-        return CartRead(**cart_dict)
-
-    async def get_carts(self, skip: int = 0, limit: int = 10) -> CartList:
-        total = await self.cart_repo.count_all()
-        page = (skip // limit) + 1
-        orders = await self.cart_repo.find_many(skip=skip, limit=limit)
+    @staticmethod
+    def _cart_from_rows(rows) -> CartRead:
+        """Збирає CartRead з рядків CartRepository.find_cart_view."""
+        return CartRead(
+            id=rows[0].cart_id,
+            user_id=rows[0].user_id,
+            items=[
+                CartItemRead(
+                    id=row.item_id,
+                    product_id=row.product_id,
+                    quantity=row.quantity,
+                    selected_options=row.selected_options,
+                    price=row.price,
+                    name=row.name,
+                    image=row.image,
+                )
+                for row in rows
+                if row.item_id is not None
+            ],
+        )
+
+    async def get_carts(
+        self, skip: int = 0, limit: int = 10, after: str | None = None
+    ) -> CartList:
+        page = await self.cart_repo.find_page(skip=skip, limit=limit, after=after)
         return CartList(
-            items=[CartReadMin.model_validate(o) for o in orders],
-            total=total,
-            page=page,
+            items=[CartReadMin.model_validate(o) for o in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
+            next_cursor=page.next_cursor,
         )
 
     async def add_item_to_cart(
         self, user_id: int, item_data: CartItemCreate
     ) -> CartRead:
-        cart = await self.cart_repo.find_one(user_id=user_id)
-        if not cart:
-            cart = await self.cart_repo.add_one({"user_id": user_id})
-
-        # шукаємо чи вже є такий товар у кошику
-        existing_item = await self.cart_item_repo.find_one(
-            cart_id=cart.id, product_id=item_data.product_id
+        # нова позиція або +quantity до наявної — один атомарний upsert
+        item = (
+            user_id,
+            item_data.product_id,
+            item_data.quantity,
+            item_data.selected_options,
         )
-
-        if existing_item:
-            await self.cart_item_repo.edit_one(
-                existing_item.id,
-                {"quantity": existing_item.quantity + item_data.quantity},
-            )
-        else:
-            await self.cart_item_repo.add_one(
-                {
-                    "cart_id": cart.id,
-                    "product_id": item_data.product_id,
-                    "quantity": item_data.quantity,
-                }
-            )
-
-        return await self.get_cart(user_id)
+        if await self.cart_item_repo.add_to_user_cart(*item) is None:
+            # кошика ще нема — створюємо і повторюємо
+            await self.cart_repo.add_one({"user_id": user_id})
+            await self.cart_item_repo.add_to_user_cart(*item)
+        return await self._read_cart(user_id)
 
     async def update_item_in_cart(
         self, user_id: int, id: int, item_data: CartItemCreate
     ) -> CartRead:
-        cart = await self.cart_repo.find_one(user_id=user_id)
-        if not cart:
-            raise NotFoundException("Cart not found")
-
-        # шукаємо чи вже є такий товар у кошику
-        existing_item = await self.cart_item_repo.find_one(cart_id=cart.id, id=id)
-        if not existing_item:
-            raise NotFoundException("Item not found in cart")
-
         if item_data.quantity < 1:
             raise BadRequestException("Quantity should be greater than 0")
 
-        await self.cart_item_repo.edit_one(
-            existing_item.id,
-            {"quantity": item_data.quantity},
+        item_id = await self.cart_item_repo.set_quantity_in_user_cart(
+            user_id, id, item_data.quantity
         )
+        if item_id is None:
+            raise NotFoundException("Item not found in cart")
+        return await self._read_cart(user_id)
 
+    async def delete_item_from_cart(self, user_id: int, id: int) -> CartRead:
+        if not await self.cart_item_repo.delete_from_user_cart(user_id, id):
+            raise NotFoundException("Item not found in cart")
+        return await self._read_cart(user_id)
+
+    async def clear_cart(self, user_id: int) -> CartRead:
+        await self.cart_item_repo.delete_from_user_cart(user_id)
+        return await self._read_cart(user_id)
+
+    async def update_items(
+        self, user_id: int, operations: list[CartItemOperation]
+    ) -> CartRead:
+        """
+        Застосовує пакет операцій у транзакції запиту: один DELETE і до двох
+        INSERT ... ON CONFLICT на весь пакет, далі одне читання кошика.
+        """
+        changes = self._fold_operations(operations)
+        removed = [product_id for product_id, c in changes.items() if c.remove]
+        if removed:
+            await self.cart_item_repo.delete_from_user_cart(
+                user_id, product_ids=removed
+            )
+        for mode in ("add", "set"):
+            items = [
+                (product_id, c.quantity, c.options)
+                for product_id, c in changes.items()
+                if c.mode == mode
+            ]
+            if not items:
+                continue
+            replace = mode == "set"
+            if not await self.cart_item_repo.add_many_to_user_cart(
+                user_id, items, replace
+            ):
+                await self.cart_repo.add_one({"user_id": user_id})
+                await self.cart_item_repo.add_many_to_user_cart(
+                    user_id, items, replace
+                )
         return await self.get_cart(user_id)
 
-    async def delete_item_from_cart(self, user_id: int, id: int) -> CartRead:
-        cart = await self.cart_repo.find_one(user_id=user_id)
-        if not cart:
+    @staticmethod
+    def _fold_operations(
+        operations: list[CartItemOperation],
+    ) -> dict[int, CartChange]:
+        """Згортає операції в одну CartChange на товар, зберігаючи їх порядок."""
+        if len(operations) > settings.app.CART_BATCH_MAX_SIZE:
+            raise BadRequestException(
+                f"Batch is too large, max {settings.app.CART_BATCH_MAX_SIZE} items"
+            )
+        changes: dict[int, CartChange] = {}
+        for op in operations:
+            prev = changes.get(op.product_id)
+            if op.op == "remove":
+                change = CartChange(True, None)
+            elif prev is None or prev.mode is None:
+                # після видалення в пакеті позиція порожня: set — те саме, що add
+                removed = prev is not None
+                mode = "set" if op.op == "set" and not removed else "add"
+                change = CartChange(removed, mode, op.quantity, op.selected_options)
+            elif op.op == "set":
+                mode = "add" if prev.remove else "set"
+                change = prev._replace(mode=mode, quantity=op.quantity)
+            else:
+                change = prev._replace(quantity=prev.quantity + op.quantity)
+            changes[op.product_id] = change
+        return changes
+
+    async def _read_cart(self, user_id: int) -> CartRead:
+        rows = await self.cart_repo.find_cart_view(user_id)
+        if not rows:
             raise NotFoundException("Cart not found")
+        return await self._priced(self._cart_from_rows(rows))
+
+
+class RedisCartService(CartService):
+    """
+    Кошик користувача в RedisCartStore (CART_STORAGE=redis): читання і зміни
+    не звертаються до БД, назва, ціна й зображення беруться з карток товарів
+    у product_cache. id позиції в цьому режимі — product_id.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db)
+        self.product_repo = ProductRepository(db)
+        self.store = cart_store
+
+    async def get_cart(
+        self, user_id: int, discount_code: str | None = None
+    ) -> CartRead:
+        return await self._read_cart(user_id, discount_code)
+
+    async def add_item_to_cart(
+        self, user_id: int, item_data: CartItemCreate
+    ) -> CartRead:
+        # у БД позицію без товару не дав би створити foreign key
+        if not await self._get_cards([item_data.product_id]):
+            raise NotFoundException(
+                f"Product with id {item_data.product_id} not found"
+            )
+        await self.store.add(
+            user_id,
+            item_data.product_id,
+            item_data.quantity,
+            item_data.selected_options,
+        )
+        return await self._read_cart(user_id)
+
+    async def update_item_in_cart(
+        self, user_id: int, id: int, item_data: CartItemCreate
+    ) -> CartRead:
+        if item_data.quantity < 1:
+            raise BadRequestException("Quantity should be greater than 0")
 
-        item = await self.cart_item_repo.find_one(cart_id=cart.id, id=id)
-        if not item:
+        if not await self.store.set_quantity(user_id, id, item_data.quantity):
             raise NotFoundException("Item not found in cart")
+        return await self._read_cart(user_id)
 
-        await self.cart_item_repo.delete_one(item.id)
-        return await self.get_cart(user_id)
+    async def delete_item_from_cart(self, user_id: int, id: int) -> CartRead:
+        if not await self.store.remove(user_id, [id]):
+            raise NotFoundException("Item not found in cart")
+        return await self._read_cart(user_id)
 
     async def clear_cart(self, user_id: int) -> CartRead:
-        cart = await self.cart_repo.find_one(user_id=user_id)
-        if not cart:
-            raise NotFoundException("Cart not found")
+        await self.store.remove(user_id)
+        return await self._read_cart(user_id)
 
-        await self.cart_item_repo.delete_all(cart_id=cart.id)
-        return await self.get_cart(user_id)
+    async def update_items(
+        self, user_id: int, operations: list[CartItemOperation]
+    ) -> CartRead:
+        changes = self._fold_operations(operations)
+        added = [product_id for product_id, c in changes.items() if c.mode]
+        cards = await self._get_cards(added)
+        missing = [product_id for product_id in added if product_id not in cards]
+        if missing:
+            raise NotFoundException(f"Product with id {missing[0]} not found")
+        await self.store.apply(user_id, changes)
+        return await self._read_cart(user_id)
+
+    async def _read_cart(
+        self, user_id: int, discount_code: str | None = None
+    ) -> CartRead:
+        cart_id, items = await self.store.get(user_id)
+        cards = await self._get_cards(items)
+        cart = CartRead(id=cart_id, user_id=user_id, items=[])
+        for product_id, (quantity, options) in items.items():
+            card = cards.get(product_id)
+            cart.items.append(
+                CartItemRead(
+                    id=product_id,
+                    product_id=product_id,
+                    quantity=quantity,
+                    selected_options=options,
+                    price=card.base_price if card else None,
+                    name=card.name if card else None,
+                    image=card.image_url if card else None,
+                )
+            )
+        return await self._priced(cart, discount_code)
+
+    async def _get_cards(self, product_ids):
+        return await product_cache.get_cards(product_ids, self._load_cards)
+
+    async def _load_cards(self, product_ids: list[int]) -> list[ProductCard]:
+        rows = await self.product_repo.find_product_cards(product_ids)
+        return [ProductCard.model_validate(row) for row in rows]
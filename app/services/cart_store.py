@@ -0,0 +1,221 @@
+import asyncio
+import contextlib
+import json
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.db import async_session_maker
+from app.db.redis import RedisService
+from app.repositories.cart import CartItemRepository, CartRepository
+from logger import logger
+
+
+class RedisCartStore:
+    """
+    Активні кошики в Redis з відкладеним записом (write-behind) у Postgres.
+
+    Кошик — хеш `cart:{user_id}`: поле `id` з id кошика в БД і пари полів
+    `q:{product_id}` (кількість) та `o:{product_id}` (опції, JSON). Хеш
+    заповнюється з БД при першому зверненні, далі зміни йдуть лише в Redis,
+    а id користувача потрапляє в множину `cart:dirty`. Фоновий flusher
+    забирає з неї пачки кошиків і переписує їхні позиції в cart_items; при
+    оформленні замовлення кошик записується в БД у транзакції замовлення.
+
+    Незаписані зміни існують лише в Redis, тому для нього потрібні
+    persistence і `maxmemory-policy noeviction`.
+    """
+
+    namespace = "cart"
+    dirty_key = "cart:dirty"
+
+    def __init__(self, session_factory=async_session_maker):
+        self.redis = RedisService()
+        self.session_factory = session_factory
+        self.ttl = settings.app.CART_REDIS_TTL
+        self._task: asyncio.Task | None = None
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.namespace}:{user_id}"
+
+    async def get(self, user_id: int) -> tuple[int, dict[int, tuple[int, dict]]]:
+        """Кошик як (cart_id, {product_id: (quantity, selected_options)})."""
+        data = await self.redis.hgetall(self._key(user_id))
+        if not data:
+            await self._load(user_id)
+            data = await self.redis.hgetall(self._key(user_id))
+        return self._parse(data)
+
+    async def add(
+        self, user_id: int, product_id: int, quantity: int, options: dict | None
+    ):
+        await self._ensure(user_id)
+        pipe = self.redis.pipeline()
+        pipe.hincrby(self._key(user_id), f"q:{product_id}", quantity)
+        if options is not None:
+            # як і в БД: опції наявної позиції не змінюються
+            pipe.hsetnx(self._key(user_id), f"o:{product_id}", json.dumps(options))
+        await self._touch(pipe, user_id).execute()
+
+    async def set_quantity(self, user_id: int, product_id: int, quantity: int) -> bool:
+        await self._ensure(user_id)
+        if not await self.redis.hexists(self._key(user_id), f"q:{product_id}"):
+            return False
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(user_id), f"q:{product_id}", quantity)
+        await self._touch(pipe, user_id).execute()
+        return True
+
+    async def remove(self, user_id: int, product_ids: list[int] | None = None) -> int:
+        """Видаляє позиції (усі, якщо product_ids=None); повертає їх кількість."""
+        await self._ensure(user_id)
+        key = self._key(user_id)
+        if product_ids is None:
+            _, items = self._parse(await self.redis.hgetall(key))
+            product_ids = list(items)
+        if not product_ids:
+            return 0
+        pipe = self.redis.pipeline()
+        pipe.hdel(key, *(f"q:{product_id}" for product_id in product_ids))
+        pipe.hdel(key, *(f"o:{product_id}" for product_id in product_ids))
+        removed, *_ = await self._touch(pipe, user_id).execute()
+        return removed
+
+    async def apply(self, user_id: int, changes: dict):
+        """Застосовує згорнуті зміни {product_id: CartChange} одним MULTI/EXEC."""
+        await self._ensure(user_id)
+        key = self._key(user_id)
+        pipe = self.redis.pipeline()
+        for product_id, change in changes.items():
+            if change.remove:
+                pipe.hdel(key, f"q:{product_id}", f"o:{product_id}")
+            if change.mode == "add":
+                pipe.hincrby(key, f"q:{product_id}", change.quantity)
+            elif change.mode == "set":
+                pipe.hset(key, f"q:{product_id}", change.quantity)
+            if change.mode and change.options is not None:
+                pipe.hsetnx(key, f"o:{product_id}", json.dumps(change.options))
+        await self._touch(pipe, user_id).execute()
+
+    async def write(self, session: AsyncSession, user_ids) -> list[int]:
+        """
+        Переписує позиції кошиків користувачів у cart_items в межах `session`
+        (без commit). Кошики, яких немає в Redis, не змінюються; позиції
+        видалених з БД товарів не записуються, щоб один такий кошик не
+        блокував запис усієї пачки.
+        """
+        pipe = self.redis.pipeline()
+        for user_id in user_ids:
+            pipe.hgetall(self._key(user_id))
+        carts = {}
+        for data in await pipe.execute():
+            if data:
+                cart_id, items = self._parse(data)
+                carts[cart_id] = [
+                    {
+                        "product_id": product_id,
+                        "quantity": quantity,
+                        "selected_options": options,
+                    }
+                    for product_id, (quantity, options) in items.items()
+                ]
+        written = await CartItemRepository(session).replace_in_carts(carts)
+        skipped = sum(len(items) for items in carts.values()) - written
+        if skipped:
+            logger.warning(f"Skipped {skipped} cart items of deleted products")
+        return list(carts)
+
+    async def flush(self, batch_size: int = settings.app.CART_FLUSH_BATCH_SIZE) -> int:
+        """Записує в БД пачку змінених кошиків; повертає їх кількість."""
+        user_ids = await self.redis.spop(self.dirty_key, batch_size)
+        if not user_ids:
+            return 0
+        try:
+            async with self.session_factory() as session:
+                await self.write(session, user_ids)
+                await session.commit()
+        except Exception:
+            # повернемо кошики в чергу, щоб записати їх наступного разу
+            await self.redis.sadd(self.dirty_key, *user_ids)
+            raise
+        return len(user_ids)
+
+    async def flush_all(self):
+        batch_size = settings.app.CART_FLUSH_BATCH_SIZE
+        while await self.flush(batch_size) == batch_size:
+            pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            try:
+                await self.flush_all()
+            except Exception as e:
+                logger.error(f"Cart flush on shutdown failed: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.app.CART_FLUSH_INTERVAL)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                logger.error(f"Cart flush failed: {e}")
+
+    async def _ensure(self, user_id: int):
+        if not await self.redis.exists(self._key(user_id)):
+            await self._load(user_id)
+
+    async def _load(self, user_id: int):
+        """
+        Заповнює хеш кошика з БД (за потреби створюючи кошик). Хеш
+        збирається під тимчасовим ключем і з'являється одним RENAMENX, тож
+        паралельне завантаження не перезапише вже внесених змін.
+        """
+        async with self.session_factory() as session:
+            repo = CartRepository(session)
+            rows = await repo.find_cart_view(user_id)
+            if rows:
+                cart_id = rows[0].cart_id
+            else:
+                cart_id = (await repo.add_one({"user_id": user_id}))["id"]
+                await session.commit()
+
+        mapping = {"id": cart_id}
+        for row in rows:
+            if row.item_id is None:
+                continue
+            mapping[f"q:{row.product_id}"] = row.quantity
+            if row.selected_options is not None:
+                mapping[f"o:{row.product_id}"] = json.dumps(row.selected_options)
+
+        tmp_key = f"{self._key(user_id)}:load:{uuid.uuid4().hex}"
+        await self.redis.hset(tmp_key, mapping=mapping)
+        if not await self.redis.renamenx(tmp_key, self._key(user_id)):
+            await self.redis.delete(tmp_key)
+        await self.redis.expire(self._key(user_id), self.ttl)
+
+    def _touch(self, pipe, user_id: int):
+        pipe.expire(self._key(user_id), self.ttl)
+        pipe.sadd(self.dirty_key, user_id)
+        return pipe
+
+    @staticmethod
+    def _parse(data: dict) -> tuple[int, dict[int, tuple[int, dict]]]:
+        items = {}
+        for field, value in data.items():
+            if field.startswith("q:"):
+                product_id = int(field[2:])
+                options = data.get(f"o:{product_id}")
+                items[product_id] = (int(value), options and json.loads(options))
+        return int(data["id"]), dict(sorted(items.items()))
+
+
+cart_store = RedisCartStore()
@@ -9,6 +9,7 @@ from app.core.exceptions import (
 )
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.cache import TwoTierCache, cached
 from app.repositories.category import CategoryRepository
 
 from app.schemas.category import (
@@ -18,6 +19,9 @@ from app.schemas.category import (
     CategoryRead,
 )
 from app.services.base import BaseService
+from app.services.category_tree import category_tree
+
+category_cache = TwoTierCache("category", distributed_lock=True)
 
 
 class CategoryService(BaseService):
@@ -34,35 +38,43 @@ class CategoryService(BaseService):
         )
 
         new_category = await self.category_repo.add_one(category_data.model_dump())
+        category_cache.invalidate_after_commit(self.category_repo.session, "all")
+        category_tree.refresh_after_commit(self.category_repo.session)
         return CategoryRead.model_validate(new_category)
 
+    @cached(category_cache, key=lambda self: "all")
     async def get_all_categories(self) -> CategoryList:
-        total = await self.category_repo.count_all()
         categories = await self.category_repo.find_all()
         return CategoryList(
             items=[CategoryRead.model_validate(r) for r in categories],
-            total=total,
+            total=len(categories),
             page=1,
-            per_page=total,
+            per_page=len(categories),
         )
 
-    async def get_categories(self, skip: int = 0, limit: int = 10) -> CategoryList:
-        total = await self.category_repo.count_all()
-        page = (skip // limit) + 1
-        categories = await self.category_repo.find_many(skip=skip, limit=limit)
+    async def get_categories(
+        self, skip: int = 0, limit: int = 10, after: str | None = None
+    ) -> CategoryList:
+        page = await self.category_repo.find_page(
+            skip=skip, limit=limit, after=after
+        )
         return CategoryList(
-            items=[CategoryRead.model_validate(r) for r in categories],
-            total=total,
-            page=page,
+            items=[CategoryRead.model_validate(r) for r in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
+            next_cursor=page.next_cursor,
         )
 
+    @cached(category_cache, key=lambda self, category_id: f"id:{category_id}")
     async def get_category(self, category_id: int) -> CategoryRead:
         category = await self.category_repo.find_one(id=category_id)
         if not category:
             raise NotFoundException(f"Category with id {category_id} not found")
         return CategoryRead.model_validate(category)
 
+    @cached(category_cache, key=lambda self, slug: f"slug:{slug}")
     async def get_category_by_slug(self, slug: str) -> CategoryRead:
         category = await self.category_repo.find_one(slug=slug)
         if not category:
@@ -79,9 +91,20 @@ class CategoryService(BaseService):
             raise BadRequestException("No valid fields provided for update")
 
         updated_category = await self.category_repo.edit_one(category_id, update_data)
+        self._invalidate_cache(category, updated_category)
         return CategoryRead.model_validate(updated_category)
 
     async def delete_category(self, category_id: int) -> CategoryRead:
         category = await self.get_category(category_id)
         deleted_category = await self.category_repo.delete_one(category_id)
+        self._invalidate_cache(category)
         return CategoryRead.model_validate(deleted_category)
+
+    def _invalidate_cache(self, *categories):
+        category_tree.refresh_after_commit(self.category_repo.session)
+        category_cache.invalidate_after_commit(
+            self.category_repo.session,
+            "all",
+            *(f"id:{category.id}" for category in categories),
+            *(f"slug:{category.slug}" for category in categories),
+        )
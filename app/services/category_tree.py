@@ -0,0 +1,148 @@
+import asyncio
+import time
+import uuid
+from array import array
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.cache import invalidation_bus
+from app.db.db import after_commit, async_session_maker
+from app.repositories.category import CategoryRepository
+from logger import logger
+
+
+class CategoryTree:
+    """
+    Незмінний знімок дерева категорій.
+
+    Категорії лежать у масивах у порядку обходу в глибину, тож піддерево
+    будь-якої категорії — це суцільний відрізок `order[start:end]`.
+    Пошук за slug — словник, нащадки — зріз масиву без запитів до БД.
+    На 10 тис. категорій індекс займає близько 1 МБ (переважно slug-и).
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, str, int | None]]):
+        rows = list(rows)
+        self.slug_to_id = {slug: category_id for category_id, slug, _ in rows}
+        self._pos = {category_id: pos for pos, (category_id, _, _) in enumerate(rows)}
+
+        count = len(rows)
+        self._ids = array("l", (category_id for category_id, _, _ in rows))
+        self._parent = array("l", [-1]) * count
+        children: list[list[int]] = [[] for _ in range(count)]
+        for pos, (_, _, parent_id) in enumerate(rows):
+            parent = self._pos.get(parent_id, -1)
+            if parent != pos:
+                self._parent[pos] = parent
+            if parent >= 0 and parent != pos:
+                children[parent].append(pos)
+
+        self._order = array("l")
+        self._start = array("l", [0]) * count
+        self._end = array("l", [0]) * count
+        visited = bytearray(count)
+        # спершу корені, потім вузли з циклів, недосяжні від жодного кореня
+        roots = [pos for pos in range(count) if self._parent[pos] < 0]
+        for root in roots + list(range(count)):
+            if not visited[root]:
+                self._walk(root, children, visited)
+
+    def _walk(self, root: int, children: list[list[int]], visited: bytearray):
+        stack = [(root, False)]
+        while stack:
+            pos, leaving = stack.pop()
+            if leaving:
+                self._end[pos] = len(self._order)
+                continue
+            if visited[pos]:
+                continue
+            visited[pos] = 1
+            self._start[pos] = len(self._order)
+            self._order.append(self._ids[pos])
+            stack.append((pos, True))
+            stack.extend((child, False) for child in reversed(children[pos]))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, category_id: int) -> bool:
+        return category_id in self._pos
+
+    def id_by_slug(self, slug: str) -> int | None:
+        return self.slug_to_id.get(slug)
+
+    def descendants(self, category_id: int) -> list[int]:
+        """Категорія разом з усіма підкатегоріями."""
+        pos = self._pos[category_id]
+        return self._order[self._start[pos] : self._end[pos]].tolist()
+
+    def ancestors(self, category_id: int) -> list[int]:
+        """Категорія разом з усіма батьківськими, від неї до кореня."""
+        result = []
+        pos = self._pos.get(category_id, -1)
+        while pos >= 0 and len(result) <= len(self):
+            result.append(self._ids[pos])
+            pos = self._parent[pos]
+        return result
+
+
+class CategoryTreeIndex:
+    """
+    Дерево категорій у пам'яті процесу.
+
+    Завантажується під час старту, перебудовується після commit, який
+    змінив категорії, а інші воркери перебудовують своє дерево за
+    повідомленням з `invalidation_bus`.
+    """
+
+    namespace = "category_tree"
+
+    def __init__(self, session_factory=async_session_maker):
+        self.session_factory = session_factory
+        self.tree: CategoryTree | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._origin = uuid.uuid4().hex
+        self._tasks: set[asyncio.Task] = set()
+        invalidation_bus.register(self.namespace, self)
+
+    async def get(self) -> CategoryTree:
+        if self.tree is None:
+            await self.refresh()
+        return self.tree
+
+    async def refresh(self):
+        requested = time.monotonic()
+        async with self._lock:
+            # поки чекали на lock, дерево вже прочитав інший виклик
+            if self.tree is not None and self._loaded_at >= requested:
+                return
+            started = time.monotonic()
+            async with self.session_factory() as session:
+                rows = await CategoryRepository(session).find_tree_rows()
+            self.tree = CategoryTree(rows)
+            self._loaded_at = started
+
+    def refresh_after_commit(self, session: AsyncSession):
+        after_commit(session, self._changed)
+
+    async def _changed(self):
+        await self.refresh()
+        await invalidation_bus.publish(self.namespace, [self._origin])
+
+    def drop_local(self, keys: list[str] | None):
+        if keys == [self._origin]:
+            return
+        task = asyncio.create_task(self._refresh_in_background())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Category tree refresh failed: {e}")
+
+
+category_tree = CategoryTreeIndex()
@@ -6,6 +6,7 @@ from app.core.exceptions import (
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from app.db.cache import TwoTierCache, cached
 from app.repositories.discount import DiscountRepository
 from app.schemas.discount import (
     DiscountCreate,
@@ -14,6 +15,18 @@ from app.schemas.discount import (
     DiscountList,
 )
 
+discount_cache = TwoTierCache("discount")
+
+
+def is_discount_active(discount, now: datetime | None = None) -> bool:
+    """Знижка увімкнена і поточний час входить у діапазон її дат."""
+    now = now or datetime.utcnow()
+    return bool(
+        discount.is_active
+        and (not discount.valid_from or discount.valid_from <= now)
+        and (not discount.valid_to or discount.valid_to >= now)
+    )
+
 
 class DiscountService:
     def __init__(self, db: AsyncSession):
@@ -28,16 +41,16 @@ class DiscountService:
         return DiscountRead.model_validate(new_discount)
 
     async def get_discounts(self, skip: int = 0, limit: int = 10) -> DiscountList:
-        total = await self.discount_repo.count_all()
-        page = (skip // limit) + 1
-        discounts = await self.discount_repo.find_many(skip=skip, limit=limit)
+        page = await self.discount_repo.find_page(skip=skip, limit=limit)
         return DiscountList(
-            items=[DiscountRead.model_validate(d) for d in discounts],
-            total=total,
-            page=page,
+            items=[DiscountRead.model_validate(d) for d in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
         )
 
+    @cached(discount_cache, key=lambda self, discount_id: f"id:{discount_id}")
     async def get_discount(self, discount_id: int) -> DiscountRead:
         discount = await self.discount_repo.find_one(id=discount_id)
         if not discount:
@@ -45,18 +58,20 @@ class DiscountService:
         return DiscountRead.model_validate(discount)
 
     async def get_discount_by_code(self, code: str) -> DiscountRead:
-        discount = await self.discount_repo.find_one(code=code)
-        if not discount:
-            raise NotFoundException(f"Discount with code {code} not found")
+        discount = await self._find_discount_by_code(code)
 
         # Перевіряємо чи активна і чи входить в діапазон дат
-        now = datetime.utcnow()
-        if not discount.active or not (
-            (not discount.valid_from or discount.valid_from <= now)
-            and (not discount.valid_to or discount.valid_to >= now)
-        ):
+        # (поза кешем, бо залежить від поточного часу)
+        if not is_discount_active(discount):
             raise BadRequestException("Discount is not active")
 
+        return discount
+
+    @cached(discount_cache, key=lambda self, code: f"code:{code}")
+    async def _find_discount_by_code(self, code: str) -> DiscountRead:
+        discount = await self.discount_repo.find_one(code=code)
+        if not discount:
+            raise NotFoundException(f"Discount with code {code} not found")
         return DiscountRead.model_validate(discount)
 
     async def update_discount(
@@ -69,9 +84,18 @@ class DiscountService:
             raise BadRequestException("No valid fields provided for update")
 
         updated_discount = await self.discount_repo.edit_one(discount_id, update_data)
+        self._invalidate_cache(discount, updated_discount)
         return DiscountRead.model_validate(updated_discount)
 
     async def delete_discount(self, discount_id: int) -> DiscountRead:
         discount = await self.get_discount(discount_id)
         deleted_discount = await self.discount_repo.delete_one(discount_id)
+        self._invalidate_cache(discount)
         return DiscountRead.model_validate(deleted_discount)
+
+    def _invalidate_cache(self, *discounts):
+        discount_cache.invalidate_after_commit(
+            self.discount_repo.session,
+            *(f"id:{discount.id}" for discount in discounts),
+            *(f"code:{discount.code}" for discount in discounts),
+        )
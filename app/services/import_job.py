@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, UTC
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException
+from app.db.db import async_session_maker, run_after_commit
+from app.db.redis import RedisService
+from app.schemas.import_job import ImportJobRead, ImportJobStatus
+from app.services.product_import import ProductImportService, read_rows
+from logger import logger
+
+# Активні задачі тримаємо в пам'яті, щоб їх не зібрав GC до завершення
+_tasks: set[asyncio.Task] = set()
+_semaphore: asyncio.Semaphore | None = None
+
+
+def _job_slots() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.app.IMPORT_MAX_CONCURRENT_JOBS)
+    return _semaphore
+
+
+class ImportJobService:
+    """
+    Фоновий імпорт товарів.
+
+    Файл зберігається на диск (IMPORT_SPOOL_DIR), стан задачі — у Redis,
+    тож його бачать усі воркери. Обробкою займається пул задач у процесі,
+    який прийняв файл: не більше IMPORT_MAX_CONCURRENT_JOBS одночасно.
+    Файл читається і валідується чанками, кожен чанк — окрема транзакція
+    зі своєю сесією. Поки задача не завершена, процес продовжує її lease;
+    задачу без lease після перезапуску воркера позначає failed
+    recover_stale_jobs.
+    """
+
+    key_prefix = "import_job:"
+    lease_prefix = "import_job_lease:"
+
+    def __init__(self, session_factory=async_session_maker):
+        self.redis = RedisService()
+        self.session_factory = session_factory
+
+    async def submit(self, file: UploadFile) -> ImportJobRead:
+        job = ImportJobRead(
+            job_id=uuid.uuid4().hex,
+            filename=file.filename,
+            created_at=datetime.now(UTC),
+        )
+        os.makedirs(settings.app.IMPORT_SPOOL_DIR, exist_ok=True)
+        path = self._spool_path(job)
+        with open(path, "wb") as spool:
+            await run_in_threadpool(shutil.copyfileobj, file.file, spool)
+
+        await self._renew_lease(job.job_id)
+        await self._save(job)
+        task = asyncio.create_task(self._run(job, path))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+        return job
+
+    async def get_job(self, job_id: str) -> ImportJobRead:
+        data = await self.redis.get(self.key_prefix + job_id)
+        if not data:
+            raise NotFoundException(f"Import job {job_id} not found")
+        return ImportJobRead.model_validate_json(data)
+
+    async def recover_stale_jobs(self) -> int:
+        """
+        Позначає failed незавершені задачі, lease яких ніхто не продовжує
+        (воркер зупинився посеред імпорту), і видаляє їхні файли. Повертає
+        кількість таких задач.
+        """
+        keys = await self.redis.keys(self.key_prefix + "*")
+        if not keys:
+            return 0
+        leases = await self.redis.mget(
+            [self.lease_prefix + key.removeprefix(self.key_prefix) for key in keys]
+        )
+        stale = 0
+        for data, lease in zip(await self.redis.mget(keys), leases):
+            if not data or lease:
+                continue
+            job = ImportJobRead.model_validate_json(data)
+            if job.status not in (ImportJobStatus.queued, ImportJobStatus.running):
+                continue
+            job.status = ImportJobStatus.failed
+            job.errors = job.errors or [{"error": "Імпорт перервано перезапуском"}]
+            job.finished_at = datetime.now(UTC)
+            await self._save(job)
+            try:
+                os.remove(self._spool_path(job))
+            except FileNotFoundError:
+                pass
+            logger.warning(f"Import job {job.job_id} was interrupted, marked failed")
+            stale += 1
+        return stale
+
+    @staticmethod
+    def _spool_path(job: ImportJobRead) -> str:
+        return os.path.join(
+            settings.app.IMPORT_SPOOL_DIR,
+            job.job_id + os.path.splitext(job.filename)[1],
+        )
+
+    async def _save(self, job: ImportJobRead):
+        await self.redis.setex(
+            self.key_prefix + job.job_id,
+            settings.app.IMPORT_JOB_TTL,
+            job.model_dump_json(),
+        )
+
+    async def _renew_lease(self, job_id: str):
+        await self.redis.setex(
+            self.lease_prefix + job_id, settings.app.IMPORT_JOB_LEASE_TTL, "1"
+        )
+
+    async def _keep_lease(self, job_id: str):
+        while True:
+            await asyncio.sleep(settings.app.IMPORT_JOB_LEASE_TTL / 3)
+            try:
+                await self._renew_lease(job_id)
+            except Exception as e:
+                logger.error(f"Failed to renew lease of import job {job_id}: {e}")
+
+    async def _run(self, job: ImportJobRead, path: str):
+        lease = asyncio.create_task(self._keep_lease(job.job_id))
+        try:
+            async with _job_slots():
+                try:
+                    job.status = ImportJobStatus.running
+                    await self._save(job)
+                    await self._process(job, path)
+                    job.status = ImportJobStatus.completed
+                except Exception as e:
+                    logger.error(f"Import job {job.job_id} failed: {e}")
+                    job.status = ImportJobStatus.failed
+                    job.errors = job.errors or [
+                        {"error": getattr(e, "detail", str(e))}
+                    ]
+                finally:
+                    job.finished_at = datetime.now(UTC)
+                    await self._save(job)
+                    os.remove(path)
+        finally:
+            lease.cancel()
+            await self.redis.delete(self.lease_prefix + job.job_id)
+
+    async def _process(self, job: ImportJobRead, path: str):
+        with open(path, "rb") as file:
+            chunks = ProductImportService.validate_chunks(read_rows(file, path))
+            # файл читається і валідується лише на один чанк уперед
+            while chunk := await self._next_chunk(job, chunks):
+                await self._import_chunk(job, chunk)
+
+    async def _next_chunk(self, job: ImportJobRead, chunks):
+        try:
+            chunk = await run_in_threadpool(next, chunks, None)
+        except Exception as e:
+            detail = getattr(e, "detail", str(e))
+            if isinstance(detail, dict) and "errors" in detail:
+                # pydantic кладе в ctx об'єкти винятків — робимо їх JSON-сумісними
+                job.errors = json.loads(json.dumps(detail["errors"], default=str))
+            raise
+        if chunk:
+            # загальна кількість відома, лише коли файл дочитано
+            job.total_rows += len(chunk)
+        return chunk
+
+    async def _import_chunk(self, job: ImportJobRead, chunk: list):
+        start = job.processed_rows
+        try:
+            async with self.session_factory() as session:
+                created, updated = await ProductImportService(session).import_chunk(
+                    chunk
+                )
+                await session.commit()
+                await run_after_commit(session)
+        except Exception as e:
+            # попередні чанки вже збережені; рядки рахуємо як у файлі
+            job.errors = [
+                {
+                    "rows": f"{start + 2}-{start + len(chunk) + 1}",
+                    "error": getattr(e, "detail", str(e)),
+                }
+            ]
+            raise
+
+        job.created += created
+        job.updated += updated
+        job.processed_rows += len(chunk)
+        await self._save(job)
@@ -1,7 +1,17 @@
-from app.core.exceptions import NotFoundException, BadRequestException
+from app.core.config import settings
+from app.core.exceptions import (
+    ConflictException,
+    NotFoundException,
+    BadRequestException,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.db import after_commit
 from app.repositories.cart import CartItemRepository, CartRepository
 from app.repositories.order import OrderRepository, OrderItemRepository
+from app.repositories.product import ProductRepository
+from app.services.cart_store import cart_store
+from app.services.pricing import PricingService
+from app.services.product_cache import product_cache
 
 from app.schemas.order import (
     OrderCreate,
@@ -20,21 +30,38 @@ class OrderService:
         self.order_item_repo = OrderItemRepository(db)
         self.cart_repo = CartRepository(db)
         self.cart_item_repo = CartItemRepository(db)
+        self.product_repo = ProductRepository(db)
+        self.pricing = PricingService(db)
+
+    async def create_order_from_cart(
+        self, user_id: int, address_id: int, discount_code: str | None = None
+    ) -> OrderRead:
+        redis_cart = settings.app.CART_STORAGE == "redis"
+        if redis_cart:
+            # незаписані зміни кошика з Redis — у транзакцію замовлення
+            await cart_store.write(self.cart_repo.session, [user_id])
 
-    async def create_order_from_cart(self, user_id: int, address_id: int) -> OrderRead:
         # 1️⃣ Отримуємо кошик користувача
         cart = await self.cart_repo.find_one_cart(user_id=user_id)
         if not cart:
             raise NotFoundException("Cart not found")
 
-        items = await self.cart_item_repo.find_all_with_product(cart_id=cart.id)
+        items = await self.cart_item_repo.find_all(cart_id=cart.id)
         if not items:
             raise BadRequestException("Cart is empty")
 
-        # 2️⃣ Розрахунок загальної суми
-        total_price = sum(item.product.base_price * item.quantity for item in items)
+        # 2️⃣ Розрахунок суми: надбавки опцій і знижка — як у кошику
+        totals = await self.pricing.price_cart(
+            [(item.product_id, item.quantity, item.selected_options) for item in items],
+            discount_code,
+        )
+        total_price = totals.total
+
+        # 3️⃣ Резервуємо залишки; рядки товарів заблоковані до commit,
+        # тому далі — лише вставки без зайвих запитів
+        await self._reserve_stock(items)
 
-        # 3️⃣ Створюємо нове замовлення
+        # 4️⃣ Створюємо нове замовлення
         new_order = await self.order_repo.add_one(
             {
                 "user_id": user_id,
@@ -44,29 +71,60 @@ class OrderService:
             }
         )
 
-        # 4️⃣ Додаємо товари в order_items
-        order_items = []
-        for item in items:
-            order_item = await self.order_item_repo.add_one(
+        # 5️⃣ Додаємо товари в order_items одним INSERT
+        rows = await self.order_item_repo.add_many(
+            [
                 {
-                    "order_id": new_order.id,
+                    "order_id": new_order["id"],
                     "product_id": item.product_id,
                     "quantity": item.quantity,
-                    "price": item.product.base_price,
+                    "price": unit_price,
                     "selected_options": item.selected_options,
                 }
-            )
-            order_items.append(OrderItemRead.model_validate(order_item))
+                for item, unit_price in zip(items, totals.unit_prices)
+            ]
+        )
+        order_items = [OrderItemRead.model_validate(row) for row in rows]
 
-        # 5️⃣ Очищаємо кошик
+        # 6️⃣ Очищаємо кошик
         await self.cart_item_repo.delete_all(cart_id=cart.id)
+        if redis_cart:
+            ordered = [item.product_id for item in items]
+            after_commit(
+                self.cart_repo.session, lambda: cart_store.remove(user_id, ordered)
+            )
 
-        # 6️⃣ Формуємо відповідь
+        # 7️⃣ Формуємо відповідь
         order_dict = OrderRead.model_validate(new_order).model_dump()
         order_dict["items"] = order_items
 
         return OrderRead(**order_dict)
 
+    async def _reserve_stock(self, items):
+        """
+        Списує кількості позицій зі складу; якщо чогось не вистачає —
+        ConflictException, і транзакція замовлення не фіксується.
+        """
+        quantities: dict[int, int] = {}
+        for item in items:
+            quantities[item.product_id] = (
+                quantities.get(item.product_id, 0) + item.quantity
+            )
+        reserved = await self.product_repo.reserve_stock(quantities)
+        short = sorted(quantities.keys() - {row.id for row in reserved})
+        if short:
+            raise ConflictException(f"Insufficient stock for products {short}")
+
+        # залишок видно в картках і деталях товару
+        after_commit(
+            self.product_repo.session,
+            lambda: product_cache.invalidate(
+                category_ids={row.category_id for row in reserved},
+                product_ids=[row.id for row in reserved],
+                slugs=[row.slug for row in reserved],
+            ),
+        )
+
     async def create_order(self, order_data: OrderCreate) -> OrderRead:
         new_order = await self.order_repo.add_one(
             {
@@ -80,7 +138,7 @@ class OrderService:
         for item in order_data.items:
             order_item = await self.order_item_repo.add_one(
                 {
-                    "order_id": new_order.id,
+                    "order_id": new_order["id"],
                     "product_id": item.product_id,
                     "quantity": item.quantity,
                     "price": item.price,
@@ -92,16 +150,16 @@ class OrderService:
         order_dict["items"] = items
         return OrderRead(**order_dict)
 
-    async def get_orders(self, skip: int = 0, limit: int = 10) -> OrderList:
-        total = await self.order_repo.count_all()
-        page = (skip // limit) + 1
-        orders = await self.order_repo.find_many_orders_with_user(
-            skip=skip, limit=limit
+    async def get_orders(
+        self, skip: int = 0, limit: int = 10, after: str | None = None
+    ) -> OrderList:
+        page = await self.order_repo.find_orders_page_with_user(
+            skip=skip, limit=limit, after=after
         )
 
         # 🧩 додаємо user_name у кожен елемент
         items = []
-        for o in orders:
+        for o in page.items:
             order_data = OrderReadMin.model_validate(o).model_dump()
             order_data["user_name"] = (
                 f"{o.user.first_name} {o.user.last_name}" if o.user else None
@@ -110,9 +168,11 @@ class OrderService:
 
         return OrderList(
             items=items,
-            total=total,
-            page=page,
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
+            next_cursor=page.next_cursor,
         )
 
     async def get_order(self, order_id: int) -> OrderRead:
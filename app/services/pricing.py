@@ -0,0 +1,86 @@
+import math
+from typing import NamedTuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.repositories.product import ProductRepository
+from app.services.discount import is_discount_active
+
+
+class CartTotals(NamedTuple):
+    """Ціни позицій (None — товару немає) і підсумки кошика."""
+
+    unit_prices: list[float | None]
+    line_totals: list[float | None]
+    subtotal: float
+    discount: float
+    total: float
+
+
+def compute_totals(
+    quantities: list[int],
+    base_prices: list[float | None],
+    surcharges: list[float],
+    discount_type: str | None = None,
+    discount_value: float = 0.0,
+) -> CartTotals:
+    """
+    Ціни й підсумки кошика за один прохід по паралельних списках:
+    ціна одиниці — base_price + надбавки опцій, знижка (`percent` або
+    `fixed`, не більша за суму) застосовується до суми всіх позицій.
+    """
+    unit_prices = [
+        None if base is None else round(base + surcharge, 2)
+        for base, surcharge in zip(base_prices, surcharges)
+    ]
+    line_totals = [
+        None if unit is None else round(unit * quantity, 2)
+        for unit, quantity in zip(unit_prices, quantities)
+    ]
+    subtotal = round(math.fsum(t for t in line_totals if t is not None), 2)
+    if discount_type == "percent":
+        discount = round(subtotal * min(discount_value, 100) / 100, 2)
+    elif discount_type == "fixed":
+        discount = min(round(discount_value, 2), subtotal)
+    else:
+        discount = 0.0
+    return CartTotals(
+        unit_prices, line_totals, subtotal, discount, round(subtotal - discount, 2)
+    )
+
+
+class PricingService:
+    """Ціни кошика для його читання і для оформлення замовлення."""
+
+    def __init__(self, db: AsyncSession):
+        self.product_repo = ProductRepository(db)
+
+    async def price_cart(
+        self,
+        lines: list[tuple[int, int, dict | None]],
+        discount_code: str | None = None,
+    ) -> CartTotals:
+        """
+        Позиції (product_id, quantity, selected_options): base_price, надбавки
+        опцій і знижка за кодом читаються одним запитом.
+        """
+        if not lines:
+            return compute_totals([], [], [])
+        rows = await self.product_repo.find_cart_prices(
+            [(product_id, options) for product_id, _, options in lines],
+            discount_code,
+        )
+        discount = rows[0]
+        if discount_code is not None:
+            if discount.discount_id is None:
+                raise NotFoundException(f"Discount with code {discount_code} not found")
+            if not is_discount_active(discount):
+                raise BadRequestException("Discount is not active")
+        return compute_totals(
+            [quantity for _, quantity, _ in lines],
+            [row.base_price for row in rows],
+            [row.surcharge for row in rows],
+            discount.discount_type,
+            discount.discount_value or 0.0,
+        )
@@ -6,14 +6,31 @@ from app.core.exceptions import (
 )
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.db import after_commit, async_session_maker
 from app.repositories.category import CategoryRepository
 from app.repositories.product import (
     ProductImageRepository,
     ProductOptionRepository,
     ProductRepository,
 )
-from app.schemas.product import ProductCreate, ProductUpdate, ProductRead, ProductList
+from app.schemas.product import (
+    ProductCreate,
+    ProductBatchUpdate,
+    ProductUpdate,
+    ProductRead,
+    OptionFacet,
+    ProductCard,
+    ProductCardList,
+    ProductFacets,
+    ProductList,
+    ProductSuggestion,
+)
 from app.services.base import BaseService
+from app.services.category_tree import category_tree
+from app.services.product_cache import product_cache
+from app.services.product_suggest import suggest_index
+from logger import logger
 
 
 class ProductService(BaseService):
@@ -24,64 +41,267 @@ class ProductService(BaseService):
         self.image_repo = ProductImageRepository(db)
 
     async def create_product(self, product_data: ProductCreate) -> ProductRead:
-        # можна перевірити унікальність імені товару
-        product = await self.product_repo.find_one(name=product_data.name)
-        if product:
+        products = await self.create_products([product_data])
+        return products[0]
+
+    async def create_products(
+        self, products_data: List[ProductCreate]
+    ) -> List[ProductRead]:
+        """
+        Створює товари разом з опціями та зображеннями. Кількість запитів
+        не залежить від розміру пачки: перевірка назв, пошук slug-ів і по
+        одному багаторядковому INSERT для товарів, опцій і зображень.
+        """
+        self._check_batch_size(products_data)
+        # назва товару має бути унікальною
+        names = [product.name for product in products_data]
+        if len(set(names)) != len(names) or (
+            await self.product_repo.find_existing_names(names)
+        ):
             raise ConflictException("Product with this name already exists")
 
-        product_data.slug = await self._generate_unique_slug(
-            name=product_data.name, repo=self.product_repo, slug_field="slug"
-        )
+        slugs = await self._generate_unique_slugs(names, self.product_repo)
+        for product, slug in zip(products_data, slugs):
+            product.slug = slug
 
-        new_product = await self.product_repo.add_one(
-            product_data.model_dump(exclude={"options", "images"})
+        rows = await self.product_repo.add_many(
+            [
+                product.model_dump(exclude={"options", "images"})
+                for product in products_data
+            ]
         )
+        ids = {row["slug"]: row["id"] for row in rows}
+        product_ids = [ids[product.slug] for product in products_data]
+        children = await self._add_children(zip(product_ids, products_data))
 
-        # додаємо options
-        for option in product_data.options:
-            await self.option_repo.add_one(
-                {**option.model_dump(), "product_id": new_product.id}
-            )
+        self._invalidate_cache(category_ids={row["category_id"] for row in rows})
+        suggest_index.refresh_after_commit(self.product_repo.session, product_ids)
+        by_id = {row["id"]: row for row in rows}
+        return [
+            ProductRead.model_validate({**by_id[product_id], **children[product_id]})
+            for product_id in product_ids
+        ]
 
-        # додаємо images
-        for image in product_data.images:
-            await self.image_repo.add_one(
-                {**image.model_dump(), "product_id": new_product.id}
+    async def _add_children(self, items) -> dict[int, dict]:
+        """
+        Додає опції та зображення для пар (product_id, дані з options/images)
+        двома INSERT. Пропущені (None) списки не чіпає. Повертає
+        {product_id: {"options": [...], "images": [...]}}.
+        """
+        options, images, children = [], [], {}
+        for product_id, data in items:
+            children[product_id] = {"options": [], "images": []}
+            options += [
+                {**option.model_dump(), "product_id": product_id}
+                for option in data.options or []
+            ]
+            images += [
+                {**image.model_dump(), "product_id": product_id}
+                for image in data.images or []
+            ]
+        for field, rows in (
+            ("options", await self.option_repo.add_many(options)),
+            ("images", await self.image_repo.add_many(images)),
+        ):
+            for row in rows:
+                children[row["product_id"]][field].append(row)
+        return children
+
+    @staticmethod
+    def _check_batch_size(items: list):
+        if not items:
+            raise BadRequestException("Batch is empty")
+        if len(items) > settings.app.PRODUCT_BATCH_MAX_SIZE:
+            raise BadRequestException(
+                f"Batch is too large, max {settings.app.PRODUCT_BATCH_MAX_SIZE} items"
             )
-        return ProductRead.model_validate(new_product)
 
     async def get_products(
-        self, skip: int = 0, limit: int = 10, **filter_by
-    ) -> ProductList:
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        after: str | None = None,
+        sort: str | None = None,
+        view: str = "full",
+        **filter_by,
+    ) -> ProductList | ProductCardList:
+        scope = await self._prepare_filters(filter_by)
+        key = await product_cache.list_key(
+            scope,
+            skip=skip,
+            limit=limit,
+            after=after,
+            sort=sort,
+            view=view,
+            **filter_by,
+        )
+        if view == "card":
+            return await self._cached(
+                key,
+                ProductCardList,
+                lambda service: service._load_product_cards(
+                    skip, limit, after, sort, **filter_by
+                ),
+            )
+        return await self._cached(
+            key,
+            ProductList,
+            lambda service: service._load_products(
+                skip, limit, after, sort, **filter_by
+            ),
+        )
+
+    async def get_product_facets(self, **filter_by) -> ProductFacets:
+        scope = await self._prepare_filters(filter_by)
+        key = await product_cache.list_key(scope, facets=True, **filter_by)
+        return await self._cached(
+            key,
+            ProductFacets,
+            lambda service: service._load_product_facets(**filter_by),
+        )
+
+    async def _prepare_filters(self, filter_by: dict) -> int | None:
+        """
+        Приводить фільтри до вигляду репозиторію і повертає категорію,
+        від якої залежить список.
+        """
+        if "options" in filter_by:
+            filter_by["options"] = self._parse_options(filter_by["options"])
+        scope = filter_by.get("category_id")
         if "category" in filter_by:
-            slug = filter_by.pop("category")
+            # категорія разом з усіма підкатегоріями
+            scope = await self._resolve_category_slug(filter_by.pop("category"))
+            tree = await category_tree.get()
+            # категорії, якої ще немає в дереві, підкатегорій теж ніхто не бачив
+            filter_by["category_ids"] = (
+                tree.descendants(scope) if scope in tree else [scope]
+            )
+        return scope
+
+    @staticmethod
+    def _parse_options(options: List[str]) -> dict[str, list[str]]:
+        """["color:red", "color:blue", "size:M"] -> {"color": [...], "size": [...]}"""
+        parsed: dict[str, list[str]] = {}
+        for option in options:
+            name, sep, value = option.partition(":")
+            if not sep or not name or not value:
+                raise BadRequestException(
+                    f"Invalid option filter '{option}', expected name:value"
+                )
+            parsed.setdefault(name, [])
+            if value not in parsed[name]:
+                parsed[name].append(value)
+        return {name: sorted(values) for name, values in sorted(parsed.items())}
+
+    async def search_products(
+        self, query: str, skip: int = 0, limit: int = 10
+    ) -> ProductList:
+        key = await product_cache.list_key(None, search=query, skip=skip, limit=limit)
+        return await self._cached(
+            key,
+            ProductList,
+            lambda service: service._search_products(query, skip, limit),
+        )
+
+    async def suggest_products(
+        self, prefix: str, limit: int = 10
+    ) -> List[ProductSuggestion]:
+        if not suggest_index.ready:
+            # індекс ще будується — відповідаємо повнотекстовим пошуком
+            suggest_index.start_rebuild()
+            page = await self.product_repo.search_products(prefix, skip=0, limit=limit)
+            return [ProductSuggestion(id=p.id, text=p.name) for p in page.items]
+        return [
+            ProductSuggestion(id=product_id, text=text)
+            for product_id, text in suggest_index.suggest(prefix, limit)
+        ]
+
+    async def _search_products(self, query: str, skip: int, limit: int) -> ProductList:
+        page = await self.product_repo.search_products(query, skip=skip, limit=limit)
+        return ProductList(
+            items=[ProductRead.model_validate(p) for p in page.items],
+            total=page.total,
+            page=(skip // limit) + 1,
+            per_page=limit,
+        )
+
+    async def _resolve_category_slug(self, slug: str) -> int:
+        category_id = (await category_tree.get()).id_by_slug(slug)
+        if category_id is None:
+            # дерево могло ще не отримати свіжу категорію з іншого воркера
             category = await self.category_repo.find_one(slug=slug)
             if not category:
                 raise NotFoundException(f"Category with slug {slug} not found")
-            filter_by["category_id"] = category.id
+            try:
+                await category_tree.refresh()
+            except Exception as e:
+                logger.warning(f"Category tree refresh failed: {e}")
+            category_id = (await category_tree.get()).id_by_slug(slug) or category.id
+        return category_id
 
-        total = await self.product_repo.count_all(**filter_by)
-        page = (skip // limit) + 1
-        products = await self.product_repo.find_many_products(
-            skip=skip, limit=limit, **filter_by
+    async def _load_products(
+        self, skip: int, limit: int, after: str | None, sort: str | None, **filter_by
+    ) -> ProductList:
+        page = await self.product_repo.find_products_page(
+            skip=skip, limit=limit, after=after, sort=sort, **filter_by
         )
         return ProductList(
-            items=[ProductRead.model_validate(p) for p in products],
-            total=total,
-            page=page,
+            items=[ProductRead.model_validate(p) for p in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
+            next_cursor=page.next_cursor,
+        )
+
+    async def _load_product_cards(
+        self, skip: int, limit: int, after: str | None, sort: str | None, **filter_by
+    ) -> ProductCardList:
+        page = await self.product_repo.find_product_cards_page(
+            skip=skip, limit=limit, after=after, sort=sort, **filter_by
+        )
+        return ProductCardList(
+            items=[ProductCard.model_validate(row) for row in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
+            per_page=limit,
+            next_cursor=page.next_cursor,
+        )
+
+    async def _load_product_facets(self, **filter_by) -> ProductFacets:
+        totals, options = await self.product_repo.find_product_facets(**filter_by)
+        total, in_stock, min_price, max_price = totals
+        return ProductFacets(
+            total=total,
+            in_stock=in_stock,
+            min_price=min_price,
+            max_price=max_price,
+            options=[
+                OptionFacet(name=name, value=value, count=count)
+                for name, value, count in options
+            ],
         )
 
     async def get_product(self, product_id: int) -> ProductRead:
-        product = await self.product_repo.find_one_product(id=product_id)
-        if not product:
-            raise NotFoundException(f"Product with id {product_id} not found")
-        return ProductRead.model_validate(product)
+        return await self._cached(
+            product_cache.detail_key("id", product_id),
+            ProductRead,
+            lambda service: service._load_product(id=product_id),
+        )
 
     async def get_product_by_slug(self, slug: str) -> ProductRead:
-        product = await self.product_repo.find_one_product(slug=slug)
+        return await self._cached(
+            product_cache.detail_key("slug", slug),
+            ProductRead,
+            lambda service: service._load_product(slug=slug),
+        )
+
+    async def _load_product(self, **filter_by) -> ProductRead:
+        product = await self.product_repo.find_one_product(**filter_by)
         if not product:
-            raise NotFoundException(f"Product with slug {slug} not found")
+            field, value = next(iter(filter_by.items()))
+            raise NotFoundException(f"Product with {field} {value} not found")
         return ProductRead.model_validate(product)
 
     async def get_product_by_sku(self, sku: str) -> ProductRead:
@@ -93,21 +313,98 @@ class ProductService(BaseService):
     async def update_product(
         self, product_id: int, product_data: ProductUpdate
     ) -> ProductRead:
-        product = await self.get_product(product_id)
+        changes = product_data.model_dump(exclude_unset=True)
+        products = await self.update_products(
+            [ProductBatchUpdate(id=product_id, **changes)]
+        )
+        return products[0]
+
+    async def update_products(
+        self, products_data: List[ProductBatchUpdate]
+    ) -> List[ProductRead]:
+        """
+        Оновлює товари одним UPDATE; передані options/images замінюють
+        наявні (по DELETE та INSERT на всю пачку).
+        """
+        self._check_batch_size(products_data)
+        ids = [product.id for product in products_data]
+        if len(set(ids)) != len(ids):
+            raise BadRequestException("Duplicate product ids in batch")
 
-        update_data = product_data.model_dump(exclude_unset=True)
-        if not update_data:
+        changes = [
+            product.model_dump(exclude_unset=True, exclude={"id"})
+            for product in products_data
+        ]
+        if not all(changes):
             raise BadRequestException("No valid fields provided for update")
 
-        updated_product = await self.product_repo.edit_one(product_id, update_data)
+        # читаємо з БД, а не з кешу: потрібні актуальні категорії та slug-и
+        refs = await self.product_repo.find_refs(ids)
+        missing = [product_id for product_id in ids if product_id not in refs]
+        if len(missing) == 1:
+            raise NotFoundException(f"Product with id {missing[0]} not found")
+        if missing:
+            raise NotFoundException(f"Products with ids {missing} not found")
+
+        fields = []
+        for product_id, change in zip(ids, changes):
+            data = {k: v for k, v in change.items() if k not in ("options", "images")}
+            if data:
+                fields.append({"id": product_id, **data})
+        updated = await self.product_repo.edit_many(fields)
+
+        for field, repo in (
+            ("options", self.option_repo),
+            ("images", self.image_repo),
+        ):
+            replaced = [
+                product_id
+                for product_id, change in zip(ids, changes)
+                if change.get(field) is not None
+            ]
+            if replaced:
+                await repo.delete_for_products(replaced)
+        await self._add_children(zip(ids, products_data))
+
+        self._invalidate_cache(
+            category_ids={category_id for _, category_id in refs.values()}
+            | {row["category_id"] for row in updated},
+            product_ids=ids,
+            slugs=[slug for slug, _ in refs.values()],
+        )
+        renamed = [
+            product_id
+            for product_id, change in zip(ids, changes)
+            if {"name", "sku"} & change.keys()
+        ]
+        suggest_index.refresh_after_commit(self.product_repo.session, renamed)
 
-        return ProductRead.model_validate(updated_product)
+        products = await self.product_repo.find_products_by_ids(ids)
+        by_id = {product.id: product for product in products}
+        return [ProductRead.model_validate(by_id[product_id]) for product_id in ids]
 
     async def delete_product(self, product_id: int) -> ProductRead:
-        product = await self.get_product(product_id)
+        product = await self._load_product(id=product_id)
         deleted_product = await self.product_repo.delete_one(product_id)
+
+        self._invalidate_cache(
+            category_ids=[product.category_id],
+            product_ids=[product_id],
+            slugs=[product.slug],
+        )
+        suggest_index.refresh_after_commit(self.product_repo.session, [product_id])
         return ProductRead.model_validate(deleted_product)
 
-    async def export_products(self, **filter_by) -> List[ProductRead]:
-        products = await self.product_repo.find_all_products(**filter_by)
-        return [ProductRead.model_validate(p) for p in products]
+    async def _cached(self, key, schema, load):
+        async def revalidate():
+            async with async_session_maker() as session:
+                return await load(ProductService(session))
+
+        return await product_cache.get_or_load(
+            key, schema, lambda: load(self), revalidate
+        )
+
+    def _invalidate_cache(self, **kwargs):
+        after_commit(
+            self.product_repo.session, lambda: product_cache.invalidate(**kwargs)
+        )
@@ -0,0 +1,147 @@
+import hashlib
+import json
+from typing import Awaitable, Callable, Iterable
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.db.cache import LocalTTLCache, TwoTierCache, invalidation_bus
+from app.db.redis import RedisService
+from app.schemas.product import ProductCard
+from app.services.category_tree import category_tree
+from logger import logger
+
+
+class ProductCache:
+    """
+    Кеш сторінок і карток товарів.
+
+    Ключі списків містять версію області видимості: `all` для списків без
+    фільтра за категорією та `cat:{id}` для списків категорії. Зміна товару
+    інкрементує версії його категорій і `all`, тож старі сторінки просто
+    перестають читатися і зникають за TTL. Товари (за id і slug) та їхні
+    легкі картки (за id) видаляються явно.
+
+    Записи живуть у TwoTierCache зі stale-while-revalidate; версії теж
+    тримаються локально і скидаються через `invalidation_bus`.
+    """
+
+    version_namespace = "product:ver"
+
+    def __init__(self):
+        self.entries = TwoTierCache(
+            "product",
+            ttl=settings.app.PRODUCT_CACHE_TTL,
+            stale_ttl=settings.app.PRODUCT_CACHE_STALE_TTL,
+            local_ttl=settings.app.PRODUCT_CACHE_LOCAL_TTL,
+            distributed_lock=True,
+        )
+        self.redis = RedisService()
+        self._versions = LocalTTLCache(
+            settings.app.CACHE_LOCAL_MAX_ENTRIES, settings.app.PRODUCT_CACHE_LOCAL_TTL
+        )
+        invalidation_bus.register(self.version_namespace, self)
+
+    def detail_key(self, field: str, value) -> str:
+        return f"detail:{field}:{value}"
+
+    def card_key(self, product_id: int) -> str:
+        return f"card:{product_id}"
+
+    async def list_key(self, scope_id: int | None, **params) -> str | None:
+        """`scope_id` — категорія, від якої залежить список (з підкатегоріями)."""
+        scope = "all" if scope_id is None else f"cat:{scope_id}"
+        version = self._versions.get(scope)
+        if version is None:
+            try:
+                version = await self.redis.get(self._version_key(scope)) or 0
+            except RedisError as e:
+                logger.warning(f"Product cache unavailable: {e}")
+                return None
+            self._versions.set(scope, version)
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"list:{scope}:v{version}:{digest}"
+
+    async def get_or_load(self, key, schema, load, revalidate=None):
+        return await self.entries.get_or_load(key, schema, load, revalidate)
+
+    async def get_cards(
+        self,
+        product_ids: Iterable[int],
+        load: Callable[[list[int]], Awaitable[list[ProductCard]]],
+    ) -> dict[int, ProductCard]:
+        """
+        Картки товарів за id. Відсутні в кеші читаються одним викликом
+        `load(ids)`; товарів, яких немає в БД, у результаті не буде.
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return {}
+        if not settings.app.CACHE_ENABLED:
+            return {card.id: card for card in await load(product_ids)}
+
+        found = await self.entries.get_many(
+            map(self.card_key, product_ids), ProductCard
+        )
+        cards = {card.id: card for card in found.values()}
+        missing = [product_id for product_id in product_ids if product_id not in cards]
+        if missing:
+            for card in await load(missing):
+                cards[card.id] = card
+                await self.entries.set(self.card_key(card.id), card)
+        return cards
+
+    async def invalidate(
+        self,
+        category_ids: Iterable[int] = (),
+        product_ids: Iterable[int] = (),
+        slugs: Iterable[str] = (),
+    ):
+        # завантаження, що почалося до commit, може ще записати стару картку;
+        # вона проживе не довше PRODUCT_CACHE_TTL
+        category_ids = set(category_ids)
+        try:
+            tree = await category_tree.get()
+        except Exception as e:
+            logger.error(f"Category tree unavailable: {e}")
+            affected = category_ids
+        else:
+            # товар є і в списках усіх батьківських категорій
+            affected = {
+                ancestor
+                for category_id in category_ids
+                for ancestor in tree.ancestors(category_id) or [category_id]
+            }
+        scopes = ["all", *(f"cat:{category_id}" for category_id in affected)]
+        try:
+            for scope in scopes:
+                await self.redis.incr(self._version_key(scope))
+        except RedisError as e:
+            logger.warning(f"Product cache unavailable: {e}")
+        self.drop_local(scopes)
+        await invalidation_bus.publish(self.version_namespace, scopes)
+
+        product_ids = list(product_ids)
+        keys = [self.detail_key("id", product_id) for product_id in product_ids]
+        keys += [self.card_key(product_id) for product_id in product_ids]
+        keys += [self.detail_key("slug", slug) for slug in slugs]
+        if keys:
+            await self.entries.invalidate(*keys)
+
+    def drop_local(self, scopes: list[str] | None):
+        if scopes is None:
+            self._versions.clear()
+            return
+        for scope in scopes:
+            self._versions.delete(scope)
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+    def _version_key(self, scope: str) -> str:
+        return f"{self.version_namespace}:{scope}"
+
+
+product_cache = ProductCache()
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+import tempfile
+
+from openpyxl import Workbook
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.db import async_session_maker
+from app.repositories.product import ProductRepository
+from app.services.product_import import IMPORT_COLUMNS
+
+EXPORT_MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Розмір шматка, яким готовий .xlsx файл віддається клієнту
+XLSX_READ_CHUNK = 64 * 1024
+
+
+class ProductExportService:
+    """
+    Потоковий експорт каталогу.
+
+    Генератори відкривають власну сесію, бо StreamingResponse читає їх уже
+    після завершення залежностей запиту. Рядки тягнуться з БД партіями по
+    EXPORT_BATCH_SIZE, тож пам'ять не залежить від розміру каталогу.
+    CSV та NDJSON віддаються одразу по мірі читання; XLSX пишеться в
+    write-only режимі у тимчасовий файл на диску і стрімиться після збереження.
+    """
+
+    def __init__(self, session_factory=async_session_maker, batch_size: int | None = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.app.EXPORT_BATCH_SIZE
+
+    def stream(self, format: str):
+        return {
+            "xlsx": self.iter_xlsx,
+            "csv": self.iter_csv,
+            "ndjson": self.iter_ndjson,
+        }[format]()
+
+    async def _batches(self):
+        async with self.session_factory() as session:
+            repo = ProductRepository(session)
+            async for rows in repo.stream_export_rows(self.batch_size):
+                yield rows
+
+    async def iter_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(IMPORT_COLUMNS)
+        yield buffer.getvalue().encode()
+
+        async for rows in self._batches():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+
+    async def iter_ndjson(self):
+        async for rows in self._batches():
+            yield "".join(
+                json.dumps(dict(row._mapping), ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode()
+
+    async def iter_xlsx(self):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(IMPORT_COLUMNS)
+        async for rows in self._batches():
+            for row in rows:
+                sheet.append(tuple(row))
+
+        with tempfile.TemporaryFile() as stream:
+            await run_in_threadpool(workbook.save, stream)
+            stream.seek(0)
+            while chunk := await run_in_threadpool(stream.read, XLSX_READ_CHUNK):
+                yield chunk
@@ -0,0 +1,286 @@
+import csv
+import json
+import os
+from typing import Iterable, Iterator, List
+from zipfile import BadZipFile
+
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, ConflictException
+from app.db.db import after_commit
+from app.repositories.product import ProductImageRepository, ProductRepository
+from app.schemas.product import ProductImportRow
+from app.services.base import BaseService
+from app.services.product_cache import product_cache
+from app.services.product_suggest import suggest_index
+
+# Очікувані колонки (у тому ж порядку, що в Excel)
+IMPORT_COLUMNS = [
+    "sku",
+    "name",
+    "description",
+    "category_id",
+    "base_price",
+    "stock_quantity",
+    "image_url",
+]
+
+IMPORT_FORMATS = (".xlsx", ".csv", ".ndjson")
+
+_rows_adapter = TypeAdapter(List[ProductImportRow])
+
+
+def read_rows(file, filename: str) -> Iterator[tuple]:
+    """
+    Потоково читає рядки файлу імпорту (першим іде заголовок).
+
+    .xlsx читається в read_only режимі openpyxl, без побудови повної моделі
+    книги; .csv та .ndjson розбираються построково. Порожні рядки
+    пропускаються.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".xlsx":
+        rows = _read_xlsx(file)
+    elif extension == ".csv":
+        rows = _read_csv(file)
+    elif extension == ".ndjson":
+        rows = _read_ndjson(file)
+    else:
+        raise BadRequestException(
+            f"Непідтримуваний формат файлу. Очікується: {', '.join(IMPORT_FORMATS)}"
+        )
+    return (row for row in rows if any(value is not None for value in row))
+
+
+def _read_xlsx(file) -> Iterator[tuple]:
+    try:
+        workbook = load_workbook(filename=file, read_only=True, data_only=True)
+    except (BadZipFile, KeyError, InvalidFileException) as e:
+        raise _read_error(1, f"Некоректний файл .xlsx: {e}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _read_csv(file) -> Iterator[tuple]:
+    reader = csv.reader(_decode_lines(file))
+    try:
+        for row in reader:
+            yield tuple(value if value != "" else None for value in row)
+    except csv.Error as e:
+        raise _read_error(reader.line_num, str(e))
+
+
+def _decode_lines(file) -> Iterator[str]:
+    # построкове декодування: номер рядка з помилкою кодування точний
+    for number, line in enumerate(file, start=1):
+        try:
+            yield line.decode("utf-8-sig" if number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise _read_error(number, "Рядок не в кодуванні UTF-8")
+
+
+def _read_ndjson(file) -> Iterator[tuple]:
+    yield tuple(IMPORT_COLUMNS)
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            raise _read_error(number, f"Некоректний JSON: {e}")
+        if not isinstance(data, dict):
+            raise _read_error(number, "Рядок має бути JSON-об'єктом")
+        yield tuple(data.get(column) for column in IMPORT_COLUMNS)
+
+
+def _validate_batches(
+    rows: Iterable[tuple], batch_size: int
+) -> Iterator[tuple[List[ProductImportRow], list[dict]]]:
+    """
+    Перевіряє заголовок і віддає рядки пачками по batch_size разом із
+    помилками пачки. Пачка валідується одним викликом TypeAdapter, повтор
+    SKU шукається по всьому вже прочитаному файлу.
+    """
+    rows = iter(rows)
+    header = list(next(rows, ()))
+    if header != IMPORT_COLUMNS:
+        raise BadRequestException(
+            f"Неправильні заголовки стовпців. Очікується: {', '.join(IMPORT_COLUMNS)}",
+        )
+
+    seen_skus = set()
+    batch, batch_rows, errors = [], [], []
+
+    def flush():
+        rows_data = []
+        try:
+            rows_data = _rows_adapter.validate_python(batch)
+        except ValidationError as e:
+            row_errors = {}
+            for error in e.errors():
+                index, *loc = error["loc"]
+                row_errors.setdefault(batch_rows[index], []).append(
+                    {**error, "loc": tuple(loc)}
+                )
+            errors.extend({"row": idx, "error": err} for idx, err in row_errors.items())
+        result = rows_data, sorted(errors, key=lambda e: e["row"])
+        batch.clear()
+        batch_rows.clear()
+        errors.clear()
+        return result
+
+    for idx, row in enumerate(rows, start=2):
+        row_dict = dict(zip(IMPORT_COLUMNS, row))
+
+        # Перевірка на дублікати SKU у файлі
+        if row_dict["sku"] in seen_skus:
+            errors.append(
+                {"row": idx, "error": f"SKU '{row_dict['sku']}' повторюється у файлі"}
+            )
+            continue
+        seen_skus.add(row_dict["sku"])
+
+        batch.append(row_dict)
+        batch_rows.append(idx)
+        if len(batch) >= batch_size:
+            yield flush()
+    if batch or errors:
+        yield flush()
+
+
+def _validation_error(errors: list[dict]) -> BadRequestException:
+    return BadRequestException(
+        detail={"message": "Помилка валідації даних", "errors": errors},
+    )
+
+
+def _read_error(line: int, error: str) -> BadRequestException:
+    """Помилка розбору файлу — у форматі помилок validate_rows."""
+    return BadRequestException(
+        detail={
+            "message": "Помилка читання файлу",
+            "errors": [{"row": line, "error": error}],
+        },
+    )
+
+
+class ProductImportService(BaseService):
+    """
+    Пакетний імпорт товарів: валідація всього файлу, потім запис
+    чанками по IMPORT_CHUNK_SIZE рядків через INSERT ... ON CONFLICT (sku).
+    """
+
+    def __init__(self, db: AsyncSession, chunk_size: int | None = None):
+        self.product_repo = ProductRepository(db)
+        self.image_repo = ProductImageRepository(db)
+        self.chunk_size = chunk_size or settings.app.IMPORT_CHUNK_SIZE
+
+    @staticmethod
+    def validate_rows(
+        rows: Iterable[tuple], batch_size: int | None = None
+    ) -> List[ProductImportRow]:
+        """
+        Перевіряє заголовок і всі рядки таблиці. Перший рядок — заголовок.
+        Рядки валідуються пачками одним викликом TypeAdapter.
+        Якщо є хоч одна помилка — нічого не імпортується.
+        """
+        rows_data: List[ProductImportRow] = []
+        errors = []
+        for batch, batch_errors in _validate_batches(
+            rows, batch_size or settings.app.IMPORT_CHUNK_SIZE
+        ):
+            rows_data.extend(batch)
+            errors.extend(batch_errors)
+        if errors:
+            raise _validation_error(errors)
+        return rows_data
+
+    @staticmethod
+    def validate_chunks(
+        rows: Iterable[tuple], chunk_size: int | None = None
+    ) -> Iterator[List[ProductImportRow]]:
+        """
+        Віддає провалідовані чанки по мірі читання файлу, не тримаючи його
+        цілим у пам'яті. Чанк з помилками зупиняє читання винятком, як у
+        validate_rows; попередні чанки на той момент уже віддано.
+        """
+        for batch, errors in _validate_batches(
+            rows, chunk_size or settings.app.IMPORT_CHUNK_SIZE
+        ):
+            if errors:
+                raise _validation_error(errors)
+            yield batch
+
+    async def import_rows(self, rows: List[ProductImportRow]) -> tuple[int, int]:
+        """Імпортує рядки чанками. Повертає (створено, оновлено)."""
+        created_count = 0
+        updated_count = 0
+        for start in range(0, len(rows), self.chunk_size):
+            created, updated = await self.import_chunk(
+                rows[start : start + self.chunk_size]
+            )
+            created_count += created
+            updated_count += updated
+        return created_count, updated_count
+
+    async def import_chunk(self, rows: List[ProductImportRow]) -> tuple[int, int]:
+        existing = await self.product_repo.find_by_skus([r.sku for r in rows])
+        new_rows = [r for r in rows if r.sku not in existing]
+
+        # як і create_product: назва нового товару має бути унікальною
+        new_names = [r.name for r in new_rows]
+        if len(set(new_names)) != len(new_names) or (
+            await self.product_repo.find_existing_names(new_names)
+        ):
+            raise ConflictException("Product with this name already exists")
+
+        slugs = await self._generate_unique_slugs(new_names, self.product_repo)
+        new_slugs = dict(zip((r.sku for r in new_rows), slugs))
+
+        result = await self.product_repo.upsert_by_sku(
+            [
+                {
+                    "sku": r.sku,
+                    "name": r.name,
+                    "slug": existing[r.sku][1] if r.sku in existing else new_slugs[r.sku],
+                    "description": r.description,
+                    "category_id": r.category_id,
+                    "base_price": r.base_price,
+                    "stock_quantity": r.stock_quantity,
+                }
+                for r in rows
+            ]
+        )
+
+        # зображення додаються лише для нових товарів, як і раніше
+        image_urls = {r.sku: r.image_url for r in new_rows if r.image_url}
+        await self.image_repo.add_many(
+            [
+                {"product_id": row.id, "image_url": image_urls[row.sku], "is_main": True}
+                for row in result
+                if row.inserted and row.sku in image_urls
+            ]
+        )
+
+        after_commit(
+            self.product_repo.session,
+            lambda: product_cache.invalidate(
+                category_ids=[r.category_id for r in rows]
+                + [item[2] for item in existing.values()],
+                product_ids=[item[0] for item in existing.values()],
+                slugs=[item[1] for item in existing.values()],
+            ),
+        )
+
+        suggest_index.refresh_after_commit(
+            self.product_repo.session, [row.id for row in result]
+        )
+
+        created = sum(1 for row in result if row.inserted)
+        return created, len(result) - created
@@ -0,0 +1,251 @@
+import asyncio
+import bisect
+import heapq
+import time
+import uuid
+from array import array
+from typing import Iterable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.cache import invalidation_bus
+from app.db.db import after_commit, async_session_maker
+from app.repositories.product import ProductRepository
+from logger import logger
+
+# рядок, більший за будь-яке продовження префікса
+_PREFIX_END = "\U0010ffff"
+
+
+class _Texts(Sequence):
+    """Рядки, збережені одним UTF-8 буфером зі зміщеннями."""
+
+    def __init__(self, blob: bytes, offsets: array):
+        self._blob = memoryview(blob)
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, pos: int) -> str:
+        return str(self._blob[self._offsets[pos] : self._offsets[pos + 1]], "utf-8")
+
+
+class PrefixIndex:
+    """
+    Незмінний індекс для автодоповнення за префіксом.
+
+    Назви та SKU відсортовані за `casefold()` і лежать одним UTF-8 буфером,
+    поруч — масиви id товарів і популярності. Пошук — двійковий пошук
+    діапазону префікса. Для «важких» префіксів (понад `heavy` збігів,
+    зазвичай 1–3 літери) top-k заздалегідь пораховано, для решти діапазон
+    достатньо малий, щоб вибрати top-k на льоту.
+
+    Пам'ять: ~(довжина в UTF-8 + 24) байти на назву чи SKU плюс top-k для
+    важких префіксів. На 1 млн товарів (назви ~45 символів, SKU) — близько
+    100 МБ, пошук ~0.05 мс; побудова ~6 с і до ~400 МБ пікового споживання.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[tuple[str, int, int]],
+        top_k: int = settings.app.SUGGEST_TOP_K,
+        heavy: int = settings.app.SUGGEST_HEAVY_PREFIX,
+    ):
+        entries = sorted(entries, key=lambda entry: entry[0].casefold())
+        self.top_k = top_k
+        self.heavy = heavy
+
+        encoded = [text.encode() for text, _, _ in entries]
+        self._offsets = array("Q", [0])
+        for item in encoded:
+            self._offsets.append(self._offsets[-1] + len(item))
+        self.texts = _Texts(b"".join(encoded), self._offsets)
+        self.ids = array("q", (product_id for _, product_id, _ in entries))
+        self.scores = array("q", (score for _, _, score in entries))
+        del encoded, entries
+
+        self._top: dict[str, array] = {}
+        self._build_top("", 0, len(self.ids))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build_top(self, prefix: str, lo: int, hi: int):
+        """Рекурсивно рахує top-k для всіх префіксів з понад `heavy` збігами."""
+        stack = [(prefix, lo, hi)]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if prefix:
+                self._top[prefix] = array("q", self._largest(lo, hi, 2 * self.top_k))
+            depth = len(prefix)
+            pos = lo
+            while pos < hi:
+                key = self.texts[pos].casefold()
+                if len(key) <= depth:
+                    pos += 1
+                    continue
+                child = key[: depth + 1]
+                end = self._bound(child + _PREFIX_END, pos, hi)
+                if end - pos > self.heavy:
+                    stack.append((child, pos, end))
+                pos = end
+
+    def _bound(self, key: str, lo: int, hi: int) -> int:
+        return bisect.bisect_left(self.texts, key, lo, hi, key=str.casefold)
+
+    def _largest(self, lo: int, hi: int, count: int) -> list[int]:
+        return heapq.nlargest(count, range(lo, hi), key=self.scores.__getitem__)
+
+    def candidates(self, prefix: str, count: int) -> list[int]:
+        """Позиції найпопулярніших записів із префіксом `prefix` (casefold)."""
+        lo = self._bound(prefix, 0, len(self))
+        hi = self._bound(prefix + _PREFIX_END, lo, len(self))
+        if hi - lo > self.heavy and prefix in self._top and count <= 2 * self.top_k:
+            return self._top[prefix][:count].tolist()
+        return self._largest(lo, hi, count)
+
+
+class SuggestIndex:
+    """
+    Автодоповнення назв і SKU товарів без запитів до БД.
+
+    Основний PrefixIndex будується під час старту. Зміни товарів після
+    commit потрапляють у невелику дельту (нові/змінені записи) і множину
+    видалених id; інші воркери отримують id змінених товарів через
+    `invalidation_bus`. Коли змін накопичується понад SUGGEST_MAX_PENDING,
+    індекс перебудовується у фоні.
+    """
+
+    namespace = "product_suggest"
+
+    def __init__(self, session_factory=async_session_maker):
+        self.session_factory = session_factory
+        self.index: PrefixIndex | None = None
+        # дельта: відсортовані (casefold, text, id, popularity)
+        self._delta: list[tuple[str, str, int, int]] = []
+        self._removed: set[int] = set()
+        # id товарів, змінених під час перебудови
+        self._dirty: set[int] | None = None
+        self._lock = asyncio.Lock()
+        self._rebuilding: asyncio.Task | None = None
+        self._origin = uuid.uuid4().hex
+        self._tasks: set[asyncio.Task] = set()
+        invalidation_bus.register(self.namespace, self)
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def suggest(self, prefix: str, limit: int = settings.app.SUGGEST_TOP_K):
+        """Повертає [(id, text)] за спаданням популярності."""
+        prefix = prefix.casefold()
+        found: list[tuple[int, str, int]] = []
+        if self.index is not None:
+            # із запасом, бо частина записів може бути видалена чи змінена
+            count = limit + min(len(self._removed), limit)
+            for pos in self.index.candidates(prefix, count):
+                product_id = self.index.ids[pos]
+                if product_id not in self._removed:
+                    found.append(
+                        (self.index.scores[pos], self.index.texts[pos], product_id)
+                    )
+
+        lo = bisect.bisect_left(self._delta, (prefix,))
+        hi = bisect.bisect_left(self._delta, (prefix + _PREFIX_END,), lo)
+        found.extend(
+            (score, text, product_id) for _, text, product_id, score in self._delta[lo:hi]
+        )
+
+        result, seen = [], set()
+        for score, text, product_id in sorted(found, key=lambda item: -item[0]):
+            if product_id not in seen:
+                seen.add(product_id)
+                result.append((product_id, text))
+                if len(result) == limit:
+                    break
+        return result
+
+    async def rebuild(self):
+        async with self._lock:
+            started = time.perf_counter()
+            self._dirty = set()
+            entries = []
+            async with self.session_factory() as session:
+                repo = ProductRepository(session)
+                async for rows in repo.stream_suggest_rows(
+                    settings.app.EXPORT_BATCH_SIZE
+                ):
+                    for row in rows:
+                        entries.extend(self._entries(row))
+            index = await asyncio.to_thread(PrefixIndex, entries)
+            self.index, self._delta, self._removed = index, [], set()
+            # зміни, що прийшли під час побудови, могли не потрапити в знімок
+            dirty, self._dirty = self._dirty, None
+            if dirty:
+                await self.reload(list(dirty))
+            logger.info(
+                f"Suggest index built: {len(index)} entries "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+    def refresh_after_commit(self, session: AsyncSession, product_ids: Iterable[int]):
+        product_ids = list(product_ids)
+        if product_ids:
+            after_commit(session, lambda: self._changed(product_ids))
+
+    async def _changed(self, product_ids: list[int]):
+        await self.reload(product_ids)
+        await invalidation_bus.publish(
+            self.namespace, [self._origin, *map(str, product_ids)]
+        )
+
+    async def reload(self, product_ids: list[int]):
+        """Перечитує з БД вказані товари; відсутні вважаються видаленими."""
+        async with self.session_factory() as session:
+            rows = await ProductRepository(session).find_suggest_rows(product_ids)
+
+        ids = set(product_ids)
+        if self._dirty is not None:
+            self._dirty.update(ids)
+        self._delta = [entry for entry in self._delta if entry[2] not in ids]
+        self._removed.update(ids)
+        for row in rows:
+            for text, product_id, score in self._entries(row):
+                bisect.insort(self._delta, (text.casefold(), text, product_id, score))
+
+        if len(self._delta) + len(self._removed) > settings.app.SUGGEST_MAX_PENDING:
+            self.start_rebuild()
+
+    def start_rebuild(self):
+        if self._rebuilding is None or self._rebuilding.done():
+            self._rebuilding = self._spawn(self.rebuild())
+
+    def drop_local(self, keys: list[str] | None):
+        if keys is None:
+            self.start_rebuild()
+        elif keys[0] != self._origin:
+            self._spawn(self.reload([int(key) for key in keys[1:]]))
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(self._run(coro))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, coro):
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"Suggest index update failed: {e}")
+
+    @staticmethod
+    def _entries(row) -> list[tuple[str, int, int]]:
+        entries = [(row.name, row.id, row.popularity)]
+        if row.sku:
+            entries.append((row.sku, row.id, row.popularity))
+        return entries
+
+
+suggest_index = SuggestIndex()
@@ -5,6 +5,8 @@ from app.core.exceptions import (
 )
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.db import after_commit
+from app.repositories.product import ProductRepository
 from app.repositories.review import ReviewRepository
 from app.schemas.review import (
     ReviewCreate,
@@ -12,11 +14,13 @@ from app.schemas.review import (
     ReviewRead,
     ReviewList,
 )
+from app.services.product_cache import product_cache
 
 
 class ReviewService:
     def __init__(self, db: AsyncSession):
         self.review_repo = ReviewRepository(db)
+        self.product_repo = ProductRepository(db)
 
     async def create_review(
         self, user_id: int, review_data: ReviewCreate
@@ -28,6 +32,7 @@ class ReviewService:
         if existing:
             raise ConflictException("You have already left a review for this product")
 
+        await self._add_rating(review_data.product_id, review_data.rating, 1)
         new_review = await self.review_repo.add_one(
             {
                 "user_id": user_id,
@@ -39,13 +44,12 @@ class ReviewService:
         return ReviewRead.model_validate(new_review)
 
     async def get_reviews(self, skip: int = 0, limit: int = 10) -> ReviewList:
-        total = await self.review_repo.count_all()
-        page = (skip // limit) + 1
-        reviews = await self.review_repo.find_many(skip=skip, limit=limit)
+        page = await self.review_repo.find_page(skip=skip, limit=limit)
         return ReviewList(
-            items=[ReviewRead.model_validate(r) for r in reviews],
-            total=total,
-            page=page,
+            items=[ReviewRead.model_validate(r) for r in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
         )
 
@@ -69,7 +73,16 @@ class ReviewService:
         if not update_data:
             raise BadRequestException("No valid fields provided for update")
 
+        # UPDATE синхронізує об'єкт у сесії, тож старі значення — до нього
+        old_product_id, old_rating = review.product_id, review.rating
         updated_review = await self.review_repo.edit_one(review_id, update_data)
+        new_product_id = updated_review["product_id"]
+        new_rating = updated_review["rating"]
+        if new_product_id != old_product_id:
+            await self._add_rating(old_product_id, -old_rating, -1)
+            await self._add_rating(new_product_id, new_rating, 1)
+        elif new_rating != old_rating:
+            await self._add_rating(old_product_id, new_rating - old_rating, 0)
         return ReviewRead.model_validate(updated_review)
 
     async def delete_review(self, review_id: int, user_id: int) -> ReviewRead:
@@ -80,5 +93,23 @@ class ReviewService:
         if review.user_id != user_id:
             raise BadRequestException("You can delete only your own reviews")
 
+        product_id, rating = review.product_id, review.rating
         deleted_review = await self.review_repo.delete_one(review_id)
+        await self._add_rating(product_id, -rating, -1)
         return ReviewRead.model_validate(deleted_review)
+
+    async def _add_rating(self, product_id: int, rating_delta: int, count_delta: int):
+        """Оновлює агрегати відгуків товару в тій самій транзакції, що й відгук."""
+        product = await self.product_repo.add_rating(
+            product_id, rating_delta, count_delta
+        )
+        if product is None:
+            raise NotFoundException(f"Product with id {product_id} not found")
+        after_commit(
+            self.review_repo.session,
+            lambda: product_cache.invalidate(
+                category_ids=[product.category_id],
+                product_ids=[product_id],
+                slugs=[product.slug],
+            ),
+        )
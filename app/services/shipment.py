@@ -31,13 +31,12 @@ class ShipmentService:
         return ShipmentRead.model_validate(new_shipment)
 
     async def get_shipments(self, skip: int = 0, limit: int = 10) -> ShipmentList:
-        total = await self.shipment_repo.count_all()
-        page = (skip // limit) + 1
-        shipments = await self.shipment_repo.find_many(skip=skip, limit=limit)
+        page = await self.shipment_repo.find_page(skip=skip, limit=limit)
         return ShipmentList(
-            items=[ShipmentRead.model_validate(s) for s in shipments],
-            total=total,
-            page=page,
+            items=[ShipmentRead.model_validate(s) for s in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
         )
 
@@ -1,10 +1,12 @@
-from passlib.context import CryptContext
 from app.core.exceptions import (
     BadRequestException,
     ConflictException,
     ForbiddenException,
     NotFoundException,
 )
+from app.core.security import password_hasher
+from app.core.config import settings
+from app.db.cache import TwoTierCache
 from app.models.user import Role, User
 from app.repositories.user import UserRepository
 from app.schemas.user import (
@@ -15,22 +17,28 @@ from app.schemas.user import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# автентифікований користувач за email; читається на кожному запиті з токеном
+user_principal_cache = TwoTierCache(
+    "user_principal",
+    ttl=settings.app.USER_CACHE_TTL,
+    local_ttl=settings.app.USER_CACHE_LOCAL_TTL,
+    max_entries=settings.app.USER_CACHE_MAX_ENTRIES,
+)
 
 
 class UserService:
     def __init__(self, db: AsyncSession):
         self.user_repo = UserRepository(db)
 
-    def get_password_hash(self, password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        return await password_hasher.hash(password)
 
     async def create_user(self, user_data: UserCreate) -> UserRead:
         user = await self.user_repo.find_one(email=user_data.email)
         if user:
             raise ConflictException("User with this email already exists")
 
-        hashed_password = self.get_password_hash(user_data.password)
+        hashed_password = await self.get_password_hash(user_data.password)
         new_user_data = {
             "first_name": user_data.first_name,
             "last_name": user_data.last_name,
@@ -41,15 +49,17 @@ class UserService:
 
         return UserRead.model_validate(new_user)
 
-    async def get_users(self, skip: int = 0, limit: int = 10) -> UserList:
-        total = await self.user_repo.count_all()
-        page = (skip // limit) + 1
-        users = await self.user_repo.find_many(skip=skip, limit=limit)
+    async def get_users(
+        self, skip: int = 0, limit: int = 10, after: str | None = None
+    ) -> UserList:
+        page = await self.user_repo.find_page(skip=skip, limit=limit, after=after)
         return UserList(
-            items=[UserRead.model_validate(user) for user in users],
-            total=total,
-            page=page,
+            items=[UserRead.model_validate(user) for user in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
+            next_cursor=page.next_cursor,
         )
 
     async def get_user(self, user_id: int) -> UserRead:
@@ -63,6 +73,18 @@ class UserService:
         user = await self.user_repo.find_one(email=email)
         return user
 
+    async def get_principal(self, email: str) -> UserRead | None:
+        """Користувач для автентифікації: спершу з кешу, інакше з БД."""
+
+        async def load():
+            user = await self.user_repo.find_one(email=email)
+            return UserRead.model_validate(user) if user else None
+
+        return await user_principal_cache.get_or_load(email, UserRead, load)
+
+    def _invalidate_principal(self, email: str):
+        user_principal_cache.invalidate_after_commit(self.user_repo.session, email)
+
     async def update_user(
         self, user_id: int, user_data: UserUpdate, current_user_id: int
     ) -> UserRead:
@@ -80,11 +102,14 @@ class UserService:
         if user_data.last_name:
             update_data["last_name"] = user_data.last_name
         if user_data.password:
-            update_data["hashed_password"] = self.get_password_hash(user_data.password)
+            update_data["hashed_password"] = await self.get_password_hash(
+                user_data.password
+            )
 
         if not update_data:
             raise BadRequestException("No valid fields provided for update")
 
+        self._invalidate_principal(user.email)
         user = await self.user_repo.edit_one(user_id, update_data)
         return UserRead.model_validate(user)
 
@@ -97,4 +122,5 @@ class UserService:
             raise NotFoundException(f"User with id {user_id} not found")
 
         deleted_user = await self.user_repo.delete_one(user_id)
+        self._invalidate_principal(user.email)
         return UserRead.model_validate(deleted_user)
@@ -30,15 +30,14 @@ class WishlistService:
     async def get_wishlist(
         self, user_id: int, skip: int = 0, limit: int = 10
     ) -> WishlistList:
-        total = await self.wishlist_repo.count_all(user_id=user_id)
-        page = (skip // limit) + 1
-        items = await self.wishlist_repo.find_many(
+        page = await self.wishlist_repo.find_page(
             user_id=user_id, skip=skip, limit=limit
         )
         return WishlistList(
-            items=[WishlistRead.model_validate(i) for i in items],
-            total=total,
-            page=page,
+            items=[WishlistRead.model_validate(i) for i in page.items],
+            total=page.total,
+            total_estimated=page.estimated,
+            page=(skip // limit) + 1,
             per_page=limit,
         )
 
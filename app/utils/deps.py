@@ -1,4 +1,4 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,10 +9,14 @@ from app.core.exceptions import ServerException, UnauthorizedException
 from app.db.redis import RedisService
 from app.schemas.user import UserRead
 from app.services.auth import AuthService
-from app.services.cart import CartService
+from app.core.config import settings
+from app.services.cart import CartService, RedisCartService
 from app.services.order import OrderService
 from app.services.category import CategoryService
+from app.services.import_job import ImportJobService
 from app.services.product import ProductService
+from app.services.product_export import ProductExportService
+from app.services.product_import import ProductImportService
 from app.services.user import UserService
 
 
@@ -31,6 +35,20 @@ def get_product_service(db: AsyncSession = Depends(get_db)) -> ProductService:
     return ProductService(db)
 
 
+def get_product_import_service(
+    db: AsyncSession = Depends(get_db),
+) -> ProductImportService:
+    return ProductImportService(db)
+
+
+def get_product_export_service() -> ProductExportService:
+    return ProductExportService()
+
+
+def get_import_job_service() -> ImportJobService:
+    return ImportJobService()
+
+
 def get_category_service(db: AsyncSession = Depends(get_db)) -> CategoryService:
     return CategoryService(db)
 
@@ -40,6 +58,8 @@ def get_order_service(db: AsyncSession = Depends(get_db)) -> OrderService:
 
 
 def get_cart_service(db: AsyncSession = Depends(get_db)) -> CartService:
+    if settings.app.CART_STORAGE == "redis":
+        return RedisCartService(db)
     return CartService(db)
 
 
@@ -53,10 +73,14 @@ async def get_current_user(
         if email is None:
             raise UnauthorizedException(detail="Invalid token")
 
-        user = await service.get_user_by_email(email)
-        return UserRead.model_validate(user)
+        user = await service.get_principal(email)
+        if user is None:
+            raise UnauthorizedException(detail="User not found")
+        return user
 
     except JWTError:
         raise UnauthorizedException(detail="Invalid token")
+    except HTTPException:
+        raise
     except Exception as e:
         raise ServerException(detail=str(e))
@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from app.core.exceptions import BadRequestException
+
+
+def encode_cursor(value, id: int) -> str:
+    """
+    Кодує позицію keyset-пагінації (значення ключа сортування + id)
+    у непрозорий рядок для параметра `after`.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, python_type: type = int) -> tuple:
+    """
+    Розкодовує курсор, отриманий від `encode_cursor`.
+
+    python_type — тип колонки сортування, до якого приводиться значення
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None:
+            value = python_type(value)
+        return value, int(id)
+    except (binascii.Error, ValueError, TypeError):
+        raise BadRequestException("Invalid pagination cursor")
@@ -0,0 +1,128 @@
+"""
+Ціни кошика: по запиту на позицію проти PricingService (один запит).
+
+Запуск з кореня проєкту проти бази з .env:
+
+    python -m benchmarks.cart_pricing --lines 100 --rounds 200 --discount SALE10
+
+Кошик складається з `--lines` випадкових товарів з опціями (у кожної
+позиції вибрано одну опцію). Для кожного режиму виводиться кількість
+SQL-запитів і середній час на кошик, окремо — час лише обчислення
+підсумків (compute_totals) без БД.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event, func, select
+
+from app.db.db import async_session_maker, engine
+from app.models import Discount, Product, ProductOption
+from app.services.discount import is_discount_active
+from app.services.pricing import PricingService, compute_totals
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(*args):
+    global statements
+    statements += 1
+
+
+async def price_per_line(session, lines, discount_code):
+    """Як до PricingService: товар і його опції читаються для кожної позиції."""
+    subtotal = 0.0
+    for product_id, quantity, options in lines:
+        base_price = await session.scalar(
+            select(Product.base_price).where(Product.id == product_id)
+        )
+        surcharge = 0.0
+        for name, value in (options or {}).items():
+            surcharge += await session.scalar(
+                select(func.coalesce(func.sum(ProductOption.additional_price), 0.0))
+                .where(
+                    ProductOption.product_id == product_id,
+                    ProductOption.name == name,
+                    ProductOption.value == value,
+                )
+            )
+        subtotal += round((base_price + surcharge) * quantity, 2)
+    if discount_code:
+        discount = await session.scalar(
+            select(Discount).where(Discount.code == discount_code)
+        )
+        if discount and is_discount_active(discount):
+            if discount.discount_type == "percent":
+                subtotal -= round(subtotal * discount.value / 100, 2)
+            else:
+                subtotal -= min(discount.value, subtotal)
+    return round(subtotal, 2)
+
+
+async def sample_lines(session, count: int):
+    rows = await session.execute(
+        select(ProductOption.product_id, ProductOption.name, ProductOption.value)
+        .distinct(ProductOption.product_id)
+        .order_by(ProductOption.product_id, func.random())
+        .limit(count)
+    )
+    return [
+        (product_id, 1 + product_id % 3, {name: value})
+        for product_id, name, value in rows
+    ]
+
+
+async def run(mode: str, lines, rounds: int, discount_code: str | None):
+    global statements
+    async with async_session_maker() as session:
+        pricing = PricingService(session)
+
+        async def price():
+            if mode == "batched":
+                return (await pricing.price_cart(lines, discount_code)).total
+            return await price_per_line(session, lines, discount_code)
+
+        await price()  # прогрів з'єднання і кешу планів
+        statements = 0
+        started = time.perf_counter()
+        for _ in range(rounds):
+            total = await price()
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{mode:<8} queries/cart={statements / rounds:<6.1f} "
+        f"time/cart={elapsed / rounds * 1000:7.2f} ms total={total}"
+    )
+
+
+def run_compute(lines, rounds: int):
+    quantities = [quantity for _, quantity, _ in lines]
+    base_prices = [100.0 + i for i in range(len(lines))]
+    surcharges = [2.5] * len(lines)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        compute_totals(quantities, base_prices, surcharges, "percent", 10)
+    elapsed = time.perf_counter() - started
+    print(f"compute  time/cart={elapsed / rounds * 1_000_000:7.1f} us")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--discount", default=None)
+    args = parser.parse_args()
+
+    async with async_session_maker() as session:
+        lines = await sample_lines(session, args.lines)
+    print(f"cart lines={len(lines)}")
+
+    for mode in ("per-line", "batched"):
+        await run(mode, lines, args.rounds, args.discount)
+    run_compute(lines, args.rounds * 10)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
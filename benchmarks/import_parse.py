@@ -0,0 +1,107 @@
+"""
+Пам'ять і швидкість розбору файлів імпорту.
+
+Порівнює старий розбір (повний load_workbook + ProductImportRow на рядок)
+з потоковим читанням read_rows + пакетною валідацією для .xlsx, .csv
+та .ndjson. База даних не потрібна:
+
+    python -m benchmarks.import_parse --rows 10000 100000
+"""
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from openpyxl import Workbook, load_workbook
+
+from app.schemas.product import ProductImportRow
+from app.services.product_import import (
+    IMPORT_COLUMNS,
+    ProductImportService,
+    read_rows,
+)
+
+
+def make_rows(count: int):
+    for i in range(count):
+        yield (
+            f"SKU-{i}",
+            f"Product {i}",
+            "Lorem ipsum dolor sit amet, consectetur adipiscing elit",
+            1 + i % 20,
+            10.5 + i % 100,
+            i % 50,
+            f"https://example.com/images/{i}.jpg",
+        )
+
+
+def write_fixtures(directory: str, count: int) -> dict:
+    paths = {ext: os.path.join(directory, f"products-{count}{ext}") for ext in (".xlsx", ".csv", ".ndjson")}
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(IMPORT_COLUMNS)
+    for row in make_rows(count):
+        sheet.append(row)
+    workbook.save(paths[".xlsx"])
+
+    with open(paths[".csv"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(IMPORT_COLUMNS)
+        writer.writerows(make_rows(count))
+
+    with open(paths[".ndjson"], "w", encoding="utf-8") as f:
+        for row in make_rows(count):
+            f.write(json.dumps(dict(zip(IMPORT_COLUMNS, row))) + "\n")
+
+    return paths
+
+
+def legacy_parse(path: str) -> int:
+    sheet = load_workbook(filename=path).active
+    rows = [
+        ProductImportRow(**dict(zip(IMPORT_COLUMNS, row)))
+        for row in sheet.iter_rows(min_row=2, values_only=True)
+    ]
+    return len(rows)
+
+
+def streaming_parse(path: str) -> int:
+    with open(path, "rb") as file:
+        return len(ProductImportService.validate_rows(read_rows(file, path), 1000))
+
+
+def measure(name: str, parse, path: str, count: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    parsed = parse(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert parsed == count
+    size = os.path.getsize(path) / 2**20
+    print(
+        f"{name:<18} {count:>7} rows  file {size:6.1f} MiB  "
+        f"peak {peak / 2**20:7.1f} MiB  {elapsed:6.2f}s  {count / elapsed:>8.0f} rows/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.rows:
+            paths = write_fixtures(directory, count)
+            measure("legacy xlsx", legacy_parse, paths[".xlsx"], count)
+            for ext, path in paths.items():
+                measure(f"streaming {ext[1:]}", streaming_parse, path, count)
+
+
+if __name__ == "__main__":
+    main()
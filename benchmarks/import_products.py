@@ -0,0 +1,135 @@
+"""
+Порівняння старого (порядкового) та пакетного імпорту товарів.
+
+Запуск з кореня проєкту проти бази з .env:
+
+    python -m benchmarks.import_products --rows 5000 --chunk-size 1000
+
+Кожен прогін виконується в окремій транзакції, яка відкочується, тож
+база лишається незмінною. Половина рядків — нові товари, половина —
+оновлення щойно вставлених.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import event
+
+from app.db.db import async_session_maker, engine
+from app.models import Category
+from app.schemas.product import (
+    ProductCreate,
+    ProductImageCreate,
+    ProductImportRow,
+    ProductUpdate,
+)
+from app.services.product import ProductService
+from app.services.product_import import ProductImportService
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(*args):
+    global statements
+    statements += 1
+
+
+def make_rows(count: int, category_id: int) -> list[ProductImportRow]:
+    prefix = uuid.uuid4().hex[:8]
+    return [
+        ProductImportRow(
+            sku=f"{prefix}-{i}",
+            name=f"Bench product {prefix} {i}",
+            description="Benchmark row",
+            category_id=category_id,
+            base_price=10 + i % 100,
+            stock_quantity=i % 50,
+            image_url=f"https://example.com/{prefix}/{i}.jpg",
+        )
+        for i in range(count)
+    ]
+
+
+async def legacy_import(session, rows: list[ProductImportRow]) -> tuple[int, int]:
+    """Алгоритм, який використовувався в /products/import до пакетного імпорту."""
+    service = ProductService(session)
+    created_count = updated_count = 0
+    for row in rows:
+        existing = await service.get_product_by_sku(row.sku)
+        if existing:
+            await service.update_product(
+                existing.id,
+                ProductUpdate(
+                    name=row.name,
+                    description=row.description,
+                    sku=row.sku,
+                    category_id=row.category_id,
+                    base_price=row.base_price,
+                    stock_quantity=row.stock_quantity,
+                ),
+            )
+            updated_count += 1
+        else:
+            await service.create_product(
+                ProductCreate(
+                    name=row.name,
+                    description=row.description,
+                    sku=row.sku,
+                    category_id=row.category_id,
+                    base_price=row.base_price,
+                    stock_quantity=row.stock_quantity,
+                    images=(
+                        [ProductImageCreate(image_url=row.image_url, is_main=True)]
+                        if row.image_url
+                        else []
+                    ),
+                )
+            )
+            created_count += 1
+    return created_count, updated_count
+
+
+async def bulk_import(session, rows, chunk_size) -> tuple[int, int]:
+    return await ProductImportService(session, chunk_size).import_rows(rows)
+
+
+async def run(name, importer, rows_count, **kwargs):
+    global statements
+    async with async_session_maker() as session:
+        category = Category(name=f"bench-{uuid.uuid4().hex}", slug=uuid.uuid4().hex)
+        session.add(category)
+        await session.flush()
+
+        rows = make_rows(rows_count, category.id)
+        half = rows[: rows_count // 2]
+        # спершу створюємо половину, щоб другий прохід мав і оновлення
+        await importer(session, half, **kwargs)
+
+        statements = 0
+        started = time.perf_counter()
+        created, updated = await importer(session, rows, **kwargs)
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+
+    print(
+        f"{name:>7}: {rows_count} rows, created={created} updated={updated}, "
+        f"{statements} statements, {elapsed:.2f}s ({rows_count / elapsed:.0f} rows/s)"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    await run("legacy", legacy_import, args.rows)
+    await run("bulk", bulk_import, args.rows, chunk_size=args.chunk_size)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+Латентність /products під час «шторму» логінів.
+
+Скрипт працює проти запущеного сервера: частина клієнтів безперервно
+викликає /auth/login, а окремий клієнт вимірює час відповіді /products.
+Спершу запускається прогін без логінів як базова лінія.
+
+    python -m benchmarks.login_storm --base-url http://127.0.0.1:8000 \\
+        --email john.doe@example.com --password password1 --logins 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login_loop(client: httpx.AsyncClient, email: str, password: str, stop):
+    while not stop.is_set():
+        await client.post("/auth/login", json={"email": email, "password": password})
+
+
+async def sample_products(client: httpx.AsyncClient, duration: float) -> list[float]:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get("/products/", params={"limit": 10})
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<16} requests={len(latencies):<6} "
+        f"p50={quantiles[49]:7.1f} ms  p99={quantiles[98]:7.1f} ms"
+    )
+
+
+async def run(args, logins: int) -> list[float]:
+    limits = httpx.Limits(max_connections=logins + 1)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=30
+    ) as client:
+        stop = asyncio.Event()
+        workers = [
+            asyncio.create_task(login_loop(client, args.email, args.password, stop))
+            for _ in range(logins)
+        ]
+        latencies = await sample_products(client, args.duration)
+        stop.set()
+        await asyncio.gather(*workers)
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+
+    report("baseline", await run(args, 0))
+    report(f"{args.logins} logins", await run(args, args.logins))
+
+    async with httpx.AsyncClient(base_url=args.base_url) as client:
+        print("hasher:", (await client.get("/metrics")).json()["password_hasher"])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
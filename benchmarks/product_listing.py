@@ -0,0 +1,68 @@
+"""
+Сторінка каталогу: повні товари (ProductRead) проти карток (ProductCard).
+
+Запуск з кореня проєкту проти бази з .env:
+
+    python -m benchmarks.product_listing --pages 200 --limit 24
+
+Кеш оминається: кожна сторінка читається з БД, як при промаху. Для
+кожного режиму виводиться кількість SQL-запитів на сторінку, середній
+час (запит + валідація схеми) і розмір відповіді в JSON.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+
+from app.db.db import async_session_maker, engine
+from app.services.product import ProductService
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(*args):
+    global statements
+    statements += 1
+
+
+async def run(view: str, pages: int, limit: int, sort: str | None):
+    global statements
+    async with async_session_maker() as session:
+        service = ProductService(session)
+        load = (
+            service._load_product_cards if view == "card" else service._load_products
+        )
+        await load(0, limit, None, sort)  # прогрів з'єднання і кешу планів
+
+        statements, size = 0, 0
+        started = time.perf_counter()
+        for page in range(pages):
+            result = await load(page * limit, limit, None, sort)
+            size += len(result.model_dump_json())
+            # як у запиті: новий identity map для кожної сторінки
+            session.expunge_all()
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{view:<5} queries/page={statements / pages:<4.1f} "
+        f"time/page={elapsed / pages * 1000:7.2f} ms "
+        f"json/page={size / pages / 1024:7.1f} KiB"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=24)
+    parser.add_argument("--sort", default=None)
+    args = parser.parse_args()
+
+    for view in ("full", "card"):
+        await run(view, args.pages, args.limit, args.sort)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
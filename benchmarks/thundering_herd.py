@@ -0,0 +1,98 @@
+"""
+Кількість запитів до БД, коли популярний ключ кешу щойно зник.
+
+Запуск з кореня проєкту проти бази та Redis з .env:
+
+    python -m benchmarks.thundering_herd --concurrency 200
+
+Для першого товару і списку категорій ключ видаляється з кешу, після
+чого `--concurrency` «запитів» (кожен зі своєю сесією, як у FastAPI)
+одночасно читають його. Прогін «before» вимикає об'єднання промахів,
+«after» — поточна поведінка.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event, select
+
+from app.db.db import async_session_maker, engine
+from app.models import Product
+from app.services.category import CategoryService, category_cache
+from app.services.product import ProductService
+from app.services.product_cache import product_cache
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_statement(*args):
+    global statements
+    statements += 1
+
+
+class NoFlight:
+    """Поведінка до single-flight: кожен промах іде в БД."""
+
+    shared = 0
+
+    async def do(self, key, func):
+        return await func()
+
+
+async def request(call):
+    async with async_session_maker() as session:
+        return await call(session)
+
+
+async def herd(name: str, concurrency: int, evict, call):
+    global statements
+    await evict()
+    statements = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(request(call) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} queries={statements:<6} time={elapsed * 1000:8.1f} ms")
+
+
+async def run(label: str, concurrency: int, slug: str):
+    await herd(
+        f"{label} product by slug",
+        concurrency,
+        lambda: product_cache.entries.invalidate(
+            product_cache.detail_key("slug", slug)
+        ),
+        lambda session: ProductService(session).get_product_by_slug(slug),
+    )
+    await herd(
+        f"{label} all categories",
+        concurrency,
+        lambda: category_cache.invalidate("all"),
+        lambda session: CategoryService(session).get_all_categories(),
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    async with async_session_maker() as session:
+        slug = await session.scalar(select(Product.slug).order_by(Product.id).limit(1))
+    if slug is None:
+        raise SystemExit("No products in the database")
+
+    caches = [product_cache.entries, category_cache]
+    flights = [(cache.flight, cache.distributed_lock) for cache in caches]
+    for cache in caches:
+        cache.flight, cache.distributed_lock = NoFlight(), False
+    await run("before", args.concurrency, slug)
+
+    for cache, (flight, distributed_lock) in zip(caches, flights):
+        cache.flight, cache.distributed_lock = flight, distributed_lock
+    await run("after", args.concurrency, slug)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,323 @@
+import fnmatch
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+
+from app.db.cache import invalidation_bus
+
+
+class InMemoryPipeline:
+    """Черга команд, що виконуються підряд на `execute`, як MULTI/EXEC."""
+
+    def __init__(self, redis: "InMemoryRedis"):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class InMemoryRedis:
+    """Мінімальна заміна RedisService для юніт-тестів кешів і кошиків."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def keys(self, pattern):
+        return [key for key in self.data if fnmatch.fnmatchcase(key, pattern)]
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def set_nx(self, key, value, ttl):
+        if key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    async def exists(self, key):
+        return key in self.data
+
+    async def expire(self, key, ttl):
+        return key in self.data
+
+    async def renamenx(self, src, dst):
+        if dst in self.data:
+            return False
+        self.data[dst] = self.data.pop(src)
+        return True
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    async def hexists(self, key, field):
+        return field in self.data.get(key, {})
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        self.data.setdefault(key, {}).update(
+            {name: str(value) for name, value in fields.items()}
+        )
+        return len(fields)
+
+    async def hsetnx(self, key, field, value):
+        if field in self.data.get(key, {}):
+            return False
+        return bool(await self.hset(key, field, value))
+
+    async def hincrby(self, key, field, amount):
+        value = int(self.data.get(key, {}).get(field, 0)) + amount
+        await self.hset(key, field, value)
+        return value
+
+    async def hdel(self, key, *fields):
+        data = self.data.get(key, {})
+        return sum(data.pop(field, None) is not None for field in fields)
+
+    async def sadd(self, key, *members):
+        members = {str(member) for member in members}
+        added = members - self.data.setdefault(key, set())
+        self.data[key] |= members
+        return len(added)
+
+    async def spop(self, key, count):
+        members = self.data.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+    def pipeline(self):
+        return InMemoryPipeline(self)
+
+    async def publish(self, channel, message):
+        # доставка «всім воркерам» одразу, як це зробив би listener
+        invalidation_bus.dispatch(message)
+
+
+def build_service(cls, **repos):
+    """Сервіс без сесії БД: репозиторії й залежні сервіси задаються явно."""
+    service = cls.__new__(cls)
+    for name, repo in repos.items():
+        setattr(service, name, repo)
+    return service
+
+
+def product_row(product_id: int, name: str, base_price: float = 10.0, **fields):
+    """Рядок таблиці products для FakeProducts."""
+    return {
+        "id": product_id,
+        "name": name,
+        "slug": name.lower().replace(" ", "-"),
+        "category_id": 1,
+        "base_price": base_price,
+        "stock_quantity": 5,
+        "image_url": None,
+        "rating_sum": 0,
+        "rating_count": 0,
+        **fields,
+    }
+
+
+class FakeRepository:
+    """Таблиця в пам'яті; кожен виклик репозиторію — один запит."""
+
+    def __init__(self, rows: dict[int, dict] | None = None, session=None):
+        self.rows = rows if rows is not None else {}
+        self.session = session or SimpleNamespace(info={})
+        self.queries = 0
+
+    async def add_many(self, data_list):
+        if not data_list:
+            return []
+        self.queries += 1
+        result = []
+        for data in data_list:
+            row = {"id": max(self.rows, default=0) + 1, **data}
+            self.rows[row["id"]] = row
+            result.append(row)
+        return result
+
+    async def delete_for_products(self, product_ids):
+        self.queries += 1
+        for row_id, row in list(self.rows.items()):
+            if row["product_id"] in product_ids:
+                del self.rows[row_id]
+
+
+class FakeProducts(FakeRepository):
+    """
+    Товари в пам'яті з опціями й зображеннями, цінами для кошика і
+    знижками. `rows` не копіюється: тест може змінювати таблицю напряму.
+    """
+
+    def __init__(
+        self,
+        rows: dict[int, dict] | None = None,
+        option_prices: dict[tuple[str, str], float] | None = None,
+        discounts: dict[str, dict] | None = None,
+    ):
+        super().__init__(rows)
+        self.options = FakeRepository(session=self.session)
+        self.images = FakeRepository(session=self.session)
+        self.option_prices = option_prices or {}
+        self.discounts = discounts or {}
+
+    async def add_many(self, data_list):
+        now = datetime(2026, 1, 1)
+        return await super().add_many(
+            [{**data, "created_at": now, "updated_at": now} for data in data_list]
+        )
+
+    async def edit_many(self, items):
+        self.queries += 1
+        for item in items:
+            self.rows[item["id"]].update(item)
+        return [self.rows[item["id"]] for item in items]
+
+    async def find_existing_names(self, names):
+        self.queries += 1
+        return {row["name"] for row in self.rows.values()} & set(names)
+
+    async def find_slugs(self, bases, slug_field="slug"):
+        self.queries += 1
+        return {
+            row[slug_field]
+            for row in self.rows.values()
+            if any(
+                row[slug_field] == base or row[slug_field].startswith(f"{base}-")
+                for base in bases
+            )
+        }
+
+    async def find_refs(self, ids):
+        self.queries += 1
+        return {
+            row["id"]: (row["slug"], row["category_id"])
+            for row in self.rows.values()
+            if row["id"] in ids
+        }
+
+    async def find_products_by_ids(self, ids):
+        self.queries += 1
+        return [
+            SimpleNamespace(
+                **row,
+                options=[o for o in self.options.rows.values() if o["product_id"] == i],
+                images=[m for m in self.images.rows.values() if m["product_id"] == i],
+            )
+            for i, row in self.rows.items()
+            if i in ids
+        ]
+
+    async def find_product_cards(self, product_ids):
+        self.queries += 1
+        return [
+            SimpleNamespace(
+                **{
+                    name: row[name]
+                    for name in (
+                        "id",
+                        "name",
+                        "slug",
+                        "category_id",
+                        "base_price",
+                        "stock_quantity",
+                        "image_url",
+                    )
+                }
+            )
+            for product_id, row in self.rows.items()
+            if product_id in product_ids
+        ]
+
+    async def find_cart_prices(self, lines, discount_code=None):
+        self.queries += 1
+        discount = self.discounts.get(discount_code) if discount_code else None
+        return [
+            SimpleNamespace(
+                base_price=(
+                    self.rows[product_id]["base_price"]
+                    if product_id in self.rows
+                    else None
+                ),
+                surcharge=sum(
+                    self.option_prices.get(option, 0.0)
+                    for option in (options or {}).items()
+                ),
+                discount_id=discount and 1,
+                discount_type=discount and discount["discount_type"],
+                discount_value=discount and discount["value"],
+                is_active=discount and discount["is_active"],
+                valid_from=None,
+                valid_to=discount and discount.get("valid_to"),
+            )
+            for product_id, options in lines
+        ]
+
+    async def add_rating(self, product_id, rating_delta, count_delta):
+        self.queries += 1
+        row = self.rows.get(product_id)
+        if row is None:
+            return None
+        row["rating_sum"] += rating_delta
+        row["rating_count"] += count_delta
+        return SimpleNamespace(slug=row["slug"], category_id=row["category_id"])
+
+
+class RecordingSession:
+    """
+    AsyncSession без БД для справжніх репозиторіїв: кожен запит
+    компілюється діалектом PostgreSQL і записується в `statements` і
+    `params`, а результатом стає наступний список рядків з `results`.
+    """
+
+    def __init__(self, *results: list[dict]):
+        self.results = list(results)
+        self.statements: list[str] = []
+        self.params: list[dict] = []
+        self.info = {}
+
+    async def execute(self, stmt, params=None):
+        compiled = stmt.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"render_postcompile": True},
+        )
+        self.statements.append(str(compiled))
+        self.params.append(compiled.params)
+        rows = self.results.pop(0) if self.results else []
+        keys = list(rows[0]) if rows else [c.key for c in stmt.exported_columns]
+        result = IteratorResult(
+            SimpleResultMetaData(keys), iter([tuple(row.values()) for row in rows])
+        )
+        result.rowcount = len(rows)
+        return result
+
+    async def scalar(self, stmt, params=None):
+        return (await self.execute(stmt, params)).scalar()
+
+    async def rollback(self):
+        pass
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core.http import close_http_client
+from app.core.jwt import JWKSCache
+
+
+class StubAuth0:
+    def __init__(self):
+        self.keys = [{"kid": "k1", "kty": "RSA", "use": "sig", "n": "n", "e": "AQAB"}]
+        self.jwks_requests = 0
+        self.delay = 0.0
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.jwks_requests += 1
+                time.sleep(stub.delay)
+                body = json.dumps({"keys": stub.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+async def auth0():
+    stub = StubAuth0()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub.handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json"
+    yield stub
+    await close_http_client()
+    server.shutdown()
+
+
+async def test_jwks_is_cached_by_kid(auth0):
+    cache = JWKSCache(auth0.url, min_refresh_interval=0)
+
+    assert (await cache.get_key("k1"))["kid"] == "k1"
+    assert (await cache.get_key("k1"))["kid"] == "k1"
+    assert auth0.jwks_requests == 1
+
+    # ротація ключів: невідомий kid викликає позапланове оновлення
+    auth0.keys.append({**auth0.keys[0], "kid": "k2"})
+    assert (await cache.get_key("k2"))["kid"] == "k2"
+    assert auth0.jwks_requests == 2
+
+
+async def test_unknown_kid_refresh_is_rate_limited(auth0):
+    cache = JWKSCache(auth0.url, min_refresh_interval=60)
+
+    await cache.get_key("k1")
+    assert await cache.get_key("unknown") is None
+    assert await cache.get_key("unknown") is None
+    assert auth0.jwks_requests == 1
+
+
+async def test_concurrent_misses_fetch_jwks_once(auth0):
+    auth0.delay = 0.1
+    cache = JWKSCache(auth0.url)
+
+    keys = await asyncio.gather(*(cache.get_key("k1") for _ in range(10)))
+
+    assert all(key["kid"] == "k1" for key in keys)
+    assert auth0.jwks_requests == 1
+
+
+async def test_slow_auth0_does_not_block_event_loop(auth0):
+    auth0.delay = 0.5
+    cache = JWKSCache(auth0.url)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await cache.get_key("k1")
+    task.cancel()
+
+    assert ticks >= 20
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from app.db.cache import (
+    InvalidationBus,
+    LocalTTLCache,
+    SingleFlight,
+    TwoTierCache,
+    cached,
+    invalidation_bus,
+)
+from app.db.redis import RedisService
+from tests.fakes import InMemoryRedis
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalTTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_local_cache_expires_entries(monkeypatch):
+    cache = LocalTTLCache(max_entries=10, ttl=5)
+    cache.set("a", 1)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = InMemoryRedis()
+    monkeypatch.setattr(RedisService, "_instance", fake)
+    monkeypatch.setattr(invalidation_bus, "redis", fake)
+    return fake
+
+
+async def test_invalidation_drops_local_entries_in_all_workers(redis):
+    worker_a, worker_b = TwoTierCache("item"), TwoTierCache("item")
+
+    await worker_a.set(1, Item(id=1, name="old"))
+    assert (await worker_b.get(1, Item))[0].name == "old"
+
+    await worker_a.invalidate(1)
+
+    assert worker_b.local.get("1") is None
+    assert await worker_b.get(1, Item) == (None, False)
+
+
+async def test_load_overlapping_invalidation_is_not_cached(redis):
+    worker_a, worker_b = TwoTierCache("item"), TwoTierCache("item")
+
+    for invalidating in (worker_a, worker_b):
+
+        async def load():
+            # дані прочитано до commit, інвалідація — вже після нього
+            await invalidating.invalidate(1)
+            return Item(id=1, name="old")
+
+        assert (await worker_a.get_or_load(1, Item, load)).name == "old"
+        assert await worker_a.get(1, Item) == (None, False)
+
+    loaded = await worker_a.get_or_load(1, Item, lambda: _item("new"))
+    assert await worker_b.get(1, Item) == (loaded, False)
+
+
+async def _item(name: str) -> Item:
+    return Item(id=1, name=name)
+
+
+async def test_cached_decorator_uses_return_annotation(redis):
+    cache = TwoTierCache("item")
+    loads = 0
+
+    class Service:
+        @cached(cache, key=lambda self, item_id: f"id:{item_id}")
+        async def get_item(self, item_id: int) -> Item:
+            nonlocal loads
+            loads += 1
+            return Item(id=item_id, name="Phone")
+
+    # промах у локальному рівні, але влучання в Redis
+    assert await Service().get_item(1) == await Service().get_item(1)
+    cache.local.clear()
+    assert (await Service().get_item(1)).name == "Phone"
+
+    assert loads == 1
+    assert cache.stats()["redis_hits"] == 1
+
+
+async def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    results = await asyncio.gather(*(flight.do("key", load) for _ in range(10)))
+
+    assert results == [1] * 10
+    assert calls == 1
+    assert flight.shared == 9
+
+
+async def test_single_flight_shares_errors():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flight.do("key", load) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_single_flight_recovers_when_leader_is_cancelled():
+    flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    leader = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == 2
+
+
+async def test_concurrent_misses_load_once_across_workers(redis):
+    worker_a = TwoTierCache("item", distributed_lock=True)
+    worker_b = TwoTierCache("item", distributed_lock=True)
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.1)
+        return Item(id=1, name="Phone")
+
+    results = await asyncio.gather(
+        *(cache.get_or_load(1, Item, load) for cache in [worker_a, worker_b] * 5)
+    )
+
+    assert all(result.name == "Phone" for result in results)
+    assert loads == 1
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        for data in self.messages:
+            yield {"type": "message", "data": data}
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        pass
+
+
+async def test_listener_skips_bad_messages_and_keeps_running():
+    messages = [
+        "not json",
+        json.dumps({"ns": "item", "keys": 5}),
+        json.dumps({"ns": "item", "keys": ["1"]}),
+    ]
+    bus = InvalidationBus()
+    bus.redis = type("Redis", (), {"pubsub": lambda self: FakePubSub(messages)})()
+    dropped = []
+
+    class Worker:
+        def drop_local(self, keys):
+            for key in keys or []:
+                dropped.append(key)
+
+    worker = Worker()
+    bus.register("item", worker)
+    bus.start()
+    await asyncio.sleep(0.01)
+    await bus.stop()
+
+    # після зіпсованих повідомлень listener обробляє наступні
+    assert dropped == ["1"]
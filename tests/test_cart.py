@@ -0,0 +1,688 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.db.cache import invalidation_bus
+from app.db.db import async_session_maker, engine
+from app.db.redis import RedisService
+from app.schemas.cart import CartItemCreate, CartItemOperation, CartItemUpdate
+from app.services import cart as cart_module
+from app.services import cart_store as cart_store_module
+from app.services.cart import CartService, RedisCartService
+from app.services.cart_store import RedisCartStore
+from app.services.pricing import PricingService
+from app.services.product_cache import ProductCache
+from tests.fakes import (
+    FakeProducts,
+    InMemoryRedis,
+    RecordingSession,
+    build_service,
+    product_row,
+)
+
+PRODUCTS = {
+    1: product_row(1, "Chair", 10.0, image_url="chair.jpg"),
+    2: product_row(2, "Table", 25.0),
+    **{i: product_row(i, f"Item {i}", float(i)) for i in range(3, 41)},
+}
+OPTION_PRICES = {("color", "red"): 2.0, ("size", "L"): 1.5}
+DISCOUNTS = {
+    "SALE": {"discount_type": "percent", "value": 10.0, "is_active": True},
+    "OLD": {"discount_type": "fixed", "value": 5.0, "is_active": False},
+}
+
+
+class FakeStore:
+    """Кошики й позиції в пам'яті; кожен виклик репозиторію — один запит."""
+
+    def __init__(self):
+        self.queries = 0
+        self.carts: dict[int, int] = {}  # user_id -> cart_id
+        self.items: dict[int, dict] = {}
+
+    def item_in_cart(self, user_id, item_id):
+        item = self.items.get(item_id)
+        if item and item["cart_id"] == self.carts.get(user_id):
+            return item
+
+
+class FakeCarts:
+    def __init__(self, store: FakeStore):
+        self.store = store
+
+    async def add_one(self, data):
+        self.store.queries += 1
+        cart_id = len(self.store.carts) + 1
+        self.store.carts[data["user_id"]] = cart_id
+        return {"id": cart_id, **data}
+
+    async def find_cart_view(self, user_id):
+        self.store.queries += 1
+        if user_id not in self.store.carts:
+            return []
+        cart_id = self.store.carts[user_id]
+        items = [i for i in self.store.items.values() if i["cart_id"] == cart_id]
+        empty = dict.fromkeys(
+            (
+                "item_id",
+                "product_id",
+                "quantity",
+                "selected_options",
+                "name",
+                "price",
+                "image",
+            )
+        )
+        return [
+            SimpleNamespace(
+                cart_id=cart_id,
+                user_id=user_id,
+                **(
+                    {
+                        "item_id": item["id"],
+                        "product_id": item["product_id"],
+                        "quantity": item["quantity"],
+                        "selected_options": item["selected_options"],
+                        "name": PRODUCTS[item["product_id"]]["name"],
+                        "price": PRODUCTS[item["product_id"]]["base_price"],
+                        "image": PRODUCTS[item["product_id"]]["image_url"],
+                    }
+                    if item
+                    else empty
+                ),
+            )
+            for item in items or [None]
+        ]
+
+
+class FakeItems:
+    def __init__(self, store: FakeStore):
+        self.store = store
+
+    async def add_to_user_cart(self, user_id, product_id, quantity, options=None):
+        ids = await self.add_many_to_user_cart(
+            user_id, [(product_id, quantity, options)]
+        )
+        return ids[0] if ids else None
+
+    async def add_many_to_user_cart(self, user_id, items, replace=False):
+        self.store.queries += 1
+        cart_id = self.store.carts.get(user_id)
+        if cart_id is None:
+            return []
+        ids = []
+        for product_id, quantity, options in items:
+            item = next(
+                (
+                    i
+                    for i in self.store.items.values()
+                    if i["cart_id"] == cart_id and i["product_id"] == product_id
+                ),
+                None,
+            )
+            if item:
+                item["quantity"] = quantity if replace else item["quantity"] + quantity
+            else:
+                item = {
+                    "id": max(self.store.items, default=0) + 1,
+                    "cart_id": cart_id,
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "selected_options": options,
+                }
+                self.store.items[item["id"]] = item
+            ids.append(item["id"])
+        return ids
+
+    async def set_quantity_in_user_cart(self, user_id, item_id, quantity):
+        self.store.queries += 1
+        item = self.store.item_in_cart(user_id, item_id)
+        if item:
+            item["quantity"] = quantity
+            return item_id
+
+    async def delete_from_user_cart(self, user_id, item_id=None, product_ids=None):
+        self.store.queries += 1
+        cart_id = self.store.carts.get(user_id)
+        ids = [
+            i["id"]
+            for i in self.store.items.values()
+            if i["cart_id"] == cart_id
+            and item_id in (None, i["id"])
+            and (product_ids is None or i["product_id"] in product_ids)
+        ]
+        for i in ids:
+            del self.store.items[i]
+        return len(ids)
+
+    async def replace_in_carts(self, items):
+        self.store.queries += 1
+        for item_id, item in list(self.store.items.items()):
+            if item["cart_id"] in items:
+                del self.store.items[item_id]
+        written = 0
+        for cart_id, cart_items in items.items():
+            for item in cart_items:
+                if item["product_id"] not in PRODUCTS:
+                    continue
+                item_id = max(self.store.items, default=0) + 1
+                self.store.items[item_id] = {"id": item_id, "cart_id": cart_id, **item}
+                written += 1
+        return written
+
+
+def make_products() -> FakeProducts:
+    return FakeProducts(PRODUCTS, OPTION_PRICES, DISCOUNTS)
+
+
+def make_pricing() -> PricingService:
+    return build_service(PricingService, product_repo=make_products())
+
+
+def make_service():
+    store = FakeStore()
+    service = build_service(
+        CartService,
+        cart_repo=FakeCarts(store),
+        cart_item_repo=FakeItems(store),
+        pricing=make_pricing(),
+    )
+    return service, store
+
+
+async def test_cart_mutations_return_updated_cart():
+    service, _ = make_service()
+    await service.get_cart(7)
+
+    cart = await service.add_item_to_cart(7, CartItemCreate(product_id=1, quantity=1))
+    cart = await service.add_item_to_cart(7, CartItemCreate(product_id=1, quantity=2))
+    cart = await service.add_item_to_cart(7, CartItemCreate(product_id=2, quantity=1))
+    assert [(i.product_id, i.quantity) for i in cart.items] == [(1, 3), (2, 1)]
+    assert (cart.items[0].name, cart.items[0].price, cart.items[0].image) == (
+        "Chair",
+        10.0,
+        "chair.jpg",
+    )
+
+    cart = await service.update_item_in_cart(
+        7, cart.items[0].id, CartItemUpdate(quantity=5)
+    )
+    cart = await service.delete_item_from_cart(7, cart.items[1].id)
+    assert [(i.product_id, i.quantity) for i in cart.items] == [(1, 5)]
+
+    cart = await service.clear_cart(7)
+    assert cart.items == []
+
+
+async def test_first_add_creates_cart():
+    service, _ = make_service()
+
+    cart = await service.add_item_to_cart(3, CartItemCreate(product_id=2, quantity=1))
+
+    assert cart.user_id == 3 and len(cart.items) == 1
+
+
+SEED = [
+    "INSERT INTO categories (name, slug) VALUES (:tag, :tag)",
+    """
+    INSERT INTO products (name, slug, sku, category_id, base_price, stock_quantity)
+    SELECT :tag || '-' || g, :tag || '-' || g, :tag || '-' || g, c.id, 10, 100
+    FROM generate_series(1, 30) g, categories c
+    WHERE c.slug = :tag
+    """,
+]
+
+CREATE_USER = """
+INSERT INTO users (first_name, last_name, email, hashed_password, role, is_active)
+VALUES ('Cart', 'Test', :tag || '@example.com', '-', CAST('customer' AS role), true)
+RETURNING id
+"""
+
+
+@pytest.fixture
+async def cart_db():
+    """Користувач і 30 товарів у БД; усе відкочується після тесту."""
+    async with async_session_maker() as session:
+        try:
+            await session.connection()
+        except (OSError, SQLAlchemyError) as e:
+            pytest.skip(f"PostgreSQL unavailable: {e}")
+        params = {"tag": f"cart-test-{uuid.uuid4().hex[:8]}"}
+        for statement in SEED:
+            await session.execute(text(statement), params)
+        user_id = await session.scalar(text(CREATE_USER), params)
+        product_ids = (
+            await session.scalars(
+                text("SELECT id FROM products WHERE sku LIKE :tag || '-%' ORDER BY id"),
+                params,
+            )
+        ).all()
+        yield CartService(session), user_id, product_ids
+        await session.rollback()
+
+
+@pytest.fixture
+def statements():
+    """SQL-запити, виконані через engine, поки триває тест."""
+    executed = []
+
+    def count(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+async def test_each_cart_mutation_takes_three_statements(cart_db, statements):
+    service, user_id, products = cart_db
+
+    # кошика ще нема: запис, створення кошика, повторний запис, читання, ціни
+    cart = await service.add_item_to_cart(
+        user_id, CartItemCreate(product_id=products[0], quantity=1)
+    )
+    assert len(statements) == 5
+
+    # запис, читання кошика, ціни
+    statements.clear()
+    await service.add_item_to_cart(
+        user_id, CartItemCreate(product_id=products[0], quantity=2)
+    )
+    cart = await service.add_item_to_cart(
+        user_id, CartItemCreate(product_id=products[1], quantity=1)
+    )
+    cart = await service.update_item_in_cart(
+        user_id, cart.items[0].id, CartItemUpdate(quantity=5)
+    )
+    cart = await service.delete_item_from_cart(user_id, cart.items[1].id)
+    assert len(statements) == 12
+    assert [(i.product_id, i.quantity) for i in cart.items] == [(products[0], 5)]
+
+    statements.clear()
+    cart = await service.clear_cart(user_id)
+    # порожній кошик не потребує запиту цін
+    assert len(statements) == 2
+    assert cart.items == []
+
+
+def view_row(item_id, product_id, quantity):
+    """Рядок CartRepository.find_cart_view для кошика 1 користувача 7."""
+    product = PRODUCTS[product_id]
+    return {
+        "cart_id": 1,
+        "user_id": 7,
+        "item_id": item_id,
+        "product_id": product_id,
+        "quantity": quantity,
+        "selected_options": None,
+        "name": product["name"],
+        "price": product["base_price"],
+        "image": product["image_url"],
+    }
+
+
+def price_row(line, product_id):
+    """Рядок ProductRepository.find_cart_prices без опцій і знижки."""
+    return {
+        "line": line,
+        "base_price": PRODUCTS[product_id]["base_price"],
+        "surcharge": 0.0,
+        **dict.fromkeys(
+            (
+                "discount_id",
+                "discount_type",
+                "discount_value",
+                "is_active",
+                "valid_from",
+                "valid_to",
+            )
+        ),
+    }
+
+
+async def test_cart_mutation_is_one_upsert_and_one_read():
+    session = RecordingSession(
+        # кошика ще нема: upsert нічого не пише, кошик створюється
+        [],
+        [{"id": 1, "user_id": 7}],
+        [{"id": 5}],
+        [view_row(5, 1, 1)],
+        [price_row(0, 1)],
+        # кошик є
+        [{"id": 5}],
+        [view_row(5, 1, 3)],
+        [price_row(0, 1)],
+    )
+    service = CartService(session)
+
+    await service.add_item_to_cart(7, CartItemCreate(product_id=1, quantity=1))
+    assert len(session.statements) == 5
+    assert session.statements[1].startswith("INSERT INTO carts")
+
+    session.statements.clear()
+    cart = await service.add_item_to_cart(7, CartItemCreate(product_id=1, quantity=2))
+
+    upsert, view, prices = session.statements
+    assert upsert.startswith("INSERT INTO cart_items")
+    assert (
+        "ON CONFLICT (cart_id, product_id) DO UPDATE "
+        "SET quantity = (cart_items.quantity + excluded.quantity)"
+    ) in upsert
+    assert view.startswith("SELECT carts.id AS cart_id")
+    assert "LEFT OUTER JOIN LATERAL" in view
+    assert prices.startswith("SELECT lines.line")
+    assert [(i.product_id, i.quantity, i.name) for i in cart.items] == [
+        (1, 3, "Chair")
+    ]
+    assert cart.total == 30.0
+
+
+async def test_foreign_item_is_not_found():
+    service, _ = make_service()
+    cart = await service.add_item_to_cart(1, CartItemCreate(product_id=1, quantity=1))
+    await service.get_cart(2)
+
+    with pytest.raises(NotFoundException):
+        await service.delete_item_from_cart(2, cart.items[0].id)
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def redis_cart(monkeypatch):
+    """RedisCartService поверх Redis у пам'яті; `db` — таблиці кошиків у БД."""
+    redis, db = InMemoryRedis(), FakeStore()
+    monkeypatch.setattr(RedisService, "_instance", redis)
+    monkeypatch.setattr(invalidation_bus, "redis", redis)
+    monkeypatch.setattr(cart_module, "product_cache", ProductCache())
+    monkeypatch.setattr(cart_store_module, "CartRepository", lambda s: FakeCarts(db))
+    monkeypatch.setattr(
+        cart_store_module, "CartItemRepository", lambda s: FakeItems(db)
+    )
+    service = build_service(
+        RedisCartService,
+        store=RedisCartStore(session_factory=FakeSession),
+        product_repo=make_products(),
+        pricing=make_pricing(),
+    )
+    return service, db
+
+
+def snapshot(cart):
+    # порядок позицій у Redis — за product_id, у БД — за часом додавання
+    return sorted(
+        (i.product_id, i.quantity, i.selected_options, i.name, i.price, i.image)
+        for i in cart.items
+    )
+
+
+async def test_redis_cart_matches_sql_cart(redis_cart):
+    redis_service, db = redis_cart
+    sql_service, sql = make_service()
+    red = {"color": "red"}
+    steps = [
+        ("add", 1, 2, red),
+        ("add", 2, 1, None),
+        ("add", 1, 3, {"color": "blue"}),
+        ("set", 2, 4),
+        ("delete", 1),
+        ("add", 1, 1, None),
+        ("clear",),
+        ("add", 2, 2, red),
+    ]
+
+    for op, *args in steps:
+        results = []
+        for service, item_id in ((sql_service, sql_ids), (redis_service, redis_ids)):
+            if op == "add":
+                product_id, quantity, options = args
+                item = CartItemCreate(
+                    product_id=product_id, quantity=quantity, selected_options=options
+                )
+                cart = await service.add_item_to_cart(7, item)
+            elif op == "set":
+                update = CartItemUpdate(quantity=args[1])
+                cart = await service.update_item_in_cart(
+                    7, await item_id(service, args[0]), update
+                )
+            elif op == "delete":
+                cart = await service.delete_item_from_cart(
+                    7, await item_id(service, args[0])
+                )
+            else:
+                cart = await service.clear_cart(7)
+            results.append(snapshot(cart))
+        assert results[0] == results[1], (op, args)
+
+    # до запису в БД там лише кошик, створений при першому зверненні
+    assert db.items == {}
+    assert await redis_service.store.flush() == 1
+    assert rows(db) == rows(sql) == [(2, 2, red)]
+    assert await redis_service.store.flush() == 0
+
+
+async def sql_ids(service, product_id):
+    cart = await service.get_cart(7)
+    return next(i.id for i in cart.items if i.product_id == product_id)
+
+
+async def redis_ids(service, product_id):
+    return product_id
+
+
+def rows(store):
+    return sorted(
+        (i["product_id"], i["quantity"], i["selected_options"])
+        for i in store.items.values()
+    )
+
+
+async def test_redis_cart_loads_from_db_and_caches_cards(redis_cart):
+    service, db = redis_cart
+    db.carts[7] = 1
+    await FakeItems(db).add_to_user_cart(7, 2, 3)
+    db.queries = 0
+
+    first = await service.get_cart(7)
+    second = await service.add_item_to_cart(7, CartItemCreate(product_id=1, quantity=1))
+    await service.get_cart(7)
+
+    assert snapshot(first) == [(2, 3, None, "Table", 25.0, None)]
+    assert [(i.id, i.quantity) for i in second.items] == [(1, 1), (2, 3)]
+    # один запит завантаження кошика, картки — по разу на товар
+    assert db.queries == 1
+    assert service.product_repo.queries == 2
+
+    with pytest.raises(NotFoundException):
+        await service.add_item_to_cart(7, CartItemCreate(product_id=99, quantity=1))
+    with pytest.raises(NotFoundException):
+        await service.delete_item_from_cart(7, 99)
+
+
+async def test_failed_flush_keeps_cart_dirty(redis_cart, monkeypatch):
+    service, db = redis_cart
+    await service.add_item_to_cart(7, CartItemCreate(product_id=1, quantity=1))
+
+    class BrokenItems(FakeItems):
+        async def replace_in_carts(self, items):
+            raise RuntimeError("database is down")
+
+    monkeypatch.setattr(
+        cart_store_module, "CartItemRepository", lambda s: BrokenItems(db)
+    )
+    with pytest.raises(RuntimeError):
+        await service.store.flush()
+    assert db.items == {}
+
+    monkeypatch.setattr(
+        cart_store_module, "CartItemRepository", lambda s: FakeItems(db)
+    )
+    await service.store.flush()
+    assert rows(db) == [(1, 1, None)]
+
+
+async def test_flush_skips_items_of_deleted_products(redis_cart, monkeypatch):
+    service, db = redis_cart
+    await service.add_item_to_cart(7, CartItemCreate(product_id=1, quantity=1))
+    await service.add_item_to_cart(8, CartItemCreate(product_id=2, quantity=2))
+    monkeypatch.delitem(PRODUCTS, 2)
+
+    await service.store.flush()
+
+    assert rows(db) == [(1, 1, None)]
+    assert await service.store.redis.spop(service.store.dirty_key, 10) == []
+
+
+def op(kind, product_id, quantity=1, options=None):
+    return CartItemOperation(
+        op=kind, product_id=product_id, quantity=quantity, selected_options=options
+    )
+
+
+async def test_batch_sync_takes_constant_statements(cart_db, statements):
+    service, user_id, products = cart_db
+    for product_id in products[:10]:
+        await service.add_item_to_cart(
+            user_id, CartItemCreate(product_id=product_id, quantity=1)
+        )
+    statements.clear()
+
+    cart = await service.update_items(
+        user_id,
+        [op("set", i, 2) for i in products[:5]]
+        + [op("remove", i) for i in products[5:10]]
+        + [op("add", i, 3) for i in products[10:]],
+    )
+
+    # DELETE, INSERT ... ON CONFLICT для add і для set, читання кошика, ціни
+    assert len(statements) == 5
+    assert sorted((i.product_id, i.quantity) for i in cart.items) == [
+        *((i, 2) for i in products[:5]),
+        *((i, 3) for i in products[10:]),
+    ]
+
+
+async def test_batch_sync_sends_one_statement_per_kind():
+    session = RecordingSession(
+        [], [{"id": 1}], [{"id": 2}], [view_row(1, 11, 3)], [price_row(0, 11)]
+    )
+
+    await CartService(session).update_items(
+        7,
+        [op("set", i, 2) for i in range(1, 6)]
+        + [op("remove", i) for i in range(6, 11)]
+        + [op("add", i, 3) for i in range(11, 31)],
+    )
+
+    delete, add, replace, view, prices = session.statements
+    assert delete.startswith("DELETE FROM cart_items")
+    assert list(session.params[0].values()) == [7, *range(6, 11)]
+    # user_id і LIMIT 1 підзапиту кошика, далі пари (product_id, quantity)
+    assert "quantity = (cart_items.quantity + excluded.quantity)" in add
+    assert list(session.params[1].values())[2:] == [
+        v for i in range(11, 31) for v in (i, 3)
+    ]
+    assert "quantity = excluded.quantity" in replace
+    assert list(session.params[2].values())[2:] == [
+        v for i in range(1, 6) for v in (i, 2)
+    ]
+    assert view.startswith("SELECT") and prices.startswith("SELECT")
+
+
+BATCH = [
+    op("add", 1, 2, {"color": "red"}),
+    op("add", 1, 1, {"color": "blue"}),
+    op("set", 2, 5),
+    op("add", 2, 1),
+    op("add", 3, 1),
+    op("remove", 3),
+    op("remove", 4),
+    op("set", 4, 2, {"size": "L"}),
+    op("add", 4, 1),
+]
+
+
+async def test_batch_equals_operations_applied_one_by_one():
+    batch, batch_store = make_service()
+    single, _ = make_service()
+    for service in (batch, single):
+        await service.add_item_to_cart(7, CartItemCreate(product_id=2, quantity=9))
+        await service.add_item_to_cart(
+            7, CartItemCreate(product_id=4, quantity=9, selected_options={"a": 1})
+        )
+
+    batched = await batch.update_items(7, BATCH)
+    for item in BATCH:
+        cart = await single.get_cart(7)
+        ids = {i.product_id: i.id for i in cart.items}
+        if item.op == "remove":
+            await single.delete_item_from_cart(7, ids[item.product_id])
+        elif item.op == "set" and item.product_id in ids:
+            await single.update_item_in_cart(
+                7, ids[item.product_id], CartItemUpdate(quantity=item.quantity)
+            )
+        else:
+            create = CartItemCreate(**item.model_dump(exclude={"op"}))
+            await single.add_item_to_cart(7, create)
+
+    expected = await single.get_cart(7)
+    assert snapshot(batched) == snapshot(expected)
+    assert snapshot(batched)[0][:3] == (1, 3, {"color": "red"})
+
+
+async def test_redis_batch_matches_sql_batch(redis_cart):
+    redis_service, _ = redis_cart
+    sql_service, _ = make_service()
+    for service in (sql_service, redis_service):
+        await service.add_item_to_cart(7, CartItemCreate(product_id=2, quantity=9))
+        await service.add_item_to_cart(
+            7, CartItemCreate(product_id=4, quantity=9, selected_options={"a": 1})
+        )
+
+    assert snapshot(await redis_service.update_items(7, BATCH)) == snapshot(
+        await sql_service.update_items(7, BATCH)
+    )
+    with pytest.raises(NotFoundException):
+        await redis_service.update_items(7, [op("add", 99)])
+
+
+@pytest.mark.parametrize("storage", ["sql", "redis"])
+async def test_cart_is_priced_with_options_and_discount(storage, redis_cart):
+    service = redis_cart[0] if storage == "redis" else make_service()[0]
+    await service.update_items(
+        7,
+        [
+            op("add", 1, 2, {"color": "red", "size": "L"}),
+            op("add", 2, 1, {"color": "green"}),
+        ],
+    )
+
+    cart = await service.get_cart(7, "SALE")
+
+    assert [(i.unit_price, i.line_total) for i in sorted_items(cart)] == [
+        (13.5, 27.0),
+        (25.0, 25.0),
+    ]
+    assert (cart.subtotal, cart.discount, cart.total) == (52.0, 5.2, 46.8)
+    assert cart.discount_code == "SALE"
+    with pytest.raises(BadRequestException):
+        await service.get_cart(7, "OLD")
+    with pytest.raises(NotFoundException):
+        await service.get_cart(7, "NOPE")
+
+
+def sorted_items(cart):
+    return sorted(cart.items, key=lambda i: i.product_id)
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+from app.services.category_tree import CategoryTree, category_tree
+from app.services.product import ProductService
+from tests.fakes import build_service
+
+ROWS = [
+    (1, "electronics", None),
+    (2, "phones", 1),
+    (3, "android", 2),
+    (4, "laptops", 1),
+    (5, "books", None),
+    (6, "iphone", 2),
+]
+
+
+def test_slug_lookup():
+    tree = CategoryTree(ROWS)
+
+    assert tree.id_by_slug("android") == 3
+    assert tree.id_by_slug("missing") is None
+
+
+def test_descendants_include_whole_subtree():
+    tree = CategoryTree(ROWS)
+
+    assert sorted(tree.descendants(1)) == [1, 2, 3, 4, 6]
+    assert sorted(tree.descendants(2)) == [2, 3, 6]
+    assert tree.descendants(3) == [3]
+    assert tree.descendants(5) == [5]
+
+
+def test_ancestors_go_up_to_root():
+    tree = CategoryTree(ROWS)
+
+    assert tree.ancestors(3) == [3, 2, 1]
+    assert tree.ancestors(5) == [5]
+    assert tree.ancestors(42) == []
+
+
+def test_cycles_and_orphans_do_not_break_the_index():
+    tree = CategoryTree([(1, "a", 2), (2, "b", 1), (3, "c", 99), (4, "d", 4)])
+
+    assert len(tree) == 4
+    assert sorted(tree.descendants(3)) == [3]
+    assert tree.descendants(4) == [4]
+    # цикл розривається на першому вузлі
+    assert tree.descendants(1) == [1, 2]
+    assert tree.descendants(2) == [2]
+    assert len(tree.ancestors(1)) <= len(tree) + 1
+
+
+class FakeCategories:
+    async def find_one(self, slug):
+        return SimpleNamespace(id=9) if slug == "new" else None
+
+
+async def test_category_missing_from_tree_falls_back_to_db(monkeypatch):
+    async def refresh():
+        pass
+
+    monkeypatch.setattr(category_tree, "tree", CategoryTree(ROWS))
+    monkeypatch.setattr(category_tree, "refresh", refresh)
+    service = build_service(ProductService, category_repo=FakeCategories())
+
+    filters = {"category": "new"}
+    assert await service._prepare_filters(filters) == 9
+    assert filters == {"category_ids": [9]}
@@ -0,0 +1,272 @@
+import asyncio
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.exceptions import ConflictException
+from app.repositories.product import ProductRepository
+from app.services.order import OrderService
+from app.services.pricing import compute_totals
+from tests.fakes import RecordingSession, build_service
+
+STOCK = {1: ("chair", 10, 3), 2: ("table", 10, 1)}  # id -> (slug, category, stock)
+
+
+class FakeCheckout:
+    """Кошик, склад і замовлення в пам'яті для OrderService."""
+
+    def __init__(self, items):
+        self.session = SimpleNamespace(info={})
+        self.items = [
+            SimpleNamespace(product_id=i, quantity=quantity, selected_options=None)
+            for i, quantity in items
+        ]
+        self.stock = {product_id: row[2] for product_id, row in STOCK.items()}
+        self.orders = []
+
+    async def find_one_cart(self, user_id):
+        return SimpleNamespace(id=1)
+
+    async def find_all(self, cart_id):
+        return self.items
+
+    async def delete_all(self, cart_id):
+        self.items = []
+
+    async def price_cart(self, lines, discount_code=None):
+        quantities = [quantity for _, quantity, _ in lines]
+        return compute_totals(quantities, [10.0] * len(lines), [0.0] * len(lines))
+
+    async def reserve_stock(self, quantities):
+        reserved = [
+            product_id
+            for product_id, quantity in quantities.items()
+            if self.stock.get(product_id, 0) >= quantity
+        ]
+        for product_id in reserved:
+            self.stock[product_id] -= quantities[product_id]
+        return [
+            SimpleNamespace(id=i, slug=STOCK[i][0], category_id=STOCK[i][1])
+            for i in reserved
+        ]
+
+    async def add_one(self, data):
+        now = datetime.utcnow()
+        order = {"id": len(self.orders) + 1, "created_at": now, "updated_at": now}
+        self.orders.append({**order, **data})
+        return self.orders[-1]
+
+    async def add_many(self, data_list):
+        return [{"id": i, **data} for i, data in enumerate(data_list, 1)]
+
+
+def make_service(checkout: FakeCheckout) -> OrderService:
+    # один фейк замінює всі репозиторії й ціноутворення
+    return build_service(
+        OrderService,
+        **dict.fromkeys(
+            (
+                "order_repo",
+                "order_item_repo",
+                "cart_repo",
+                "cart_item_repo",
+                "product_repo",
+                "pricing",
+            ),
+            checkout,
+        ),
+    )
+
+
+async def test_checkout_reserves_stock_of_every_line():
+    checkout = FakeCheckout([(1, 2), (2, 1)])
+
+    order = await make_service(checkout).create_order_from_cart(1, 1)
+
+    assert [item.quantity for item in order.items] == [2, 1]
+    assert order.total_price == 30.0
+    assert checkout.stock == {1: 1, 2: 0}
+    assert checkout.items == []
+    # картки й деталі товарів скидаються після commit
+    assert len(checkout.session.info["after_commit"]) == 1
+
+
+async def test_checkout_fails_cleanly_on_shortage():
+    checkout = FakeCheckout([(1, 1), (2, 2)])
+
+    with pytest.raises(ConflictException) as exc:
+        await make_service(checkout).create_order_from_cart(1, 1)
+
+    assert "[2]" in exc.value.detail
+    assert checkout.orders == []
+    assert len(checkout.items) == 2
+    assert "after_commit" not in checkout.session.info
+
+
+async def test_stock_is_locked_in_id_order_and_reserved_by_one_update():
+    session = RecordingSession(
+        [],
+        [
+            {"id": 1, "slug": "chair", "category_id": 10},
+            {"id": 3, "slug": "lamp", "category_id": 10},
+        ],
+    )
+
+    reserved = await ProductRepository(session).reserve_stock({3: 1, 1: 2, 2: 5})
+
+    lock, update = session.statements
+    assert lock.endswith("ORDER BY products.id FOR UPDATE")
+    assert list(session.params[0].values()) == [1, 2, 3]
+    assert update.startswith(
+        "UPDATE products SET stock_quantity=(products.stock_quantity - lines.quantity)"
+    )
+    assert "products.stock_quantity >= lines.quantity" in update
+    assert list(session.params[1].values()) == [1, 2, 2, 5, 3, 1]
+    # товару 2 не вистачило: його немає серед повернутих рядків
+    assert [row.id for row in reserved] == [1, 3]
+
+
+CHECKOUTS = 200
+STRESS_STOCK = 50
+
+SEED = [
+    "INSERT INTO categories (name, slug) VALUES (:tag, :tag)",
+    """
+    INSERT INTO products (name, slug, sku, category_id, base_price, stock_quantity)
+    SELECT p.sku, p.sku, p.sku, c.id, 10, p.stock
+    FROM categories c,
+         (VALUES (:a, CAST(:stock AS integer)), (:b, CAST(:checkouts AS integer)))
+         AS p (sku, stock)
+    WHERE c.slug = :tag
+    """,
+    """
+    INSERT INTO users (first_name, last_name, email, hashed_password, role, is_active)
+    SELECT 'Stock', 'Test', CAST(:tag AS text) || '-' || n || '@example.com', '-',
+           CAST('customer' AS role), true
+    FROM generate_series(1, :checkouts) AS n
+    """,
+    """
+    INSERT INTO addresses (user_id, country, city, street, postal_code, is_default)
+    SELECT id, 'UA', 'Kyiv', 'Test', '01001', true FROM users WHERE email LIKE :like
+    """,
+    "INSERT INTO carts (user_id) SELECT id FROM users WHERE email LIKE :like",
+    # у половини кошиків товари додано у зворотному порядку
+    """
+    INSERT INTO cart_items (cart_id, product_id, quantity)
+    SELECT c.id, p.id, 1
+    FROM carts c JOIN users u ON u.id = c.user_id, products p
+    WHERE u.email LIKE :like AND p.sku LIKE :like
+    ORDER BY c.id, CASE WHEN c.id % 2 = 0 THEN p.id ELSE -p.id END
+    """,
+]
+
+CLEANUP = [
+    """
+    DELETE FROM order_items WHERE order_id IN (
+        SELECT o.id FROM orders o JOIN users u ON u.id = o.user_id
+        WHERE u.email LIKE :like
+    )
+    """,
+    "DELETE FROM orders WHERE user_id IN "
+    "(SELECT id FROM users WHERE email LIKE :like)",
+    "DELETE FROM cart_items WHERE cart_id IN (SELECT c.id FROM carts c "
+    "JOIN users u ON u.id = c.user_id WHERE u.email LIKE :like)",
+    "DELETE FROM carts WHERE user_id IN "
+    "(SELECT id FROM users WHERE email LIKE :like)",
+    "DELETE FROM addresses WHERE user_id IN "
+    "(SELECT id FROM users WHERE email LIKE :like)",
+    "DELETE FROM users WHERE email LIKE :like",
+    "DELETE FROM products WHERE sku LIKE :like",
+    "DELETE FROM categories WHERE slug = :tag",
+]
+
+
+async def test_concurrent_checkouts_never_oversell():
+    engine = create_async_engine(
+        settings.postgres.DATABASE_URL, pool_size=20, max_overflow=0, pool_timeout=120
+    )
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    tag = f"stock-test-{uuid.uuid4().hex[:8]}"
+    params = {
+        "tag": tag,
+        "like": f"{tag}-%",
+        "a": f"{tag}-a",
+        "b": f"{tag}-b",
+        "stock": STRESS_STOCK,
+        "checkouts": CHECKOUTS,
+    }
+    try:
+        async with session_maker() as session:
+            try:
+                await session.connection()
+            except (OSError, SQLAlchemyError) as e:
+                pytest.skip(f"PostgreSQL unavailable: {e}")
+            for statement in SEED:
+                await session.execute(text(statement), params)
+            addresses = (
+                await session.execute(
+                    text(
+                        "SELECT user_id, id FROM addresses "
+                        "WHERE user_id IN "
+                        "(SELECT id FROM users WHERE email LIKE :like)"
+                    ),
+                    params,
+                )
+            ).all()
+            await session.commit()
+
+        async def checkout(user_id: int, address_id: int) -> bool:
+            async with session_maker() as session:
+                try:
+                    await OrderService(session).create_order_from_cart(
+                        user_id, address_id
+                    )
+                    await session.commit()
+                    return True
+                except ConflictException:
+                    await session.rollback()
+                    return False
+
+        # кожне замовлення — у власній транзакції; усі стартують одночасно
+        results = await asyncio.gather(
+            *(checkout(user_id, address_id) for user_id, address_id in addresses)
+        )
+
+        async with session_maker() as session:
+            stock = dict(
+                (
+                    await session.execute(
+                        text(
+                            "SELECT sku, stock_quantity FROM products "
+                            "WHERE sku LIKE :like"
+                        ),
+                        params,
+                    )
+                ).all()
+            )
+            orders = await session.scalar(
+                text(
+                    "SELECT count(*) FROM orders o JOIN users u ON u.id = o.user_id "
+                    "WHERE u.email LIKE :like"
+                ),
+                params,
+            )
+    finally:
+        try:
+            async with session_maker() as session:
+                for statement in CLEANUP:
+                    await session.execute(text(statement), params)
+                await session.commit()
+        except (OSError, SQLAlchemyError):
+            pass
+        await engine.dispose()
+
+    assert sum(results) == orders == STRESS_STOCK
+    assert stock == {params["a"]: 0, params["b"]: CHECKOUTS - STRESS_STOCK}
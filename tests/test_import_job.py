@@ -0,0 +1,119 @@
+import asyncio
+import io
+import os
+from datetime import datetime, UTC
+
+from starlette.datastructures import UploadFile
+
+from app.core.config import settings
+from app.db.redis import RedisService
+from app.schemas.import_job import ImportJobRead, ImportJobStatus
+from app.services import import_job as import_job_module
+from app.services.import_job import ImportJobService
+from app.services.product_import import ProductImportService
+from tests.fakes import InMemoryRedis
+
+HEADER = "sku,name,description,category_id,base_price,stock_quantity,image_url\n"
+
+
+class FakeImport(ProductImportService):
+    """Імпорт без БД: запам'ятовує SKU записаних чанків."""
+
+    chunks: list[list[str]] = []
+
+    def __init__(self, session):
+        pass
+
+    async def import_chunk(self, rows):
+        self.chunks.append([row.sku for row in rows])
+        return len(rows), 0
+
+
+class FakeSession:
+    info = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def commit(self):
+        pass
+
+
+def make_service(monkeypatch, tmp_path) -> ImportJobService:
+    monkeypatch.setattr(RedisService, "_instance", InMemoryRedis())
+    monkeypatch.setattr(settings.app, "IMPORT_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings.app, "IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(import_job_module, "ProductImportService", FakeImport)
+    monkeypatch.setattr(FakeImport, "chunks", [])
+    return ImportJobService(session_factory=FakeSession)
+
+
+async def finish(service: ImportJobService, job_id: str) -> ImportJobRead:
+    await asyncio.gather(*import_job_module._tasks)
+    return await service.get_job(job_id)
+
+
+async def test_chunks_before_an_invalid_row_are_imported(monkeypatch, tmp_path):
+    service = make_service(monkeypatch, tmp_path)
+    rows = [f"A-{i},Chair {i},,1,10,5,\n" for i in range(1, 4)]
+    content = HEADER + "".join(rows) + "A-4,Chair 4,,1,free,5,\n"
+
+    job = await service.submit(
+        UploadFile(io.BytesIO(content.encode()), filename="products.csv")
+    )
+    job = await finish(service, job.job_id)
+
+    # другий чанк (рядки 4-5) не пройшов валідацію, перший уже записано
+    assert FakeImport.chunks == [["A-1", "A-2"]]
+    assert job.status == ImportJobStatus.failed
+    assert (job.processed_rows, job.created) == (2, 2)
+    assert [error["row"] for error in job.errors] == [5]
+    assert os.listdir(tmp_path) == []
+    assert await service.redis.keys(service.lease_prefix + "*") == []
+
+
+async def test_valid_file_is_imported_chunk_by_chunk(monkeypatch, tmp_path):
+    service = make_service(monkeypatch, tmp_path)
+    content = HEADER + "".join(f"A-{i},Chair {i},,1,10,5,\n" for i in range(1, 6))
+
+    job = await service.submit(
+        UploadFile(io.BytesIO(content.encode()), filename="products.csv")
+    )
+    job = await finish(service, job.job_id)
+
+    assert FakeImport.chunks == [["A-1", "A-2"], ["A-3", "A-4"], ["A-5"]]
+    assert job.status == ImportJobStatus.completed
+    assert (job.total_rows, job.processed_rows) == (5, 5)
+
+
+async def test_jobs_without_lease_are_failed_on_startup(monkeypatch, tmp_path):
+    service = make_service(monkeypatch, tmp_path)
+    jobs = {}
+    for name, status in [
+        ("orphan", ImportJobStatus.running),
+        ("queued", ImportJobStatus.queued),
+        ("alive", ImportJobStatus.running),
+        ("done", ImportJobStatus.completed),
+    ]:
+        jobs[name] = ImportJobRead(
+            job_id=name,
+            status=status,
+            filename="products.csv",
+            created_at=datetime.now(UTC),
+        )
+        await service._save(jobs[name])
+        open(tmp_path / f"{name}.csv", "w").close()
+    # задачу "alive" ще обробляє інший воркер
+    await service._renew_lease("alive")
+
+    assert await service.recover_stale_jobs() == 2
+
+    for name in ("orphan", "queued"):
+        job = await service.get_job(name)
+        assert job.status == ImportJobStatus.failed and job.finished_at
+    assert (await service.get_job("alive")).status == ImportJobStatus.running
+    assert (await service.get_job("done")).status == ImportJobStatus.completed
+    assert sorted(os.listdir(tmp_path)) == ["alive.csv", "done.csv"]
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.exceptions import BadRequestException
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip_id():
+    cursor = encode_cursor(42, 42)
+    assert decode_cursor(cursor) == (42, 42)
+
+
+def test_cursor_roundtrip_datetime():
+    created_at = datetime(2025, 1, 2, 3, 4, 5)
+    cursor = encode_cursor(created_at, 7)
+    assert decode_cursor(cursor, datetime) == (created_at, 7)
+
+
+def test_invalid_cursor():
+    with pytest.raises(BadRequestException):
+        decode_cursor("not-a-cursor")
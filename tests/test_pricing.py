@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.db.db import async_session_maker
+from app.services.pricing import PricingService, compute_totals
+from tests.fakes import FakeProducts, RecordingSession, build_service, product_row
+
+
+def test_totals_include_surcharges_and_percent_discount():
+    totals = compute_totals(
+        [2, 1, 3], [10.0, 5.5, None], [1.25, 0.0, 4.0], "percent", 10
+    )
+
+    assert totals.unit_prices == [11.25, 5.5, None]
+    assert totals.line_totals == [22.5, 5.5, None]
+    assert (totals.subtotal, totals.discount, totals.total) == (28.0, 2.8, 25.2)
+
+
+def test_fixed_discount_is_capped_by_subtotal():
+    totals = compute_totals([1], [3.0], [0.0], "fixed", 5)
+
+    assert (totals.subtotal, totals.discount, totals.total) == (3.0, 3.0, 0.0)
+
+
+def make_service(**discounts) -> PricingService:
+    products = FakeProducts(
+        {i: product_row(i, f"p {i}", 10.0) for i in (1, 2)},
+        option_prices={("color", "red"): 2.0},
+        discounts=discounts,
+    )
+    return build_service(PricingService, product_repo=products)
+
+
+def half(valid_to: datetime) -> dict:
+    return {
+        "discount_type": "percent",
+        "value": 50.0,
+        "is_active": True,
+        "valid_to": valid_to,
+    }
+
+
+async def test_price_cart_checks_discount_code():
+    later = datetime.utcnow() + timedelta(days=1)
+    lines = [(1, 2, {"color": "red"}), (2, 1, None)]
+
+    service = make_service(HALF=half(later))
+    totals = await service.price_cart(lines, "HALF")
+    assert (totals.subtotal, totals.total) == (34.0, 17.0)
+    assert service.product_repo.queries == 1
+
+    with pytest.raises(NotFoundException):
+        await make_service().price_cart(lines, "NOPE")
+    expired = make_service(HALF=half(datetime(2020, 1, 1)))
+    with pytest.raises(BadRequestException):
+        await expired.price_cart(lines, "HALF")
+
+
+async def test_cart_is_priced_by_one_select_over_values():
+    discount = {
+        "discount_id": 1,
+        "discount_type": "percent",
+        "discount_value": 10.0,
+        "is_active": True,
+        "valid_from": None,
+        "valid_to": None,
+    }
+    session = RecordingSession(
+        [
+            {"line": 0, "base_price": 10.0, "surcharge": 2.0, **discount},
+            {"line": 1, "base_price": 25.0, "surcharge": 0.0, **discount},
+            {"line": 2, "base_price": None, "surcharge": 0.0, **discount},
+        ]
+    )
+
+    totals = await PricingService(session).price_cart(
+        [(1, 2, {"color": "red"}), (2, 1, None), (99, 1, None)], "SALE"
+    )
+
+    (stmt,) = session.statements
+    assert "FROM (VALUES" in stmt and "AS lines (line, product_id, options)" in stmt
+    assert "LEFT OUTER JOIN discounts ON discounts.code = %(code_1)s" in stmt
+    assert session.params[0]["code_1"] == "SALE"
+    assert totals.unit_prices == [12.0, 25.0, None]
+    assert (totals.subtotal, totals.discount, totals.total) == (49.0, 4.9, 44.1)
+
+
+SEED = [
+    """
+    INSERT INTO categories (name, slug) VALUES ('pricing-test', 'pricing-test')
+    """,
+    """
+    INSERT INTO products (name, slug, sku, category_id, base_price, stock_quantity)
+    SELECT 'pricing-test', 'pricing-test', 'PRICING-TEST', id, 100, 10
+    FROM categories WHERE slug = 'pricing-test'
+    """,
+    """
+    INSERT INTO product_options (product_id, name, value, additional_price)
+    SELECT p.id, o.name, o.value, o.price
+    FROM products p,
+         (VALUES ('color', 'red', 5.0), ('color', 'blue', 7.0), ('size', 'XL', 2.5))
+         AS o (name, value, price)
+    WHERE p.sku = 'PRICING-TEST'
+    """,
+    """
+    INSERT INTO discounts (code, discount_type, value, is_active)
+    VALUES ('PRICING-TEST', 'fixed', 20, true)
+    """,
+]
+
+
+async def test_cart_prices_are_resolved_in_one_query():
+    async with async_session_maker() as session:
+        try:
+            await session.connection()
+        except (OSError, SQLAlchemyError) as e:
+            pytest.skip(f"PostgreSQL unavailable: {e}")
+        try:
+            for statement in SEED:
+                await session.execute(text(statement))
+            product_id = await session.scalar(
+                text("SELECT id FROM products WHERE sku = 'PRICING-TEST'")
+            )
+
+            totals = await PricingService(session).price_cart(
+                [
+                    (product_id, 2, {"color": "red", "size": "XL"}),
+                    (product_id, 1, None),
+                    (product_id, 1, {"color": "green"}),
+                    (-1, 1, None),
+                ],
+                "PRICING-TEST",
+            )
+        finally:
+            await session.rollback()
+
+    assert totals.unit_prices == [107.5, 100.0, 100.0, None]
+    assert (totals.subtotal, totals.discount, totals.total) == (415.0, 20.0, 395.0)
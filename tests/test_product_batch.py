@@ -0,0 +1,108 @@
+import pytest
+
+from app.core.exceptions import ConflictException, NotFoundException
+from app.repositories.product import ProductRepository
+from app.schemas.product import ProductBatchUpdate, ProductCreate
+from app.services.product import ProductService
+from tests.fakes import FakeProducts, RecordingSession, build_service
+
+
+def make_service() -> ProductService:
+    products = FakeProducts()
+    return build_service(
+        ProductService,
+        product_repo=products,
+        option_repo=products.options,
+        image_repo=products.images,
+    )
+
+
+def queries(service: ProductService) -> int:
+    return sum(
+        repo.queries
+        for repo in (service.product_repo, service.option_repo, service.image_repo)
+    )
+
+
+def product(i: int) -> ProductCreate:
+    return ProductCreate(
+        name=f"Chair {i}",
+        category_id=1,
+        base_price=10,
+        options=[{"name": "color", "value": "red"}, {"name": "size", "value": "M"}],
+        images=[{"image_url": f"http://img/{i}.jpg", "is_main": True}],
+    )
+
+
+@pytest.mark.parametrize("size", [1, 50])
+async def test_create_batch_uses_constant_number_of_statements(size):
+    service = make_service()
+
+    created = await service.create_products([product(i) for i in range(size)])
+
+    assert queries(service) == 5
+    assert [p.name for p in created] == [f"Chair {i}" for i in range(size)]
+    assert len(created[-1].options) == 2 and len(created[-1].images) == 1
+    assert len({p.slug for p in created}) == size
+
+
+async def test_create_batch_rejects_duplicate_names():
+    service = make_service()
+
+    with pytest.raises(ConflictException):
+        await service.create_products([product(1), product(1)])
+
+
+async def test_update_batch_replaces_children_in_constant_statements():
+    service = make_service()
+    await service.create_products([product(i) for i in range(20)])
+    before = queries(service)
+
+    updated = await service.update_products(
+        [
+            ProductBatchUpdate(
+                id=i, base_price=5, options=[{"name": "a", "value": "b"}]
+            )
+            for i in range(1, 21)
+        ]
+    )
+
+    # refs, UPDATE, DELETE опцій, INSERT опцій, читання результату
+    assert queries(service) - before == 5
+    assert all(p.base_price == 5 for p in updated)
+    assert all([o.name for o in p.options] == ["a"] for p in updated)
+    assert all(len(p.images) == 1 for p in updated)
+
+
+async def test_update_batch_reports_missing_products():
+    service = make_service()
+    await service.create_products([product(1)])
+
+    with pytest.raises(NotFoundException):
+        await service.update_products([ProductBatchUpdate(id=99, base_price=1)])
+
+
+async def test_repository_sends_batch_as_one_insert_and_one_update():
+    session = RecordingSession()
+    repo = ProductRepository(session)
+
+    await repo.add_many(
+        [
+            {"name": f"Chair {i}", "slug": f"chair-{i}", "base_price": 10}
+            for i in range(30)
+        ]
+    )
+    await repo.edit_many([{"id": 1, "name": "Sofa"}, {"id": 2, "base_price": 5.0}])
+
+    insert, update = session.statements
+    assert insert.startswith("INSERT INTO products") and "RETURNING" in insert
+    assert [session.params[0][f"name_m{i}"] for i in range(30)] == [
+        f"Chair {i}" for i in range(30)
+    ]
+    assert update.startswith("UPDATE products SET") and "FROM (VALUES" in update
+    # рядки VALUES (id, base_price, base_price_set, name, name_set), NULL
+    # вбудовано в SQL: поле, якого немає в елементі, не перезаписується
+    assert list(session.params[1].values()) == [
+        *(1, False, "Sofa", True),
+        *(2, 5.0, True, False),
+    ]
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.db.cache import invalidation_bus
+from app.db.redis import RedisService
+from app.schemas.product import ProductCard
+from app.services.category_tree import CategoryTree, category_tree
+from app.services.product_cache import ProductCache
+from tests.fakes import InMemoryRedis
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = InMemoryRedis()
+    monkeypatch.setattr(RedisService, "_instance", fake)
+    monkeypatch.setattr(invalidation_bus, "redis", fake)
+    monkeypatch.setattr(
+        category_tree,
+        "tree",
+        CategoryTree([(1, "phones", None), (2, "laptops", None), (3, "android", 1)]),
+    )
+    return fake
+
+
+async def test_second_read_is_served_from_cache(redis):
+    cache = ProductCache()
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        return Item(id=1, name="Phone")
+
+    key = cache.detail_key("id", 1)
+    assert await cache.get_or_load(key, Item, load) == Item(id=1, name="Phone")
+    assert await cache.get_or_load(key, Item, load) == Item(id=1, name="Phone")
+
+    assert loads == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+async def test_invalidation_bumps_only_affected_scopes(redis):
+    cache = ProductCache()
+    phones = await cache.list_key(1, category_id=1, skip=0, limit=10)
+    laptops = await cache.list_key(2, category_id=2, skip=0, limit=10)
+    everything = await cache.list_key(None, skip=0, limit=10)
+
+    await cache.invalidate(category_ids=[1], product_ids=[5], slugs=["phone"])
+
+    assert await cache.list_key(1, category_id=1, skip=0, limit=10) != phones
+    assert await cache.list_key(2, category_id=2, skip=0, limit=10) == laptops
+    assert await cache.list_key(None, skip=0, limit=10) != everything
+
+
+async def test_invalidation_reaches_parent_categories(redis):
+    cache = ProductCache()
+    phones = await cache.list_key(1, category_ids=[1, 3], skip=0, limit=10)
+
+    await cache.invalidate(category_ids=[3])
+
+    assert await cache.list_key(1, category_ids=[1, 3], skip=0, limit=10) != phones
+
+
+async def test_other_workers_see_new_versions(redis):
+    worker_a, worker_b = ProductCache(), ProductCache()
+    before = await worker_b.list_key(1, category_id=1, skip=0, limit=10)
+
+    await worker_a.invalidate(category_ids=[1])
+
+    assert await worker_b.list_key(1, category_id=1, skip=0, limit=10) != before
+
+
+async def test_stale_entry_is_served_and_refreshed_in_background(
+    redis, monkeypatch
+):
+    monkeypatch.setattr(settings.app, "PRODUCT_CACHE_TTL", -1)
+    cache = ProductCache()
+    key = cache.detail_key("id", 1)
+
+    async def load():
+        return Item(id=1, name="old")
+
+    async def revalidate():
+        return Item(id=1, name="new")
+
+    await cache.get_or_load(key, Item, load)
+    stale = await cache.get_or_load(key, Item, load, revalidate)
+    await asyncio.gather(*cache.entries._tasks)
+
+    assert stale.name == "old"
+    assert cache.stats()["stale_hits"] == 1
+    assert '"new"' in redis.data["product:" + key]
+
+
+async def test_cards_are_loaded_in_one_batch_and_invalidated(redis):
+    cache = ProductCache()
+    loads = []
+
+    async def load(product_ids):
+        loads.append(product_ids)
+        return [
+            ProductCard(
+                id=i,
+                name=f"P{i}",
+                slug=f"p{i}",
+                category_id=1,
+                base_price=10,
+                stock_quantity=1,
+            )
+            for i in product_ids
+            if i != 9
+        ]
+
+    first = await cache.get_cards([1, 2, 9], load)
+    cache.entries.local.clear()  # другий воркер: читання з Redis
+    second = await cache.get_cards([2, 1], load)
+    await cache.invalidate(product_ids=[2])
+    await cache.get_cards([1, 2], load)
+
+    assert sorted(first) == sorted(second) == [1, 2]
+    assert loads == [[1, 2, 9], [2]]
@@ -0,0 +1,164 @@
+import json
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.exceptions import BadRequestException
+from app.db.db import async_session_maker
+from app.models import Product
+from app.repositories.product import ProductRepository
+from app.services.product import ProductService
+
+
+def test_option_filters_grouped_by_name():
+    options = ["size:M", "color:red", "color:blue", "color:red"]
+
+    assert ProductService._parse_options(options) == {
+        "color": ["blue", "red"],
+        "size": ["M"],
+    }
+
+
+def test_invalid_option_filter():
+    with pytest.raises(BadRequestException):
+        ProductService._parse_options(["color"])
+
+
+SEED = [
+    """
+    INSERT INTO categories (name, slug)
+    SELECT 'plan-test ' || g, 'plan-test-' || g FROM generate_series(1, 50) g
+    """,
+    """
+    INSERT INTO products (
+        name, slug, sku, category_id, base_price, stock_quantity, created_at
+    )
+    SELECT 'plan-test ' || g, 'plan-test-' || g, 'PLAN-TEST-' || g,
+           c.ids[1 + g % 50], (g % 1000) + 0.99,
+           CASE WHEN g % 10 = 0 THEN 5 ELSE 0 END,
+           now() - g * interval '1 minute'
+    FROM generate_series(1, 20000) g,
+         (SELECT array_agg(id) AS ids FROM categories
+          WHERE slug LIKE 'plan-test-%') c
+    """,
+    """
+    INSERT INTO product_options (product_id, name, value, additional_price)
+    SELECT id, 'size', CASE WHEN id % 500 = 0 THEN 'XXL' ELSE 'M' END, 0
+    FROM products WHERE sku LIKE 'PLAN-TEST-%'
+    """,
+    "ANALYZE categories",
+    "ANALYZE products",
+    "ANALYZE product_options",
+]
+
+
+@pytest.fixture
+async def seeded_session():
+    """Сесія з тестовим каталогом; усе відкочується після тесту."""
+    async with async_session_maker() as session:
+        try:
+            await session.connection()
+        except (OSError, SQLAlchemyError) as e:
+            pytest.skip(f"PostgreSQL unavailable: {e}")
+        for statement in SEED:
+            await session.execute(text(statement))
+        category_id = await session.scalar(
+            text("SELECT id FROM categories WHERE slug = 'plan-test-7'")
+        )
+        yield session, category_id
+        await session.rollback()
+
+
+async def plan_indexes(session, stmt) -> set[str]:
+    connection = await session.connection()
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled.string}", params
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    found, nodes = set(), [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            found.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+def page_stmt(repo: ProductRepository, sort: str, **filters):
+    order_by, descending = {
+        "price": ("base_price", False),
+        "newest": ("created_at", True),
+        "rating": ("rating_avg", True),
+    }[sort]
+    stmt = repo._filter_products(select(Product.id), **filters)
+    return repo._paginate(stmt, limit=20, order_by=order_by, descending=descending)
+
+
+async def test_category_price_range_uses_composite_index(seeded_session):
+    session, category_id = seeded_session
+    repo = ProductRepository(session)
+    stmt = page_stmt(
+        repo, "price", category_ids=[category_id], min_price=100, max_price=200
+    )
+
+    assert "ix_products_category_price" in await plan_indexes(session, stmt)
+
+
+async def test_in_stock_uses_partial_index(seeded_session):
+    session, category_id = seeded_session
+    repo = ProductRepository(session)
+    stmt = page_stmt(repo, "price", category_ids=[category_id], in_stock=True)
+
+    assert "ix_products_in_stock_category_price" in await plan_indexes(session, stmt)
+
+
+async def test_newest_uses_created_index(seeded_session):
+    session, _ = seeded_session
+    stmt = page_stmt(ProductRepository(session), "newest")
+
+    assert "ix_products_created" in await plan_indexes(session, stmt)
+
+
+async def test_rating_sort_reads_index_without_aggregation(seeded_session):
+    session, category_id = seeded_session
+    stmt = page_stmt(ProductRepository(session), "rating", category_ids=[category_id])
+
+    indexes = await plan_indexes(session, stmt)
+    assert "ix_products_category_rating" in indexes
+    assert "ix_reviews_product_rating" not in indexes
+
+
+async def test_option_facet_uses_option_index(seeded_session):
+    session, _ = seeded_session
+    stmt = page_stmt(ProductRepository(session), "price", options={"size": ["XXL"]})
+
+    # рідкісне значення — від опцій до товарів, інакше EXISTS по product_id
+    assert {
+        "ix_product_options_name_value",
+        "ix_product_options_product_id",
+    } & await plan_indexes(session, stmt)
+
+
+async def test_option_facets_ignore_own_option_filter(seeded_session):
+    session, _ = seeded_session
+    repo = ProductRepository(session)
+    scope = {"min_price": 100, "max_price": 600}
+
+    def sizes(rows):
+        return {value: count for name, value, count in rows if name == "size"}
+
+    all_totals, all_options = await repo.find_product_facets(**scope)
+    totals, options = await repo.find_product_facets(
+        **scope, options={"size": ["XXL"]}
+    )
+
+    # список звужено до XXL, але лічильники size — як без фільтра по size
+    assert totals[0] < all_totals[0]
+    assert sizes(options) == sizes(all_options)
+    assert {"M", "XXL"} <= set(sizes(options))
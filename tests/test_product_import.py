@@ -0,0 +1,42 @@
+import io
+import zipfile
+
+import pytest
+
+from app.core.exceptions import BadRequestException
+from app.services.product_import import read_rows
+
+HEADER = b"sku,name,description,category_id,base_price,stock_quantity,image_url\n"
+
+
+def read_error(content: bytes, filename: str) -> dict:
+    with pytest.raises(BadRequestException) as exc:
+        list(read_rows(io.BytesIO(content), filename))
+    return exc.value.detail["errors"][0]
+
+
+def test_csv_rows_are_read_with_empty_values_as_none():
+    content = "\ufeff".encode() + HEADER + "A-1,Стілець,,1,10,5,\n".encode()
+
+    rows = list(read_rows(io.BytesIO(content), "products.csv"))
+
+    assert rows[1] == ("A-1", "Стілець", None, "1", "10", "5", None)
+
+
+def test_malformed_files_are_reported_with_line_number():
+    csv_content = HEADER + b"A-1,Chair,,1,10,5,\nA-2,\xff\xfe,,1,10,5,\n"
+    assert read_error(csv_content, "products.csv")["row"] == 3
+
+    ndjson = b'{"sku": "A-1"}\n\n{"sku": \n'
+    assert read_error(ndjson, "products.ndjson")["row"] == 3
+    assert read_error(b'{"sku": "A-1"}\n[1, 2]\n', "products.ndjson")["row"] == 2
+
+
+def test_corrupt_xlsx_is_reported_as_bad_request():
+    assert read_error(b"not a zip", "products.xlsx")["row"] == 1
+
+    # zip-архів без частин книги Excel
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("readme.txt", "not a workbook")
+    assert read_error(archive.getvalue(), "products.xlsx")["row"] == 1
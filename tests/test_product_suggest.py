@@ -0,0 +1,82 @@
+import contextlib
+from types import SimpleNamespace
+
+from app.repositories.product import ProductRepository
+from app.services.product_suggest import PrefixIndex, SuggestIndex
+
+ENTRIES = [
+    ("iPhone 15", 1, 50),
+    ("iPhone 15 Pro", 2, 80),
+    ("iPad Air", 3, 30),
+    ("Чохол для iPhone", 4, 100),
+    ("чайник електричний", 5, 10),
+    ("Чайник скляний", 6, 20),
+    ("IP-CAM-01", 7, 5),
+]
+
+
+def texts(index: PrefixIndex, positions: list[int]) -> list[str]:
+    return [index.texts[pos] for pos in positions]
+
+
+def test_prefix_ordered_by_popularity_ignoring_case():
+    index = PrefixIndex(ENTRIES, top_k=5, heavy=100)
+
+    assert texts(index, index.candidates("iph", 5)) == ["iPhone 15 Pro", "iPhone 15"]
+    assert texts(index, index.candidates("чай", 5)) == [
+        "Чайник скляний",
+        "чайник електричний",
+    ]
+    assert index.candidates("xyz", 5) == []
+
+
+def test_heavy_prefixes_use_precomputed_top():
+    entries = [(f"item {i:04d}", i, i % 97) for i in range(1000)]
+    index = PrefixIndex(entries, top_k=3, heavy=50)
+
+    assert "item 0" in index._top
+    expected = sorted((score for _, _, score in entries), reverse=True)[:3]
+    found = [index.scores[pos] for pos in index.candidates("item", 3)]
+    assert found == expected
+
+
+def make_suggest(rows: dict[int, tuple[str, str | None, int]], monkeypatch):
+    async def find_suggest_rows(self, ids):
+        return [
+            SimpleNamespace(id=i, name=rows[i][0], sku=rows[i][1], popularity=rows[i][2])
+            for i in ids
+            if i in rows
+        ]
+
+    monkeypatch.setattr(ProductRepository, "find_suggest_rows", find_suggest_rows)
+    suggest = SuggestIndex(session_factory=contextlib.nullcontext)
+    entries = []
+    for product_id, row in rows.items():
+        entries += suggest._entries(
+            SimpleNamespace(id=product_id, name=row[0], sku=row[1], popularity=row[2])
+        )
+    suggest.index = PrefixIndex(entries, top_k=5, heavy=100)
+    return suggest
+
+
+async def test_suggest_matches_name_and_sku_once(monkeypatch):
+    suggest = make_suggest(
+        {1: ("iPhone 15", "APL-15", 50), 2: ("iPad Air", "AIR-1", 30)}, monkeypatch
+    )
+
+    assert suggest.suggest("ip") == [(1, "iPhone 15"), (2, "iPad Air")]
+    assert suggest.suggest("air") == [(2, "AIR-1")]
+    assert suggest.suggest("apl") == [(1, "APL-15")]
+
+
+async def test_changes_go_to_delta_until_rebuild(monkeypatch):
+    rows = {1: ("iPhone 15", None, 50), 2: ("iPad Air", None, 30)}
+    suggest = make_suggest(rows, monkeypatch)
+
+    rows[1] = ("Galaxy S24", None, 50)
+    rows[3] = ("iPod", None, 70)
+    del rows[2]
+    await suggest.reload([1, 2, 3])
+
+    assert suggest.suggest("i") == [(3, "iPod")]
+    assert suggest.suggest("gal") == [(1, "Galaxy S24")]
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.services.review import ReviewService
+from tests.fakes import FakeProducts, build_service, product_row
+
+
+class FakeReviews:
+    def __init__(self):
+        self.session = SimpleNamespace(info={})
+        self.rows: dict[int, dict] = {}
+
+    async def find_one(self, **filter_by):
+        for row in self.rows.values():
+            if all(row[k] == v for k, v in filter_by.items()):
+                return SimpleNamespace(**row)
+
+    async def add_one(self, data):
+        row = {"id": len(self.rows) + 1, "created_at": "2026-01-01T00:00:00", **data}
+        self.rows[row["id"]] = row
+        return row
+
+    async def edit_one(self, id, data):
+        self.rows[id].update(data)
+        return self.rows[id]
+
+    async def delete_one(self, id):
+        return self.rows.pop(id)
+
+
+def make_service(*product_ids) -> ReviewService:
+    return build_service(
+        ReviewService,
+        review_repo=FakeReviews(),
+        product_repo=FakeProducts({i: product_row(i, f"p {i}") for i in product_ids}),
+    )
+
+
+def ratings(service: ReviewService) -> dict[int, list[int]]:
+    return {
+        product_id: [row["rating_sum"], row["rating_count"]]
+        for product_id, row in service.product_repo.rows.items()
+    }
+
+
+async def test_rating_aggregates_follow_reviews():
+    service = make_service(1, 2)
+
+    first = await service.create_review(10, ReviewCreate(product_id=1, rating=5))
+    await service.create_review(11, ReviewCreate(product_id=1, rating=3))
+    assert ratings(service)[1] == [8, 2]
+
+    await service.update_review(
+        first.id, 10, ReviewUpdate(product_id=1, rating=1, comment=None)
+    )
+    assert ratings(service)[1] == [4, 2]
+
+    # відгук перенесено на інший товар
+    await service.update_review(
+        first.id, 10, ReviewUpdate(product_id=2, rating=4, comment=None)
+    )
+    assert ratings(service) == {1: [3, 1], 2: [4, 1]}
+
+    await service.delete_review(first.id, 10)
+    assert ratings(service) == {1: [3, 1], 2: [0, 0]}
+    # кеш товару скидається після кожного commit
+    assert len(service.review_repo.session.info["after_commit"]) == 6
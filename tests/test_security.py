@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from app.core.security import PasswordHasher
+
+
+async def test_hash_and_verify():
+    hasher = PasswordHasher(workers=2)
+    hashed = await hasher.hash("password1")
+
+    assert await hasher.verify("password1", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert hasher.stats()["completed"] == 3
+
+
+async def test_hashing_does_not_block_event_loop():
+    hasher = PasswordHasher(workers=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(hasher.hash("password") for _ in range(4)))
+    elapsed = time.perf_counter() - started
+    task.cancel()
+
+    # поки хешування йде в потоках, loop продовжує обслуговувати інші задачі
+    assert ticks >= int(elapsed / 0.01) // 2
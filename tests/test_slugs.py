@@ -0,0 +1,45 @@
+from app.services.base import BaseService
+
+
+class FakeRepo:
+    def __init__(self, *slugs):
+        self.slugs = set(slugs)
+        self.queries = 0
+
+    async def find_slugs(self, bases, slug_field="slug"):
+        self.queries += 1
+        return {
+            slug
+            for slug in self.slugs
+            if any(slug == base or slug.startswith(f"{base}-") for base in bases)
+        }
+
+
+async def test_free_slug_takes_first_free_suffix():
+    repo = FakeRepo("chair", "chair-1", "chair-3", "chair-legs", "chairs")
+
+    assert await BaseService()._generate_unique_slug("Chair", repo) == "chair-2"
+    assert await BaseService()._generate_unique_slug("Table", repo) == "table"
+    assert repo.queries == 2
+
+
+async def test_batch_respects_collisions_inside_batch():
+    repo = FakeRepo("chair", "chair-2")
+    names = ["Chair", "chair", "Table", "CHAIR ", "Table"]
+
+    slugs = await BaseService()._generate_unique_slugs(names, repo)
+
+    assert slugs == ["chair-1", "chair-3", "table", "chair-4", "table-1"]
+    assert repo.queries == 1
+
+
+async def test_batch_slug_never_reuses_suffix_slug_of_another_name():
+    assert await BaseService()._generate_unique_slugs(
+        ["Chair", "Chair", "Chair 1"], FakeRepo()
+    ) == ["chair", "chair-1", "chair-1-1"]
+    assert await BaseService()._generate_unique_slugs(
+        ["Chair 1", "Chair", "Chair"], FakeRepo()
+    ) == ["chair-1", "chair", "chair-2"]
+    assert await BaseService()._generate_unique_slugs(
+        ["Chair", "Chair 1"], FakeRepo("chair")
+    ) == ["chair-1", "chair-1-1"]